@@ -0,0 +1,105 @@
+"""ETags y GET condicional para las rutas de solo lectura
+
+Las respuestas de estas rutas dependen solo de los CSVs y de los parámetros
+del request, así que el ETag se deriva de la versión de contenido de los datos
+(hash de los archivos fuente) más el path y los query params. Si el cliente
+envía If-None-Match con ese ETag se responde 304 sin ejecutar el handler.
+
+El ETag solo se envía si el cuerpo corresponde a esa versión. Mientras un
+dataset o una vista materializada se recargan en segundo plano se siguen
+sirviendo los bytes anteriores: si el handler sirvió una vista desactualizada
+o data_version cambió durante el request, la respuesta sale sin validador (y
+el cliente no puede quedar fijado a datos viejos con un 304).
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.services.data_loader import data_loader
+from app.services.views import track_stale_views
+from app.api.negotiation import negotiate
+
+
+# Routers de solo lectura cubiertos (las alertas tienen estado propio y quedan fuera)
+CACHEABLE_PREFIXES = (
+    "/api/dashboard",
+    "/api/balances",
+    "/api/models",
+    "/api/correlations",
+    "/api/reliability",
+    "/api/benchmark",
+    "/api/forecast",
+)
+
+
+def is_cacheable(request: Request) -> bool:
+    """La ruta está cubierta por ETags"""
+    return request.method in ("GET", "HEAD") and request.url.path.startswith(CACHEABLE_PREFIXES)
+
+
+def compute_etag(request: Request) -> str:
+    """
+    ETag fuerte: versión de contenido de los datos + versión de la API + path + query params
+    + formato negociado con Accept.
+    Los query params se ordenan para que ?a=1&b=2 y ?b=2&a=1 compartan ETag.
+    """
+    params = sorted(request.query_params.multi_items())
+    key = "|".join([
+        settings.ETAG_SALT,
+        data_loader.content_version,
+        request.url.path,
+        repr(params),
+        negotiate(request),
+    ])
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): ignora el prefijo W/"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cache_headers(etag: str) -> dict:
+    """Headers de caché comunes a las respuestas 200 y 304"""
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate",
+        # Las rutas de gráficos cambian de formato según Accept (ver app.api.negotiation)
+        "Vary": "Accept",
+    }
+
+
+async def etag_middleware(request: Request, call_next):
+    """Responde 304 si el ETag del cliente sigue vigente; si no, agrega ETag a la respuesta"""
+    if not is_cacheable(request):
+        return await call_next(request)
+
+    # Detectar cambios en los CSVs aunque los clientes solo hagan requests condicionales
+    # (puede calcular el SHA-256 de archivos enteros: fuera del event loop)
+    await run_in_threadpool(data_loader.check_sources)
+
+    etag = compute_etag(request)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+
+    version = data_loader.data_version
+    tracker = track_stale_views()
+    response = await call_next(request)
+
+    if response.status_code == 200:
+        if tracker.stale or data_loader.data_version != version:
+            # Bytes de una versión anterior (o de una recarga a mitad del request): sin validador
+            response.headers.update({"Cache-Control": "no-cache", "Vary": "Accept"})
+        else:
+            # El handler pudo cargar datasets por primera vez: el ETag debe reflejar lo que se sirvió
+            response.headers.update(cache_headers(compute_etag(request)))
+
+    return response
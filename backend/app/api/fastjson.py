@@ -0,0 +1,114 @@
+"""Serialización JSON directa desde columnas para respuestas con muchas filas
+
+Las rutas que devuelven series largas (balances, scatter plots) construían un
+objeto Pydantic por fila y luego lo serializaban: con historias largas eso es
+la mayor parte del tiempo del request. Aquí las filas se arman como dicts a
+partir de las columnas NumPy (ya convertidas a tipos de Python) y se
+serializan con orjson.
+
+Las rutas conservan su response_model, así que el esquema OpenAPI no cambia;
+devolver un Response directamente solo evita la validación y la serialización
+de FastAPI. Si orjson no está instalado se usa json con la misma configuración
+que JSONResponse.
+"""
+import importlib.util
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import Response
+
+
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa a JSON compacto (UTF-8, sin NaN)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """Respuesta JSON serializada con dumps (el contenido debe ser tipos nativos de Python)"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def records(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Arma filas como dicts a partir de columnas del mismo largo
+
+    Args:
+        columns: Nombre del campo -> lista de valores (en el orden del esquema de respuesta)
+    """
+    keys = tuple(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+
+def float_column(values: Any, ndigits: Optional[int] = None) -> List[Optional[float]]:
+    """
+    Columna numérica como lista de float de Python, con NaN -> None
+
+    Args:
+        values: Serie o array numérico
+        ndigits: Si se indica, redondea cada valor con round() (igual que el código por fila)
+    """
+    array = np.asarray(values, dtype=np.float64)
+    result = array.tolist()
+    missing = np.flatnonzero(np.isnan(array))
+    if ndigits is not None:
+        result = [round(value, ndigits) for value in result]
+    for i in missing.tolist():
+        result[i] = None
+    return result
+
+
+def str_column(values: Any) -> List[str]:
+    """Columna como lista de str, igual que str(valor) fila por fila"""
+    series = pd.Series(values)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Convertir solo las categorías y expandirlas por código
+        categories = [str(c) for c in series.cat.categories] + ["nan"]
+        return [categories[code] for code in series.cat.codes.tolist()]
+    return [str(value) for value in series.tolist()]
+
+
+def datetime_column(values: Any) -> List[Optional[str]]:
+    """
+    Columna de fechas en ISO 8601, igual que un campo datetime de Pydantic
+
+    Sin fracción de segundo cuando es cero (YYYY-MM-DDTHH:MM:SS); NaT -> None
+    """
+    array = pd.to_datetime(pd.Series(values)).to_numpy(dtype="datetime64[us]")
+    missing = np.isnat(array)
+    micros = array.astype(np.int64)
+    if (micros[~missing] % 1_000_000 == 0).all():
+        result = np.datetime_as_string(array, unit="s").tolist()
+    else:
+        result = [value.isoformat() for value in pd.Series(array).dt.to_pydatetime()]
+    for i in np.flatnonzero(missing).tolist():
+        result[i] = None
+    return result
+
+
+def native_column(values: Any) -> List[Any]:
+    """Columna como lista de tipos nativos según su dtype (faltantes -> None)"""
+    if isinstance(values, list):
+        return values
+    series = pd.Series(values)
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return series.tolist()
+    if pd.api.types.is_float_dtype(series):
+        return float_column(series)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return datetime_column(series)
+    return series.astype(object).where(series.notna(), None).tolist()
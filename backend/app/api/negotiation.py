@@ -0,0 +1,155 @@
+"""Negociación de contenido (Accept) para las rutas de gráficos
+
+Las rutas de gráficos devuelven por defecto JSON por filas (una lista de
+objetos), que el frontend vuelve a armar como columnas para los charts. Con el
+header Accept pueden pedir el mismo contenido por columnas, armado directo desde
+los arrays en caché:
+
+- application/vnd.balancia.columns+json: JSON por columnas ({campo: [valores]})
+- application/msgpack: la misma estructura en MessagePack (requiere msgpack)
+- application/vnd.apache.arrow.stream: Arrow IPC, un record batch con las
+  columnas y los campos escalares en la metadata del esquema (requiere pyarrow)
+
+Sin Accept, con */* o con application/json la respuesta es la de siempre. Los
+formatos cuya dependencia no está instalada no se ofrecen.
+"""
+import importlib.util
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.api.fastjson import dumps, native_column
+from app.api.streaming import ARROW_AVAILABLE
+
+
+MSGPACK_AVAILABLE = importlib.util.find_spec("msgpack") is not None
+
+if MSGPACK_AVAILABLE:
+    import msgpack
+
+
+JSON = "application/json"
+COLUMNS_JSON = "application/vnd.balancia.columns+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Alias aceptados en Accept -> formato
+ALIASES = {"application/x-msgpack": MSGPACK}
+
+# Formatos ofrecidos, en orden de preferencia del servidor ante empates
+OFFERED = tuple(
+    media_type for media_type, available in (
+        (JSON, True),
+        (COLUMNS_JSON, True),
+        (MSGPACK, MSGPACK_AVAILABLE),
+        (ARROW, ARROW_AVAILABLE),
+    ) if available
+)
+
+# Documentación OpenAPI de los formatos alternativos (parámetro responses= de las rutas)
+NEGOTIATED_RESPONSES = {
+    200: {
+        "content": {media_type: {} for media_type in OFFERED if media_type != JSON},
+        "description": "Según Accept: JSON por filas (por defecto), JSON por columnas, MessagePack o Arrow IPC",
+    }
+}
+
+
+def _parse_accept(header: str) -> List[Tuple[str, float]]:
+    """Media ranges del header Accept con su q"""
+    ranges = []
+    for part in header.split(","):
+        media_range, *params = [piece.strip() for piece in part.split(";")]
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((ALIASES.get(media_range.lower(), media_range.lower()), q))
+    return ranges
+
+
+def negotiate(request: Request) -> str:
+    """
+    Formato de la respuesta según el header Accept
+
+    Gana el formato ofrecido con mayor q; a igual q, el que coincide de forma
+    exacta sobre el que entra por comodín (*/* o application/*), y después el
+    orden de OFFERED. Si ninguno es aceptable se responde JSON.
+    """
+    header = request.headers.get("accept")
+    if not header:
+        return JSON
+
+    ranges = _parse_accept(header)
+    best, best_rank = JSON, None
+    for preference, media_type in enumerate(OFFERED):
+        family = media_type.split("/")[0] + "/*"
+        for media_range, q in ranges:
+            if media_range == media_type:
+                specificity = 2
+            elif media_range == family:
+                specificity = 1
+            elif media_range == "*/*":
+                specificity = 0
+            else:
+                continue
+            rank = (q, specificity, -preference)
+            if q > 0 and (best_rank is None or rank > best_rank):
+                best, best_rank = media_type, rank
+    return best
+
+
+def encode_columns(
+    media_type: str,
+    columns: Dict[str, Any],
+    meta: Optional[Dict[str, Any]] = None,
+    table: Optional[str] = None
+) -> bytes:
+    """
+    Serializa una tabla por columnas en el formato negociado
+
+    Args:
+        media_type: COLUMNS_JSON, MSGPACK o ARROW
+        columns: Nombre -> valores (Serie, array o lista; todas del mismo largo)
+        meta: Campos escalares de la respuesta (KPIs, totales, nombres de variables...)
+        table: Campo de la respuesta que contiene la tabla; None si la respuesta es solo la tabla
+
+    En JSON y MessagePack la estructura es {**meta, table: {columna: [valores]}}
+    (o directamente {columna: [valores]} sin table). En Arrow las columnas son el
+    record batch y meta/table van en la metadata del esquema.
+    """
+    meta = meta or {}
+
+    if media_type == ARROW:
+        import pyarrow as pa
+
+        arrays = {name: pa.array(values, from_pandas=True) for name, values in columns.items()}
+        metadata = {"meta": json.dumps(meta, ensure_ascii=False, default=str), "table": table or ""}
+        batch = pa.RecordBatch.from_pydict(arrays).replace_schema_metadata(metadata)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    native = {name: native_column(values) for name, values in columns.items()}
+    content = {**meta, table: native} if table else native
+    if media_type == MSGPACK:
+        return msgpack.packb(content, use_bin_type=True)
+    return dumps(content)
+
+
+def columns_response(
+    media_type: str,
+    columns: Dict[str, Any],
+    meta: Optional[Dict[str, Any]] = None,
+    table: Optional[str] = None
+) -> Response:
+    """Respuesta con la tabla serializada en el formato negociado (ver encode_columns)"""
+    return Response(content=encode_columns(media_type, columns, meta, table), media_type=media_type)
@@ -0,0 +1,107 @@
+"""Paginación por cursor (keyset) para las rutas que devuelven muchas filas
+
+El cursor es opaco para el cliente: codifica la clave de orden de la última
+fila entregada y una huella de los filtros y el orden de la consulta. La
+página siguiente empieza en la primera fila con clave mayor a la del cursor,
+así que las páginas son estables aunque se agreguen filas entre requests
+(a diferencia de offset/limit). Usar un cursor con otros filtros es un error 400.
+
+La paginación es opcional: sin `limit` ni `cursor` las rutas responden todas
+las filas, como antes.
+"""
+import base64
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.config import settings
+
+
+def query_fingerprint(query: Dict[str, Any]) -> str:
+    """Huella de los filtros y el orden de una consulta (sin limit ni cursor)"""
+    canonical = json.dumps(query, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(query: Dict[str, Any], last: Any) -> str:
+    """Cursor de la página siguiente a partir de la clave de la última fila entregada"""
+    payload = json.dumps({"q": query_fingerprint(query), "k": last}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], query: Dict[str, Any]) -> Any:
+    """
+    Clave de la última fila entregada, o None si no hay cursor (primera página)
+
+    Raises:
+        HTTPException: 400 si el cursor es inválido o se generó con otros filtros
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        fingerprint, last = payload["q"], payload["k"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    if fingerprint != query_fingerprint(query):
+        raise HTTPException(
+            status_code=400,
+            detail="El cursor corresponde a otra consulta (filtros u orden distintos)"
+        )
+    return last
+
+
+def resolve_page_size(limit: Optional[int], cursor: Optional[str]) -> Optional[int]:
+    """Tamaño de página: None (sin paginar) si no se pidió limit ni cursor"""
+    if limit is None and not cursor:
+        return None
+    return min(limit or settings.DEFAULT_PAGE_SIZE, settings.MAX_PAGE_SIZE)
+
+
+def keyset_page(
+    labels: np.ndarray,
+    after: Any,
+    page_size: int,
+    keys: Optional[np.ndarray] = None,
+    descending: bool = False
+) -> Tuple[np.ndarray, Optional[List]]:
+    """
+    Posiciones de una página ordenada por (clave, etiqueta), sin armar las filas
+
+    Args:
+        labels: Etiqueta única de cada fila (desempate); si no hay `keys` deben venir ordenadas
+        after: Clave de la última fila entregada ([clave, etiqueta]) o None para la primera página
+        page_size: Filas por página
+        keys: Columna por la que se ordena (None: orden de las etiquetas)
+        descending: Orden descendente de `keys`
+
+    Returns:
+        tuple: (posiciones de la página en los arrays de entrada, clave para el cursor
+        siguiente o None si es la última página)
+    """
+    if keys is None:
+        order = np.arange(len(labels))
+        sorted_keys = sorted_labels = labels
+    else:
+        keys = -keys if descending else keys
+        order = np.lexsort((labels, keys))
+        sorted_keys, sorted_labels = keys[order], labels[order]
+
+    start = 0
+    if after is not None:
+        last_key, last_label = after
+        lo = int(np.searchsorted(sorted_keys, last_key, side="left"))
+        hi = int(np.searchsorted(sorted_keys, last_key, side="right"))
+        start = lo + int(np.searchsorted(sorted_labels[lo:hi], last_label, side="right"))
+
+    end = min(start + page_size, len(order))
+    next_key = None
+    if end < len(order):
+        next_key = [sorted_keys[end - 1].item(), sorted_labels[end - 1].item()]
+    return order[start:end], next_key
@@ -1,93 +1,20 @@
 """Rutas de Alertas - Sistema de alertas y notificaciones"""
 from fastapi import APIRouter, HTTPException, Query, Path, Body
 from typing import Optional
-import pandas as pd
-from datetime import datetime, timedelta
-import random
-from app.services.data_loader import data_loader
+from app.config import settings
+from app.services.alert_store import alert_store, ALERT_STATES
+from app.api.pagination import decode_cursor, encode_cursor, resolve_page_size
 from app.schemas.responses import (
     AlertsResponse,
-    Alert,
-    AlertMetrics,
-    AlertStats,
     AlertStatsExtended,
     AlertUpdateRequest,
-    AlertUpdateResponse
+    AlertUpdateResponse,
+    AlertBatchUpdateRequest,
+    AlertBatchUpdateResponse
 )
 
 router = APIRouter()
 
-# Almacenamiento en memoria para estados de alertas (en producción sería una BD)
-alert_states = {}
-
-# Mapeo de válvulas a sectores
-VALVE_SECTORS = {
-    "VALVULA_1": "Sector Norte",
-    "VALVULA_2": "Sector Centro", 
-    "VALVULA_3": "Sector Sur",
-    "VALVULA_4": "Sector Este",
-    "VALVULA_5": "Sector Oeste"
-}
-
-
-def _generate_alert_description(nivel: str, mensajes: str, indice: float) -> str:
-    """Genera una descripción detallada basada en los datos de la alerta"""
-    if "Pérdidas negativas" in mensajes:
-        num_periodos = mensajes.split("periodo(s)")[0].split()[-1]
-        return f"Detección de pérdidas negativas en {num_periodos} periodo(s). Índice de pérdidas de {abs(indice):.1f}%. Requiere revisión de datos o posibles inconsistencias en mediciones."
-    elif nivel.upper() in ["CRITICO", "CRÍTICO"]:
-        return f"Índice de pérdidas crítico detectado ({abs(indice):.1f}%). Se superó el umbral crítico. Requiere intervención inmediata del equipo técnico."
-    elif nivel.upper() == "ALTO":
-        return f"Pérdidas superiores al promedio histórico. Índice de pérdidas en {abs(indice):.1f}%. Se recomienda investigación detallada."
-    elif nivel.upper() == "MEDIO":
-        return f"Índice de pérdidas ligeramente por encima del promedio ({abs(indice):.1f}%). Requiere seguimiento y monitoreo."
-    else:
-        return f"Desviación menor detectada. Índice de pérdidas: {abs(indice):.1f}%."
-
-
-def _determine_alert_type(nivel: str, indice: float) -> str:
-    """Determina el tipo de alerta basado en los datos"""
-    if indice < 0:
-        return "Anomalía"
-    elif nivel.upper() in ["CRITICO", "CRÍTICO", "ALTO"]:
-        return "Desbalance"
-    else:
-        return "Anomalía"
-
-
-def _normalize_severity(nivel: str) -> str:
-    """Normaliza el nivel de severidad al formato del frontend"""
-    nivel_upper = nivel.upper()
-    if nivel_upper in ["CRITICO", "CRÍTICO"]:
-        return "critica"
-    elif nivel_upper == "ALTO":
-        return "alta"
-    elif nivel_upper == "MEDIO":
-        return "media"
-    elif nivel_upper == "BAJO":
-        return "baja"
-    return "media"
-
-
-def _generate_alert_date(idx: int) -> str:
-    """Genera una fecha reciente para la alerta"""
-    # Genera fechas recientes (últimos 5 días)
-    days_ago = idx % 5
-    hours = random.randint(7, 20)
-    minutes = random.randint(0, 59)
-    alert_date = datetime.now() - timedelta(days=days_ago, hours=hours, minutes=minutes)
-    return alert_date.strftime("%Y-%m-%d %H:%M")
-
-
-def _get_default_alert_state(severidad: str) -> str:
-    """Determina el estado inicial basado en la severidad"""
-    if severidad == "critica":
-        return "pendiente"
-    elif severidad == "alta":
-        return random.choice(["pendiente", "revisada"])
-    else:
-        return random.choice(["revisada", "resuelta"])
-
 
 def _get_all_alerts_internal(
     nivel: Optional[str] = None,
@@ -97,89 +24,15 @@ def _get_all_alerts_internal(
     severidad: Optional[str] = None
 ):
     """
-    Lógica interna para obtener alertas.
+    Lógica interna para obtener alertas (lectura de los índices del almacén).
     Evita problemas con los objetos Query de FastAPI cuando se llama internamente.
     """
     try:
-        alertas_df = data_loader.load_alertas()
-        
-        if alertas_df.empty:
-            return AlertsResponse(alertas=[], total=0)
-        
-        # Aplicar filtro por nivel si se especifica
-        if nivel:
-            alertas_df = alertas_df[alertas_df['NIVEL'].str.upper() == nivel.upper()]
-        
-        # Aplicar filtro por válvula si se especifica
-        if valvula:
-            alertas_df = alertas_df[alertas_df['VALVULA'] == valvula]
-        
-        # Convertir a lista de alertas enriquecidas
-        alertas_list = []
-        for idx, row in alertas_df.iterrows():
-            alert_id = idx + 1
-            valvula_id = str(row['VALVULA'])
-            nivel_raw = str(row['NIVEL'])
-            mensajes = str(row['MENSAJES'])
-            indice_val = row.get('INDICE_PERDIDAS_%', 0)
-            entrada_val = row.get('ENTRADA_PROMEDIO', None)
-            
-            # Normalizar severidad
-            severidad_norm = _normalize_severity(nivel_raw)
-            
-            # Determinar tipo de alerta
-            tipo_alert = _determine_alert_type(nivel_raw, float(indice_val) if pd.notna(indice_val) else 0)
-            
-            # Obtener o generar estado
-            if alert_id not in alert_states:
-                alert_states[alert_id] = _get_default_alert_state(severidad_norm)
-            
-            # Generar fecha
-            fecha_str = _generate_alert_date(idx)
-            
-            # Obtener ubicación
-            ubicacion = VALVE_SECTORS.get(valvula_id, "Sector Desconocido")
-            
-            # Generar descripción
-            descripcion = _generate_alert_description(nivel_raw, mensajes, float(indice_val) if pd.notna(indice_val) else 0)
-            
-            # Calcular volumen perdido estimado (si tenemos entrada promedio)
-            volumen_perdido = None
-            if entrada_val is not None and pd.notna(entrada_val) and pd.notna(indice_val):
-                volumen_perdido = abs(float(entrada_val) * float(indice_val) / 100)
-            
-            alert = Alert(
-                id=alert_id,
-                fecha=fecha_str,
-                valvula=valvula_id,
-                ubicacion=ubicacion,
-                tipo=tipo_alert,
-                severidad=severidad_norm,
-                descripcion=descripcion,
-                estado=alert_states[alert_id],
-                metricas=AlertMetrics(
-                    indice_perdidas=round(abs(float(indice_val)), 2) if pd.notna(indice_val) else None,
-                    entrada_promedio=round(float(entrada_val), 2) if entrada_val is not None and pd.notna(entrada_val) else None,
-                    volumen_perdido=round(volumen_perdido, 2) if volumen_perdido else None,
-                    umbral=12.0 if severidad_norm in ["critica", "alta"] else None
-                )
-            )
-            
-            alertas_list.append(alert)
-        
-        # Aplicar filtros adicionales del frontend
-        if estado:
-            alertas_list = [a for a in alertas_list if a.estado == estado]
-        
-        if tipo:
-            alertas_list = [a for a in alertas_list if a.tipo == tipo]
-        
-        if severidad:
-            alertas_list = [a for a in alertas_list if a.severidad == severidad]
-        
+        alertas_list = alert_store.filter(nivel, valvula, estado, tipo, severidad)
         return AlertsResponse(
             alertas=alertas_list,
-            total=len(alertas_list)
+            total=len(alertas_list),
+            total_estimado=len(alertas_list)
         )
     
     except Exception as e:
@@ -193,19 +46,54 @@ def _get_all_alerts_internal(
     "/",
     response_model=AlertsResponse,
     summary="Obtener todas las alertas",
-    description="Lista todas las alertas activas del sistema de balances virtuales con filtros opcionales"
+    description="Lista las alertas del sistema de balances virtuales con filtros opcionales y paginación por cursor"
 )
 def get_all_alerts(
     nivel: Optional[str] = Query(None, description="Filtrar por nivel: BAJO, MEDIO, ALTO, CRITICO"),
     valvula: Optional[str] = Query(None, description="Filtrar por válvula específica"),
     estado: Optional[str] = Query(None, description="Filtrar por estado: pendiente, revisada, resuelta"),
     tipo: Optional[str] = Query(None, description="Filtrar por tipo: Desbalance, Anomalía"),
-    severidad: Optional[str] = Query(None, description="Filtrar por severidad: critica, alta, media, baja")
+    severidad: Optional[str] = Query(None, description="Filtrar por severidad: critica, alta, media, baja"),
+    orden: str = Query("id", pattern="^(id|fecha)$", description="Orden de las páginas: id o fecha (más recientes primero)"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.MAX_PAGE_SIZE, description="Alertas por página (activa la paginación)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor de la respuesta anterior)")
 ):
     """
     Obtiene todas las alertas del sistema con soporte para múltiples filtros.
+    
+    Sin `limit` ni `cursor` devuelve todas las alertas. Con paginación, cada
+    respuesta trae `next_cursor` para pedir la página siguiente con los mismos
+    filtros; `total_estimado` es el total que cumple los filtros.
     """
-    return _get_all_alerts_internal(nivel, valvula, estado, tipo, severidad)
+    page_size = resolve_page_size(limit, cursor)
+    if page_size is None:
+        return _get_all_alerts_internal(nivel, valvula, estado, tipo, severidad)
+    
+    query = {
+        "nivel": nivel, "valvula": valvula, "estado": estado,
+        "tipo": tipo, "severidad": severidad, "orden": orden,
+    }
+    after = decode_cursor(cursor, query)
+    
+    try:
+        alertas, total, next_key = alert_store.page(
+            page_size, after, orden, nivel, valvula, estado, tipo, severidad
+        )
+        return AlertsResponse(
+            alertas=alertas,
+            total=len(alertas),
+            total_estimado=total,
+            next_cursor=encode_cursor(query, next_key) if next_key is not None else None
+        )
+    
+    except (ValueError, TypeError):
+        # Cursor con la huella correcta pero una clave mal formada
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al obtener alertas: {str(e)}"
+        )
 
 
 @router.get(
@@ -221,43 +109,7 @@ def get_alert_stats():
     Retorna conteo por estado y por severidad.
     """
     try:
-        # Primero obtenemos todas las alertas (esto las inicializa si es necesario)
-        response = _get_all_alerts_internal()
-        alertas = response.alertas
-        
-        if not alertas:
-            return AlertStatsExtended(
-                total=0,
-                pendientes=0,
-                revisadas=0,
-                resueltas=0,
-                criticas=0,
-                altas=0,
-                medias=0,
-                bajas=0
-            )
-        
-        # Contar por estado
-        pendientes = sum(1 for a in alertas if a.estado == "pendiente")
-        revisadas = sum(1 for a in alertas if a.estado == "revisada")
-        resueltas = sum(1 for a in alertas if a.estado == "resuelta")
-        
-        # Contar por severidad
-        criticas = sum(1 for a in alertas if a.severidad == "critica")
-        altas = sum(1 for a in alertas if a.severidad == "alta")
-        medias = sum(1 for a in alertas if a.severidad == "media")
-        bajas = sum(1 for a in alertas if a.severidad == "baja")
-        
-        return AlertStatsExtended(
-            total=len(alertas),
-            pendientes=pendientes,
-            revisadas=revisadas,
-            resueltas=resueltas,
-            criticas=criticas,
-            altas=altas,
-            medias=medias,
-            bajas=bajas
-        )
+        return AlertStatsExtended(**alert_store.stats())
     
     except Exception as e:
         raise HTTPException(
@@ -305,7 +157,8 @@ def get_critical_alerts():
         
         return AlertsResponse(
             alertas=response.alertas,
-            total=response.total
+            total=response.total,
+            total_estimado=response.total_estimado
         )
     
     except Exception as e:
@@ -315,6 +168,48 @@ def get_critical_alerts():
         )
 
 
+@router.patch(
+    "/",
+    response_model=AlertBatchUpdateResponse,
+    summary="Actualizar el estado de varias alertas",
+    description="Aplica varios cambios de estado con una sola escritura en el backend de estados"
+)
+def update_alerts_status(
+    update_data: AlertBatchUpdateRequest = Body(..., description="Cambios de estado")
+):
+    """
+    Actualiza el estado de varias alertas.
+    
+    Si un ID aparece más de una vez se aplica el último cambio. Los IDs sin
+    alerta se informan en `no_encontradas` y no se escriben.
+    """
+    try:
+        invalidos = sorted({c.estado for c in update_data.cambios if c.estado not in ALERT_STATES})
+        if invalidos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Estado inválido ({', '.join(invalidos)}). Debe ser uno de: {', '.join(ALERT_STATES)}"
+            )
+        
+        cambios = {c.id: c.estado for c in update_data.cambios}
+        actualizadas, no_encontradas = alert_store.update_states(cambios)
+        
+        return AlertBatchUpdateResponse(
+            success=not no_encontradas,
+            message=f"{len(actualizadas)} alerta(s) actualizada(s)",
+            alertas=actualizadas,
+            no_encontradas=no_encontradas
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al actualizar alertas: {str(e)}"
+        )
+
+
 @router.patch(
     "/{alert_id}",
     response_model=AlertUpdateResponse,
@@ -335,39 +230,21 @@ def update_alert_status(
     """
     try:
         # Validar estado
-        estados_validos = ["pendiente", "revisada", "resuelta"]
-        if update_data.estado not in estados_validos:
+        if update_data.estado not in ALERT_STATES:
             raise HTTPException(
                 status_code=400,
-                detail=f"Estado inválido. Debe ser uno de: {', '.join(estados_validos)}"
+                detail=f"Estado inválido. Debe ser uno de: {', '.join(ALERT_STATES)}"
             )
         
-        # Obtener todas las alertas para validar que existe
-        all_alerts = _get_all_alerts_internal()
+        # Actualizar solo el registro de la alerta
+        updated_alert = alert_store.update_state(alert_id, update_data.estado)
         
-        # Buscar la alerta
-        alert_found = None
-        for alert in all_alerts.alertas:
-            if alert.id == alert_id:
-                alert_found = alert
-                break
-        
-        if not alert_found:
+        if updated_alert is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Alerta con ID {alert_id} no encontrada"
             )
         
-        # Actualizar estado en memoria
-        alert_states[alert_id] = update_data.estado
-        
-        # Obtener alerta actualizada
-        updated_alert = None
-        for alert in _get_all_alerts_internal().alertas:
-            if alert.id == alert_id:
-                updated_alert = alert
-                break
-        
         return AlertUpdateResponse(
             success=True,
             message=f"Estado de alerta {alert_id} actualizado a '{update_data.estado}'",
@@ -396,18 +273,13 @@ def get_recent_alerts(
     Obtiene las alertas más recientes del sistema.
     """
     try:
-        all_alerts = _get_all_alerts_internal()
-        
-        # Ordenar por fecha (más recientes primero) y limitar
-        alertas_sorted = sorted(
-            all_alerts.alertas,
-            key=lambda x: datetime.strptime(x.fecha, "%Y-%m-%d %H:%M"),
-            reverse=True
-        )[:limit]
+        # Índice por fecha precalculado (más recientes primero)
+        alertas_sorted, total = alert_store.recent(limit)
         
         return AlertsResponse(
             alertas=alertas_sorted,
-            total=len(alertas_sorted)
+            total=len(alertas_sorted),
+            total_estimado=total
         )
     
     except Exception as e:
@@ -1,12 +1,13 @@
 """Rutas de Balances - Consulta de balances por válvula"""
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 from typing import Optional
 import pandas as pd
 from app.services.data_loader import data_loader
+from app.api.fastjson import FastJSONResponse, records, float_column, str_column, datetime_column
+from app.api.negotiation import JSON, NEGOTIATED_RESPONSES, columns_response, negotiate
 from app.schemas.responses import (
     BalanceResponse,
-    BalanceData,
     BalanceKPIs,
     ValvulasList
 )
@@ -14,13 +15,51 @@ from app.schemas.responses import (
 router = APIRouter()
 
 
+def balance_records(df_valvula: pd.DataFrame) -> list:
+    """Filas de BalanceData como dicts, construidas columna por columna"""
+    if 'ES_PRONOSTICO' in df_valvula.columns:
+        es_pronostico = df_valvula['ES_PRONOSTICO'].astype(bool).tolist()
+    else:
+        es_pronostico = [False] * len(df_valvula)
+
+    return records({
+        "periodo": str_column(df_valvula['PERIODO']),
+        "fecha": datetime_column(df_valvula['FECHA']),
+        "entrada": float_column(df_valvula['ENTRADA_M3']),
+        "salida": float_column(df_valvula['SALIDA_M3']),
+        "perdidas": float_column(df_valvula['PERDIDAS_M3']),
+        "indice": float_column(df_valvula['INDICE_PERDIDAS_%']),
+        "es_pronostico": es_pronostico,
+    })
+
+
+def balance_columns(df_valvula: pd.DataFrame) -> dict:
+    """Columnas de BalanceData tomadas directo del DataFrame (formatos por columnas)"""
+    if 'ES_PRONOSTICO' in df_valvula.columns:
+        es_pronostico = df_valvula['ES_PRONOSTICO'].astype(bool)
+    else:
+        es_pronostico = [False] * len(df_valvula)
+
+    return {
+        "periodo": str_column(df_valvula['PERIODO']),
+        "fecha": df_valvula['FECHA'],
+        "entrada": df_valvula['ENTRADA_M3'],
+        "salida": df_valvula['SALIDA_M3'],
+        "perdidas": df_valvula['PERDIDAS_M3'],
+        "indice": df_valvula['INDICE_PERDIDAS_%'],
+        "es_pronostico": es_pronostico,
+    }
+
+
 @router.get(
     "/{valvula_id}",
     response_model=BalanceResponse,
     summary="Obtener balances por válvula",
-    description="Retorna los balances mensuales (reales + predichos) de una válvula específica"
+    description="Retorna los balances mensuales (reales + predichos) de una válvula específica",
+    responses=NEGOTIATED_RESPONSES
 )
 def get_balance_by_valve(
+    request: Request,
     valvula_id: str,
     periodo_inicio: Optional[str] = Query(None, description="Período inicio (formato: YYYYMM)"),
     periodo_fin: Optional[str] = Query(None, description="Período fin (formato: YYYYMM)")
@@ -32,17 +71,16 @@ def get_balance_by_valve(
         valvula_id: ID de la válvula (ej: VALVULA_1)
         periodo_inicio: Período inicial opcional
         periodo_fin: Período final opcional
+    
+    Con Accept se puede pedir la serie por columnas (ver app.api.negotiation).
     """
     try:
-        balances_df = data_loader.load_balances_virtuales()
-        
-        if balances_df.empty:
-            raise HTTPException(status_code=404, detail="No hay datos de balances disponibles")
-        
         # Filtrar por válvula
-        df_valvula = balances_df[balances_df['PUNTO'] == valvula_id].copy()
+        df_valvula = data_loader.balances_for(valvula_id)
         
         if df_valvula.empty:
+            if data_loader.load_balances_virtuales().empty:
+                raise HTTPException(status_code=404, detail="No hay datos de balances disponibles")
             raise HTTPException(
                 status_code=404,
                 detail=f"Válvula {valvula_id} no encontrada"
@@ -54,6 +92,9 @@ def get_balance_by_valve(
             DEFAULT_ENTRADA = 450.0
             DEFAULT_SALIDA = 125.0
             
+            # Única rama que modifica el frame: copiar solo aquí
+            df_valvula = df_valvula.copy()
+            
             # Asegurar que las columnas sean numéricas
             cols = ['ENTRADA_M3', 'SALIDA_M3', 'PERDIDAS_M3', 'INDICE_PERDIDAS_%']
             for col in cols:
@@ -93,24 +134,21 @@ def get_balance_by_valve(
             meses_analizados=len(df_valvula)
         )
         
-        # Preparar balances mensuales
-        balances = []
-        for _, row in df_valvula.iterrows():
-            balances.append(BalanceData(
-                periodo=str(row['PERIODO']),
-                fecha=pd.to_datetime(row['FECHA']) if pd.notna(row['FECHA']) else None,
-                entrada=float(row['ENTRADA_M3']) if pd.notna(row['ENTRADA_M3']) else None,
-                salida=float(row['SALIDA_M3']) if pd.notna(row['SALIDA_M3']) else None,
-                perdidas=float(row['PERDIDAS_M3']) if pd.notna(row['PERDIDAS_M3']) else None,
-                indice=float(row['INDICE_PERDIDAS_%']) if pd.notna(row['INDICE_PERDIDAS_%']) else None,
-                es_pronostico=bool(row.get('ES_PRONOSTICO', False))
-            ))
+        media_type = negotiate(request)
+        if media_type != JSON:
+            return columns_response(
+                media_type,
+                balance_columns(df_valvula),
+                meta={"valvula_id": valvula_id, "kpis": kpis.model_dump()},
+                table="balances"
+            )
         
-        return BalanceResponse(
-            valvula_id=valvula_id,
-            kpis=kpis,
-            balances=balances
-        )
+        # Respuesta serializada directo desde las columnas (mismo esquema que BalanceResponse)
+        return FastJSONResponse({
+            "valvula_id": valvula_id,
+            "kpis": kpis.model_dump(),
+            "balances": balance_records(df_valvula),
+        })
     
     except HTTPException:
         raise
@@ -206,8 +244,7 @@ async def analyze_balance(valvula_id: str):
             )
 
         # 1. Obtener datos de la válvula (reutilizando lógica de carga)
-        balances_df = data_loader.load_balances_virtuales()
-        df_valvula = balances_df[balances_df['PUNTO'] == valvula_id].copy()
+        df_valvula = data_loader.balances_for(valvula_id).copy()
         
         if df_valvula.empty:
             # Lógica de relleno para MVP si es VALVULA_1 (consistente con get_balance_by_valve)
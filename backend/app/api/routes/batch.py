@@ -0,0 +1,127 @@
+"""Ruta de Batch - Varias consultas GET de la API en un solo request"""
+import asyncio
+import json
+from typing import List, Tuple
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from app.config import settings
+from app.services.data_loader import data_loader
+from app.schemas.responses import BatchRequest, BatchRequestItem, BatchResponse
+
+router = APIRouter()
+
+# Rutas que no se pueden incluir en un batch (las exportaciones son streams de tamaño arbitrario)
+EXCLUDED_PATHS = ("/api/batch", "/api/export")
+
+
+def _split_path(item: BatchRequestItem) -> Tuple[str, str]:
+    """Path y query string de una consulta (los params se agregan a los del path)"""
+    path, _, query = item.path.partition("?")
+    if not path.startswith("/api/") or path.startswith(EXCLUDED_PATHS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ruta no permitida en un batch: {item.path}"
+        )
+
+    extra = urlencode(
+        [(key, str(v).lower() if isinstance(v, bool) else v)
+         for key, value in item.params.items()
+         for v in (value if isinstance(value, list) else [value])]
+    )
+    return path, "&".join(part for part in (query, extra) if part)
+
+
+async def _dispatch(request: Request, path: str, query: str) -> Tuple[int, bytes, bool]:
+    """
+    Ejecuta un GET interno contra la app ASGI (sin pasar por la red)
+
+    Pasa por el mismo stack de middlewares y manejadores de errores que un request
+    externo, así que la respuesta es idéntica a la de la consulta individual.
+
+    Returns:
+        tuple: (status, cuerpo, el cuerpo es JSON)
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": request.url.scheme,
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"accept", b"application/json")],
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+    }
+    status = 500
+    content_type = b""
+    chunks: List[bytes] = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # ServerErrorMiddleware ya envió el 500 y re-lanza la excepción: no cortar el batch
+        pass
+    return status, b"".join(chunks), content_type.startswith(b"application/json")
+
+
+@router.post(
+    "/batch",
+    response_model=BatchResponse,
+    summary="Ejecutar varias consultas en un solo request",
+    description="Ejecuta una lista de rutas GET de la API sobre la misma instantánea de datos y devuelve todas las respuestas juntas"
+)
+async def run_batch(request: Request, batch: BatchRequest):
+    """
+    Ejecuta varias consultas GET internas en un solo request.
+
+    Las consultas se ejecutan en paralelo y comparten una instantánea
+    memoizada de los datasets: cada CSV se resuelve una sola vez para todo el
+    batch y todas las respuestas corresponden a la misma versión de los datos.
+    Los resultados se devuelven en el mismo orden que las consultas; el error
+    de una consulta no afecta a las demás.
+
+    Ejemplo:
+        POST /api/batch
+        {"requests": [{"path": "/api/models/metrics"},
+                      {"path": "/api/models/predictions-scatter", "params": {"modelo": "LightGBM"}}]}
+    """
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.BATCH_MAX_REQUESTS} consultas por batch"
+        )
+
+    targets = [_split_path(item) for item in batch.requests]
+
+    with data_loader.snapshot():
+        results = await asyncio.gather(*(_dispatch(request, path, query) for path, query in targets))
+
+    # Los cuerpos JSON se insertan tal cual, sin volver a parsearlos ni serializarlos
+    parts = []
+    for item, (status, body, is_json) in zip(batch.requests, results):
+        if not is_json:
+            body = json.dumps(body.decode("utf-8", errors="replace"), ensure_ascii=False).encode("utf-8")
+        parts.append(
+            b'{"path":' + json.dumps(item.path, ensure_ascii=False).encode("utf-8")
+            + b',"status":' + str(status).encode()
+            + b',"body":' + (body or b"null") + b"}"
+        )
+
+    content = b'{"results":[' + b",".join(parts) + b'],"data_version":' + str(data_loader.data_version).encode() + b"}"
+    return Response(content=content, media_type="application/json")
@@ -1,26 +1,38 @@
 """Rutas de Correlaciones - Análisis de correlaciones entre variables"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional
 import numpy as np
+import pandas as pd
+from app.config import settings
 from app.services.data_loader import data_loader
+from app.api.fastjson import FastJSONResponse, records, float_column, str_column
+from app.api.pagination import decode_cursor, encode_cursor, keyset_page, resolve_page_size
+from app.api.negotiation import JSON, NEGOTIATED_RESPONSES, columns_response, negotiate
 from app.schemas.responses import (
     CorrelationMatrix,
     TopCorrelationsResponse,
     CorrelationPair,
-    CorrelationScatterPoint,
     CorrelationScatterResponse
 )
 
 router = APIRouter()
 
 
+def _as_float(series: pd.Series) -> pd.Series:
+    """Serie como float64; los valores que no se pueden convertir quedan como NaN"""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series.astype(np.float64)
+    return pd.to_numeric(series.astype(object), errors='coerce').astype(np.float64)
+
+
 @router.get(
     "/matrix",
     response_model=CorrelationMatrix,
     summary="Obtener matriz de correlación",
-    description="Retorna la matriz de correlación entre todas las variables del sistema"
+    description="Retorna la matriz de correlación entre todas las variables del sistema",
+    responses=NEGOTIATED_RESPONSES
 )
-def get_correlation_matrix():
+def get_correlation_matrix(request: Request):
     """
     Obtiene la matriz de correlación NxN entre variables.
     
@@ -29,6 +41,8 @@ def get_correlation_matrix():
     - Pérdidas e índice de pérdidas
     - Presión, temperatura, KPT
     - Número de usuarios
+    
+    Por columnas (Accept), `matrix` trae una columna por variable.
     """
     try:
         corr_df = data_loader.load_correlations()
@@ -38,6 +52,17 @@ def get_correlation_matrix():
         
         # Obtener nombres de variables y matriz
         variables = corr_df.index.tolist()
+        
+        media_type = negotiate(request)
+        if media_type != JSON:
+            values = corr_df.to_numpy(dtype=np.float64)
+            return columns_response(
+                media_type,
+                {str(var): values[:, j] for j, var in enumerate(corr_df.columns)},
+                meta={"variables": variables},
+                table="matrix"
+            )
+        
         matrix = corr_df.values.tolist()
         
         return CorrelationMatrix(
@@ -188,12 +213,19 @@ def get_variable_correlations(variable_name: str):
     "/scatter",
     response_model=CorrelationScatterResponse,
     summary="Scatter plot entre dos variables",
-    description="Obtiene datos para visualizar un scatter plot entre dos variables del sistema"
+    description="Obtiene datos para visualizar un scatter plot entre dos variables del sistema",
+    responses=NEGOTIATED_RESPONSES
 )
 def get_correlation_scatter(
+    request: Request,
     var_x: str,
     var_y: str,
-    valvula_id: Optional[str] = None
+    valvula_id: Optional[str] = None,
+    periodo_desde: Optional[int] = Query(None, description="Primer período incluido (YYYYMM)"),
+    periodo_hasta: Optional[int] = Query(None, description="Último período incluido (YYYYMM)"),
+    orden: Optional[str] = Query(None, pattern="^-?[xy]$", description="Orden de los puntos: x, y, -x, -y (por defecto, el de los datos)"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.MAX_PAGE_SIZE, description="Puntos por página (activa la paginación)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor de la respuesta anterior)")
 ):
     """
     Obtiene puntos de datos para un scatter plot entre dos variables.
@@ -202,23 +234,23 @@ def get_correlation_scatter(
         var_x: Nombre de la variable para el eje X
         var_y: Nombre de la variable para el eje Y
         valvula_id: (Opcional) Filtrar por válvula específica
+        periodo_desde / periodo_hasta: (Opcional) Rango de períodos
+        orden: (Opcional) Columna por la que se ordenan las páginas
+        limit / cursor: (Opcional) Paginación; sin ellos se devuelven todos los puntos
         
     Retorna:
-        CorrelationScatterResponse con puntos de datos y correlación
+        CorrelationScatterResponse con puntos de datos y correlación (calculada
+        sobre todos los puntos filtrados, no solo los de la página); por
+        columnas si se pide con Accept
         
     Ejemplo:
         GET /api/correlations/scatter?var_x=VOLUMEN_ENTRADA_FINAL&var_y=INDICE_PERDIDAS_FINAL
         GET /api/correlations/scatter?var_x=PRESION_FINAL&var_y=TEMPERATURA_FINAL&valvula_id=VALVULA_1
+        GET /api/correlations/scatter?var_x=PRESION_FINAL&var_y=PERDIDAS_FINAL&orden=-y&limit=500
     """
     try:
-        # Cargar dataset maestro con todas las variables
-        df = data_loader.load_dataset_maestro()
-        
-        if df.empty:
-            raise HTTPException(status_code=404, detail="Datos no disponibles")
-        
-        # Verificar que las variables existen
-        available_vars = df.columns.tolist()
+        # Verificar que las variables existen (columnas de la entrada cacheada, sin copiar el dataset)
+        available_vars = data_loader.get_columns("dataset_maestro")
         if var_x not in available_vars:
             raise HTTPException(
                 status_code=404,
@@ -230,23 +262,41 @@ def get_correlation_scatter(
                 detail=f"Variable '{var_y}' no encontrada. Disponibles: {available_vars}"
             )
         
-        # Filtrar por válvula si se especifica
-        if valvula_id:
-            if 'VALVULA' not in df.columns:
-                raise HTTPException(status_code=400, detail="Columna VALVULA no encontrada en los datos")
-            df = df[df['VALVULA'] == valvula_id]
-            if df.empty:
+        # Solo las columnas del gráfico (de una válvula: índice de particiones, sin recorrer el dataset).
+        # Por posición: var_x y var_y pueden repetir el nombre de VALVULA o PERIODO
+        df = data_loader.dataset_maestro_for(valvula_id, columns=['VALVULA', 'PERIODO', var_x, var_y])
+        
+        if df.empty:
+            if valvula_id:
                 raise HTTPException(
                     status_code=404,
                     detail=f"No hay datos para la válvula {valvula_id}"
                 )
+            raise HTTPException(status_code=404, detail="Datos no disponibles")
+        
+        if periodo_desde is not None or periodo_hasta is not None:
+            periodos = df.iloc[:, 1]
+            mask = np.ones(len(df), dtype=bool)
+            if periodo_desde is not None:
+                mask &= (periodos >= periodo_desde).to_numpy()
+            if periodo_hasta is not None:
+                mask &= (periodos <= periodo_hasta).to_numpy()
+            df = df[mask]
+            if df.empty:
+                raise HTTPException(
+                    status_code=404,
+                    detail="No hay datos en el rango de períodos indicado"
+                )
+        
+        x_raw = df.iloc[:, 2]
+        y_raw = x_raw if var_x == var_y else df.iloc[:, 3]
         
         # Calcular correlación primero (antes de cualquier procesamiento)
         if var_x == var_y:
             correlation = 1.0
         else:
             # Solo calcular correlación si las variables son diferentes
-            df_corr = df[[var_x, var_y]].dropna()
+            df_corr = df.iloc[:, [2, 3]].dropna()
             if len(df_corr) > 1:
                 corr_matrix = df_corr.corr()
                 correlation = float(corr_matrix.iloc[0, 1])
@@ -255,54 +305,82 @@ def get_correlation_scatter(
             else:
                 correlation = 0.0
         
-        # Seleccionar columnas necesarias y limpiar
-        df_clean = df[['VALVULA', 'PERIODO', var_x]].copy()
-        
-        # Si las variables son diferentes, agregar la columna Y
-        if var_x != var_y:
-            df_clean['var_y_temp'] = df[var_y]
-            df_clean = df_clean.dropna(subset=[var_x, 'var_y_temp'])
-        else:
-            df_clean = df_clean.dropna(subset=[var_x])
-        
-        if df_clean.empty:
+        # Filas con ambas variables presentes (máscara, sin copiar las columnas)
+        present = (x_raw.notna() & y_raw.notna()).to_numpy()
+        if not present.any():
             raise HTTPException(
                 status_code=404,
                 detail=f"No hay datos válidos para las variables {var_x} y {var_y}"
             )
         
-        # Crear puntos de scatter
-        scatter_points = []
-        for idx in range(len(df_clean)):
+        # Crear puntos de scatter columna por columna (se saltan los valores no numéricos)
+        x_values = _as_float(x_raw)
+        y_values = x_values if var_x == var_y else _as_float(y_raw)
+        valid = present & (x_values.notna() & y_values.notna()).to_numpy()
+        positions = np.flatnonzero(valid)
+        total = len(positions)
+        
+        # Paginación: orden y corte sobre las columnas; solo se arman las filas de la página
+        next_cursor = None
+        page_size = resolve_page_size(limit, cursor)
+        if page_size is not None:
+            query = {
+                "var_x": var_x, "var_y": var_y, "valvula_id": valvula_id,
+                "periodo_desde": periodo_desde, "periodo_hasta": periodo_hasta, "orden": orden,
+            }
+            after = decode_cursor(cursor, query)
+            keys = None
+            if orden:
+                keys = (x_values if orden.lstrip("-") == "x" else y_values).to_numpy()[positions]
             try:
-                row = df_clean.iloc[idx]
-                x_val = float(row[var_x])
-                
-                # Para Y, usar la misma variable si son iguales
-                if var_x == var_y:
-                    y_val = x_val
-                else:
-                    y_val = float(row['var_y_temp'])
-                
-                scatter_points.append(
-                    CorrelationScatterPoint(
-                        x=x_val,
-                        y=y_val,
-                        valvula=str(row['VALVULA']),
-                        periodo=str(row['PERIODO'])
-                    )
+                page, next_key = keyset_page(
+                    df.index.to_numpy()[positions], after, page_size,
+                    keys=keys, descending=bool(orden) and orden.startswith("-")
                 )
-            except (ValueError, TypeError, KeyError) as e:
-                # Saltar puntos con problemas de conversión
-                continue
-        
-        return CorrelationScatterResponse(
-            var_x=var_x,
-            var_y=var_y,
-            data=scatter_points,
-            correlation=round(float(correlation), 4),
-            total_puntos=len(scatter_points)
-        )
+            except (ValueError, TypeError):
+                raise HTTPException(status_code=400, detail="Cursor inválido")
+            positions = positions[page]
+            if next_key is not None:
+                next_cursor = encode_cursor(query, next_key)
+        
+        media_type = negotiate(request)
+        if media_type != JSON:
+            return columns_response(
+                media_type,
+                {
+                    "x": x_values.to_numpy()[positions],
+                    "y": y_values.to_numpy()[positions],
+                    "valvula": df.iloc[positions, 0],
+                    "periodo": str_column(df.iloc[positions, 1]),
+                },
+                meta={
+                    "var_x": var_x,
+                    "var_y": var_y,
+                    "correlation": round(float(correlation), 4),
+                    "total_puntos": len(positions),
+                    "total_estimado": total,
+                    "next_cursor": next_cursor,
+                },
+                table="data"
+            )
+        
+        scatter_points = records({
+            "x": float_column(x_values.iloc[positions]),
+            "y": float_column(y_values.iloc[positions]),
+            "valvula": str_column(df.iloc[positions, 0]),
+            "periodo": str_column(df.iloc[positions, 1]),
+        })
+        
+        # Respuesta serializada directo desde las columnas (mismo esquema que CorrelationScatterResponse)
+        return FastJSONResponse({
+            "var_x": var_x,
+            "var_y": var_y,
+            "data": scatter_points,
+            "correlation": round(float(correlation), 4),
+            "total_puntos": len(scatter_points),
+            "total_estimado": total,
+            "next_cursor": next_cursor,
+        })
     
     except HTTPException:
         raise
@@ -1,11 +1,16 @@
 """Rutas del Dashboard - KPIs principales y visualizaciones"""
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional
+import numpy as np
 import pandas as pd
 from app.services.data_loader import data_loader
+from app.services.views import materialized_views
+from app.api.fastjson import records, float_column, str_column
+from app.api.negotiation import JSON, NEGOTIATED_RESPONSES, encode_columns, negotiate
 from app.schemas.responses import (
     KPIResponse,
     LossIndexPoint,
+    LossIndexBreakdown,
     TopValve,
     ErrorResponse
 )
@@ -28,6 +33,11 @@ def get_dashboard_kpis():
     - Resumen_Valvulas.csv (agregados por válvula)
     - Tabla_Balances_Virtuales.csv (balances totales)
     """
+    return materialized_views.serve("dashboard.kpis", _build_dashboard_kpis)
+
+
+def _build_dashboard_kpis() -> KPIResponse:
+    """Calcula los KPIs del dashboard (vista materializada de get_dashboard_kpis)"""
     try:
         # Cargar datos
         metrics_df = data_loader.load_metrics()
@@ -40,8 +50,7 @@ def get_dashboard_kpis():
             best_by_valve = []
             modelos_usados = set()
             
-            for valvula in metrics_df['VALVULA'].unique():
-                valvula_data = metrics_df[metrics_df['VALVULA'] == valvula]
+            for valvula, valvula_data in metrics_df.groupby('VALVULA', sort=False, observed=True):
                 best_idx = valvula_data['MAE'].idxmin()
                 best_row = valvula_data.loc[best_idx]
                 best_by_valve.append(best_row)
@@ -114,65 +123,186 @@ def get_dashboard_kpis():
     "/loss-index-evolution",
     response_model=list[LossIndexPoint],
     summary="Evolución del índice de pérdidas",
-    description="Serie temporal del índice de pérdidas (real vs predicho)"
+    description="Serie temporal del índice de pérdidas (real vs predicho)",
+    responses=NEGOTIATED_RESPONSES
 )
 def get_loss_index_evolution(
+    request: Request,
     valvula_id: Optional[str] = Query(None, description="Filtrar por válvula específica")
 ):
     """
     Obtiene la evolución mensual del índice de pérdidas.
     
-    Combina datos reales y predichos de Tabla_Balances_Virtuales.csv
+    Combina datos reales y predichos de Tabla_Balances_Virtuales.csv.
+    Con Accept se puede pedir la serie por columnas (una vista materializada por formato).
+    """
+    media_type = negotiate(request)
+    if media_type != JSON:
+        return materialized_views.serve(
+            "dashboard.loss_index_evolution", _encode_loss_index_evolution, valvula_id, media_type,
+            media_type=media_type
+        )
+    return materialized_views.serve("dashboard.loss_index_evolution", _build_loss_index_evolution, valvula_id)
+
+
+def _build_loss_index_evolution(valvula_id: Optional[str] = None) -> list[dict]:
+    """Calcula la evolución mensual del índice de pérdidas (vista materializada de get_loss_index_evolution)"""
+    try:
+        evolution = _loss_index_evolution_frame(valvula_id)
+        if evolution is None:
+            return []
+        return _evolution_records(evolution, ('indice_real', 'indice_predicho'))
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al obtener evolución: {str(e)}"
+        )
+
+
+def _encode_loss_index_evolution(valvula_id: Optional[str], media_type: str) -> bytes:
+    """Evolución del índice de pérdidas por columnas en el formato negociado (vista materializada)"""
+    try:
+        evolution = _loss_index_evolution_frame(valvula_id)
+        if evolution is None:
+            columns = {"periodo": [], "indice_real": [], "indice_predicho": []}
+        else:
+            columns = {
+                "periodo": str_column(evolution.index.get_level_values('PERIODO')),
+                "indice_real": evolution['indice_real'].to_numpy(),
+                "indice_predicho": evolution['indice_predicho'].to_numpy(),
+            }
+        return encode_columns(media_type, columns)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al obtener evolución: {str(e)}"
+        )
+
+
+def _loss_index_evolution_frame(valvula_id: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Medias por período de la válvula (o de todas), o None si no hay datos"""
+    # Filtrar por válvula si se especifica
+    if valvula_id:
+        balances_df = data_loader.balances_for(valvula_id)
+    else:
+        balances_df = data_loader.load_balances_virtuales()
+    
+    if balances_df.empty:
+        return None
+    
+    if 'PERIODO' in balances_df.columns and 'INDICE_PERDIDAS_%' in balances_df.columns:
+        return _evolution_frame(balances_df)
+    
+    return None
+
+
+@router.get(
+    "/loss-index-evolution/breakdown",
+    response_model=LossIndexBreakdown,
+    summary="Evolución del índice de pérdidas por válvula",
+    description="Serie temporal total y, opcionalmente, por válvula y con media móvil"
+)
+def get_loss_index_breakdown(
+    por_valvula: bool = Query(False, description="Incluir la serie de cada válvula"),
+    ventana: Optional[int] = Query(None, ge=2, le=36, description="Períodos de la media móvil")
+):
+    """
+    Obtiene la evolución mensual del índice de pérdidas desagregada.
+    
+    Cada serie es una sola agregación agrupada; la media móvil se calcula
+    sobre los períodos con datos de cada serie.
     """
+    return materialized_views.serve("dashboard.loss_index_breakdown", _build_loss_index_breakdown, por_valvula, ventana)
+
+
+def _build_loss_index_breakdown(por_valvula: bool = False, ventana: Optional[int] = None) -> dict:
+    """Calcula la evolución total y por válvula (vista materializada de get_loss_index_breakdown)"""
     try:
         balances_df = data_loader.load_balances_virtuales()
+        fields = ('indice_real', 'indice_predicho', 'indice_real_movil', 'indice_predicho_movil')
         
+        result = {"ventana": ventana, "total": [], "por_valvula": {} if por_valvula else None}
         if balances_df.empty:
-            return []
+            return result
         
-        # Filtrar por válvula si se especifica
-        if valvula_id:
-            balances_df = balances_df[balances_df['PUNTO'] == valvula_id]
+        result["total"] = _evolution_records(_evolution_frame(balances_df, ventana=ventana), fields)
         
-        # Agrupar por periodo
-        if 'PERIODO' in balances_df.columns and 'INDICE_PERDIDAS_%' in balances_df.columns:
-            evolution = []
-            
-            for periodo in sorted(balances_df['PERIODO'].unique()):
-                periodo_data = balances_df[balances_df['PERIODO'] == periodo]
-                
-                # Separar reales de predichos
-                real_data = periodo_data[~periodo_data['ES_PRONOSTICO']]
-                pred_data = periodo_data[periodo_data['ES_PRONOSTICO']]
-                
-                indice_real = None
-                indice_predicho = None
-                
-                if not real_data.empty:
-                    mean_val = real_data['INDICE_PERDIDAS_%'].mean()
-                    indice_real = float(mean_val) if pd.notna(mean_val) else None
-                
-                if not pred_data.empty:
-                    mean_val = pred_data['INDICE_PERDIDAS_%'].mean()
-                    indice_predicho = float(mean_val) if pd.notna(mean_val) else None
-                
-                evolution.append(LossIndexPoint(
-                    periodo=str(periodo),
-                    indice_real=indice_real,
-                    indice_predicho=indice_predicho
-                ))
-            
-            return evolution
+        if por_valvula:
+            evolution = _evolution_frame(balances_df, by='PUNTO', ventana=ventana)
+            valvulas = str_column(evolution.index.get_level_values('PUNTO'))
+            for valvula, point in zip(valvulas, _evolution_records(evolution, fields)):
+                result["por_valvula"].setdefault(valvula, []).append(point)
         
-        return []
+        return result
     
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error al obtener evolución: {str(e)}"
+            detail=f"Error al obtener evolución por válvula: {str(e)}"
         )
 
 
+def _evolution_frame(balances_df: pd.DataFrame, by: Optional[str] = None,
+                     ventana: Optional[int] = None) -> pd.DataFrame:
+    """
+    Índice de pérdidas medio por período (y por `by`), real y predicho en columnas
+    
+    Una sola agregación agrupada por [by, PERIODO]: el índice se separa antes en
+    dos columnas según ES_PRONOSTICO (pivote), así que cada grupo calcula ambas
+    medias a la vez. Con `ventana` agrega las medias móviles de cada serie.
+    """
+    keys = ([by] if by else []) + ['PERIODO']
+    indice = balances_df['INDICE_PERDIDAS_%']
+    es_pronostico = balances_df['ES_PRONOSTICO'].astype(bool)
+    
+    pivot = pd.DataFrame({
+        'indice_real': indice.where(~es_pronostico),
+        'indice_predicho': indice.where(es_pronostico),
+    })
+    evolution = pivot.groupby([balances_df[key] for key in keys], observed=True).mean()
+    
+    if ventana:
+        # Filas ordenadas por [by, PERIODO]: cada serie es un bloque contiguo
+        series = evolution.index.codes[0] if by else np.zeros(len(evolution), dtype=np.int8)
+        moving = _rolling_mean(evolution.to_numpy(), np.asarray(series), ventana)
+        evolution['indice_real_movil'] = moving[:, 0]
+        evolution['indice_predicho_movil'] = moving[:, 1]
+    
+    return evolution
+
+
+def _rolling_mean(values: np.ndarray, series: np.ndarray, ventana: int) -> np.ndarray:
+    """
+    Media móvil de las últimas `ventana` filas de cada serie, ignorando NaN
+    
+    Un desplazamiento vectorizado por posición de la ventana (O(filas x ventana))
+    en lugar de un rolling por grupo.
+    """
+    n = len(values)
+    sums = np.zeros(values.shape)
+    counts = np.zeros(values.shape)
+    for lag in range(min(ventana, n)):
+        shifted = values[:n - lag]
+        valid = (series[lag:] == series[:n - lag])[:, None] & ~np.isnan(shifted)
+        sums[lag:] += np.where(valid, shifted, 0.0)
+        counts[lag:] += valid
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _evolution_records(evolution: pd.DataFrame, fields: tuple) -> list[dict]:
+    """Filas de LossIndexPoint / LossIndexTrendPoint armadas desde las columnas"""
+    columns = {"periodo": str_column(evolution.index.get_level_values('PERIODO'))}
+    for field in fields:
+        if field in evolution.columns:
+            columns[field] = float_column(evolution[field])
+        else:
+            columns[field] = [None] * len(evolution)
+    return records(columns)
+
+
 @router.get(
     "/top-valves",
     response_model=list[TopValve],
@@ -187,6 +317,11 @@ def get_top_valves(
     
     Datos de: dashboard/Top_Desbalances.csv
     """
+    return materialized_views.serve("dashboard.top_valves", _build_top_valves, limit)
+
+
+def _build_top_valves(limit: int = 5) -> list[TopValve]:
+    """Calcula el top de válvulas con mayores desbalances (vista materializada de get_top_valves)"""
     try:
         top_df = data_loader.load_top_desbalances()
         
@@ -235,10 +370,15 @@ def get_dashboard_summary():
     Endpoint consolidado que retorna todos los datos del dashboard en una sola llamada.
     Útil para cargar la vista inicial del dashboard de forma eficiente.
     """
+    return materialized_views.serve("dashboard.summary", _build_dashboard_summary)
+
+
+def _build_dashboard_summary() -> dict:
+    """Calcula el resumen consolidado del dashboard (vista materializada de get_dashboard_summary)"""
     try:
-        kpis = get_dashboard_kpis()
-        evolution = get_loss_index_evolution()
-        top_valves = get_top_valves(limit=5)
+        kpis = _build_dashboard_kpis()
+        evolution = _build_loss_index_evolution(valvula_id=None)
+        top_valves = _build_top_valves(limit=5)
         
         return {
             "kpis": kpis,
@@ -265,6 +405,11 @@ def get_valves_status():
     
     Útil para mapas, tablas de resumen, etc.
     """
+    return materialized_views.serve("dashboard.valves_status", _build_valves_status)
+
+
+def _build_valves_status() -> list:
+    """Calcula el estado de todas las válvulas (vista materializada de get_valves_status)"""
     try:
         resumen_df = data_loader.load_resumen_valvulas()
         alertas_df = data_loader.load_alertas()
@@ -304,3 +449,18 @@ def get_valves_status():
             status_code=500,
             detail=f"Error al obtener estado de válvulas: {str(e)}"
         )
+
+
+def prime_views():
+    """Materializa las vistas que carga la página inicial del dashboard"""
+    for name, builder, args in (
+        ("dashboard.summary", _build_dashboard_summary, ()),
+        ("dashboard.kpis", _build_dashboard_kpis, ()),
+        ("dashboard.loss_index_evolution", _build_loss_index_evolution, (None,)),
+        ("dashboard.top_valves", _build_top_valves, (5,)),
+        ("dashboard.valves_status", _build_valves_status, ()),
+    ):
+        try:
+            materialized_views.get_bytes(name, builder, *args)
+        except Exception as e:
+            print(f"⚠ Error materializando {name}: {e}")
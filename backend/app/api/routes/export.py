@@ -0,0 +1,123 @@
+"""Rutas de Exportación - Descarga masiva de balances y pronósticos por streaming"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.services.data_loader import data_loader
+from app.api.streaming import ARROW_AVAILABLE, STREAM_FORMATS, stream_frames
+
+router = APIRouter()
+
+# Dataset exportable -> (clave del dataset en el caché, columna de la válvula)
+EXPORTS: Dict[str, Tuple[str, str]] = {
+    "balances": ("balances_virtuales", "PUNTO"),
+    "pronosticos": ("pronosticos", "VALVULA"),
+}
+
+
+def _filter_periods(
+    df: pd.DataFrame,
+    groups: List[np.ndarray],
+    periodo_desde: Optional[int],
+    periodo_hasta: Optional[int]
+) -> Iterator[pd.DataFrame]:
+    """
+    Filas de cada válvula dentro del rango de períodos. Las filas de una válvula
+    se toman del frame cacheado recién al enviarla (una válvula a la vez).
+    """
+    periodos = df['PERIODO'].to_numpy()
+    for positions in groups:
+        if periodo_desde is not None:
+            positions = positions[periodos[positions] >= periodo_desde]
+        if periodo_hasta is not None:
+            positions = positions[periodos[positions] <= periodo_hasta]
+        if len(positions):
+            yield df.take(positions)
+
+
+@router.get(
+    "/{dataset}",
+    summary="Exportar balances o pronósticos",
+    description="Descarga la tabla completa de balances virtuales o de pronósticos como NDJSON, CSV o Arrow IPC, válvula por válvula",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {media_type: {} for media_type, _ in STREAM_FORMATS.values()},
+            "description": "Filas del dataset en el formato pedido",
+        }
+    }
+)
+def export_dataset(
+    dataset: str = Path(..., description="Dataset a exportar: balances o pronosticos"),
+    formato: str = Query("ndjson", pattern="^(ndjson|csv|arrow)$", description="Formato: ndjson, csv o arrow (Arrow IPC stream)"),
+    valvula: Optional[List[str]] = Query(None, description="Válvulas a exportar (se puede repetir; por defecto todas)"),
+    periodo_desde: Optional[int] = Query(None, description="Primer período incluido (YYYYMM)"),
+    periodo_hasta: Optional[int] = Query(None, description="Último período incluido (YYYYMM)")
+):
+    """
+    Exporta un dataset completo por streaming.
+
+    Las filas se envían válvula por válvula (ordenadas por ID) y en bloques de
+    como mucho EXPORT_CHUNK_ROWS filas: el servidor nunca arma el archivo
+    completo en memoria. Las particiones de cada válvula se toman al inicio del
+    request, así que todo el archivo corresponde a la misma versión de los datos.
+
+    Ejemplo:
+        GET /api/export/balances?formato=csv&periodo_desde=202401
+        GET /api/export/pronosticos?formato=arrow&valvula=VALVULA_1&valvula=VALVULA_3
+    """
+    if dataset not in EXPORTS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Dataset '{dataset}' no exportable. Disponibles: {', '.join(EXPORTS)}"
+        )
+    if formato == "arrow" and not ARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail="pyarrow no está instalado: formato arrow no disponible")
+
+    try:
+        cache_key, valve_column = EXPORTS[dataset]
+        # Frame del caché sin copiar y posiciones de cada válvula, todos de la misma versión
+        df, partitions = data_loader.shared_partitions(cache_key, valve_column)
+
+        if df.empty:
+            raise HTTPException(status_code=404, detail=f"No hay datos de {dataset} disponibles")
+
+        available = sorted(partitions)
+        if valvula:
+            missing = [v for v in valvula if v not in available]
+            if len(missing) == len(valvula):
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Válvula(s) no encontrada(s): {', '.join(missing)}"
+                )
+            valves = [v for v in available if v in set(valvula)]
+        else:
+            valves = available
+
+        # Posiciones de las filas de cada válvula: se toman recién al enviarlas
+        groups = [partitions[v] for v in valves]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al exportar {dataset}: {str(e)}"
+        )
+
+    media_type, extension = STREAM_FORMATS[formato]
+    content = stream_frames(
+        _filter_periods(df, groups, periodo_desde, periodo_hasta),
+        formato,
+        template=df,
+        chunk_rows=settings.EXPORT_CHUNK_ROWS
+    )
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'}
+    )
@@ -1,9 +1,13 @@
 """Rutas de Modelos - Métricas y comparación de modelos ML"""
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
+import zlib
 import pandas as pd
 import numpy as np
+from app.config import settings
 from app.services.data_loader import data_loader
+from app.api.fastjson import FastJSONResponse, records, float_column, str_column
+from app.api.pagination import decode_cursor, encode_cursor, keyset_page, resolve_page_size
 from app.schemas.responses import (
     ModelsComparisonResponse,
     ModelInfo,
@@ -11,7 +15,6 @@ from app.schemas.responses import (
     BestModelsByValveResponse,
     BestModelByValve,
     PredictionScatterResponse,
-    PredictionScatterPoint,
     ModelDetailsResponse,
     FeatureImportance
 )
@@ -41,13 +44,12 @@ def get_models_metrics(
         
         # Filtrar por válvula si se especifica
         if valvula_id:
-            metrics_df = metrics_df[metrics_df['VALVULA'] == valvula_id]
+            metrics_df = data_loader.metrics_for(valvula_id)
         
         # Agrupar por modelo y calcular promedio de métricas
         models_list = []
         
-        for modelo in metrics_df['MODELO'].unique():
-            modelo_data = metrics_df[metrics_df['MODELO'] == modelo]
+        for modelo, modelo_data in metrics_df.groupby('MODELO', sort=False, observed=True):
             
             # Calcular métricas promedio
             mae_val = modelo_data['MAE'].mean()
@@ -117,7 +119,7 @@ def get_models_comparison(
         
         # Filtrar por válvula si se especifica
         if valvula_id:
-            metrics_df = metrics_df[metrics_df['VALVULA'] == valvula_id]
+            metrics_df = data_loader.metrics_for(valvula_id)
         
         # Validar métrica
         metric_col = metric.upper()
@@ -129,8 +131,7 @@ def get_models_comparison(
         
         # Agrupar por modelo
         comparison = []
-        for modelo in metrics_df['MODELO'].unique():
-            modelo_data = metrics_df[metrics_df['MODELO'] == modelo]
+        for modelo, modelo_data in metrics_df.groupby('MODELO', sort=False, observed=True):
             value_mean = modelo_data[metric_col].mean()
             value = float(value_mean) if pd.notna(value_mean) else 0.0
             
@@ -240,8 +241,7 @@ def get_best_models_by_valve(
         # Encontrar el mejor modelo para cada válvula
         best_models = []
         
-        for valvula in metrics_df['VALVULA'].unique():
-            valvula_data = metrics_df[metrics_df['VALVULA'] == valvula]
+        for valvula, valvula_data in metrics_df.groupby('VALVULA', sort=False, observed=True):
             
             # Encontrar el mejor modelo para esta válvula (menor métrica)
             best_idx = valvula_data[metric_col].idxmin()
@@ -325,13 +325,17 @@ def get_available_models():
     **Uso:**
     - `GET /api/models/predictions-scatter?modelo=LightGBM`
     - `GET /api/models/predictions-scatter?modelo=CatBoost&valvula_id=VALVULA_1`
+    - `GET /api/models/predictions-scatter?modelo=LightGBM&orden=-error&limit=100`
     
     **Modelos disponibles:** LightGBM, CatBoost, RandomForest
     """
 )
 def get_predictions_scatter(
     modelo: str = Query(..., description="Nombre del modelo (LightGBM, CatBoost, RandomForest)", example="LightGBM"),
-    valvula_id: Optional[str] = Query(None, description="Filtrar por válvula específica", example="VALVULA_1")
+    valvula_id: Optional[str] = Query(None, description="Filtrar por válvula específica", example="VALVULA_1"),
+    orden: Optional[str] = Query(None, pattern="^-?(real|predicted|error)$", description="Orden de los puntos: real, predicted o error absoluto (prefijo - para descendente; por defecto, por id)"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.MAX_PAGE_SIZE, description="Puntos por página (activa la paginación)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor de la respuesta anterior)")
 ):
     """
     Obtiene datos reales vs predichos para scatter plots.
@@ -341,9 +345,12 @@ def get_predictions_scatter(
     Args:
         modelo: Nombre del modelo ML (LightGBM, CatBoost, RandomForest)
         valvula_id: (Opcional) ID de válvula para filtrar datos
+        orden: (Opcional) Columna por la que se ordenan las páginas
+        limit / cursor: (Opcional) Paginación; sin ellos se devuelven todos los puntos
     
     Returns:
-        PredictionScatterResponse con puntos de datos real vs predicho
+        PredictionScatterResponse con puntos de datos real vs predicho (el error
+        promedio y la correlación son de todos los puntos, no solo los de la página)
     """
     try:
         # Cargar métricas para verificar que el modelo existe y obtener performance
@@ -357,9 +364,8 @@ def get_predictions_scatter(
             )
         
         # Filtrar métricas por modelo y válvula
-        modelo_metrics = metrics_df[metrics_df['MODELO'] == modelo]
+        modelo_metrics = data_loader.metrics_for(valvula_id, modelo)
         if valvula_id:
-            modelo_metrics = modelo_metrics[modelo_metrics['VALVULA'] == valvula_id]
             if modelo_metrics.empty:
                 raise HTTPException(
                     status_code=404,
@@ -373,7 +379,8 @@ def get_predictions_scatter(
                 data=[],
                 total_puntos=0,
                 error_promedio=0.0,
-                correlacion=None
+                correlacion=None,
+                total_estimado=0
             )
         
         # NOTA: Los CSVs no contienen las predicciones punto por punto del conjunto de test
@@ -387,9 +394,10 @@ def get_predictions_scatter(
         
         # Cargar datos históricos del dataset de entrenamiento
         # Este tiene más datos históricos con valores de índice de pérdidas
-        dataset_train = data_loader.load_dataset_train()
         if valvula_id:
-            dataset_train = dataset_train[dataset_train['VALVULA'] == valvula_id]
+            dataset_train = data_loader.dataset_train_for(valvula_id)
+        else:
+            dataset_train = data_loader.load_dataset_train()
         
         # Filtrar solo datos con INDICE_PERDIDAS_FINAL válido
         datos_historicos = dataset_train[
@@ -399,9 +407,10 @@ def get_predictions_scatter(
         # Si no hay suficientes datos, usar más
         if len(datos_historicos) < 10:
             # Intentar con Predicciones_Con_Balance
-            pred_df = data_loader.load_predicciones_con_balance()
             if valvula_id:
-                pred_df = pred_df[pred_df['VALVULA'] == valvula_id]
+                pred_df = data_loader.predicciones_for(valvula_id)
+            else:
+                pred_df = data_loader.load_predicciones_con_balance()
             datos_historicos = pred_df[pred_df['INDICE_PERDIDAS_FINAL'].notna()].copy()
         
         # Tomar una muestra aleatoria de n_test puntos (o menos si no hay suficientes)
@@ -411,31 +420,22 @@ def get_predictions_scatter(
         
         # Generar predicciones sintéticas basadas en las métricas reales
         # Usamos una distribución que garantiza una correlación alta pero con errores realistas
-        np.random.seed(hash(modelo + (valvula_id or "")) % 10000)
-        
-        scatter_data = []
-        real_values_list = []
-        
-        # Primero recolectar todos los valores reales válidos
-        for _, row in datos_historicos.iterrows():
-            try:
-                real_value = None
-                if 'INDICE_PERDIDAS_FINAL' in row and pd.notna(row['INDICE_PERDIDAS_FINAL']):
-                    real_value = float(row['INDICE_PERDIDAS_FINAL'])
-                elif 'INDICE_PERDIDAS_%' in row and pd.notna(row['INDICE_PERDIDAS_%']):
-                    real_value = float(row['INDICE_PERDIDAS_%'])
-                
-                if real_value is not None and np.isfinite(real_value):
-                    real_values_list.append((real_value, row))
-            except (ValueError, TypeError):
-                continue
-        
-        if not real_values_list:
+        # Semilla estable entre procesos (hash() de str cambia en cada proceso): mismo ETag, mismos datos.
+        # Generador propio del request: el global de NumPy lo comparten los hilos del threadpool
+        rng = np.random.RandomState(zlib.crc32((modelo + (valvula_id or "")).encode()) % 10000)
+        
+        # Valores reales válidos (finitos), columna por columna
+        real_all = pd.to_numeric(datos_historicos['INDICE_PERDIDAS_FINAL'], errors='coerce').to_numpy(dtype=np.float64)
+        finite = np.isfinite(real_all)
+        if not finite.any():
             raise HTTPException(status_code=404, detail="No hay datos válidos para generar scatter plot")
         
+        real_array = real_all[finite]
+        ids = np.arange(1, len(real_array) + 1)
+        periodos = datos_historicos['PERIODO'][finite] if 'PERIODO' in datos_historicos.columns else None
+        
         # Calcular rango de valores para normalizar errores
-        real_vals = [v[0] for v in real_values_list]
-        valor_medio = np.mean(np.abs(real_vals))
+        valor_medio = np.mean(np.abs(real_array))
         
         # Ajustar el error relativo al rango de valores
         # Si los valores son pequeños (cerca de 0), usar error porcentual
@@ -447,37 +447,67 @@ def get_predictions_scatter(
             error_std = rmse
         
         # Generar predicciones con correlación alta
-        for idx, (real_value, row) in enumerate(real_values_list):
+        # Un solo sorteo vectorizado: misma secuencia que un rng.normal por punto
+        try:
+            error = rng.normal(0, error_std * 0.6, size=len(real_array))  # 60% del error para mantener correlación
+        except ValueError:
+            error = np.full(len(real_array), np.nan)
+        predicted_array = real_array + error
+        
+        # Limitar el error para mantener correlación realista
+        max_error = mae * 1.5
+        clipped = np.abs(predicted_array - real_array) > max_error
+        predicted_array = np.where(clipped, real_array + np.sign(error) * max_error, predicted_array)
+        
+        keep = np.isfinite(predicted_array)
+        real_values = float_column(real_array[keep], ndigits=2)
+        pred_values = float_column(predicted_array[keep], ndigits=2)
+        
+        if periodos is not None:
+            periodos = periodos[keep]
+            periodo_values = [
+                periodo if present else None
+                for periodo, present in zip(str_column(periodos), periodos.notna().tolist())
+            ]
+        else:
+            periodo_values = [None] * len(real_values)
+        
+        ids = ids[keep]
+        positions = np.arange(len(ids))
+        
+        # Paginación: orden y corte sobre las columnas; solo se arman las filas de la página
+        next_cursor = None
+        page_size = resolve_page_size(limit, cursor)
+        if page_size is not None:
+            query = {"modelo": modelo, "valvula_id": valvula_id, "orden": orden}
+            after = decode_cursor(cursor, query)
+            keys = None
+            if orden:
+                column = orden.lstrip("-")
+                if column == "error":
+                    keys = np.abs(np.array(real_values) - np.array(pred_values))
+                else:
+                    keys = np.array(real_values if column == "real" else pred_values)
             try:
-                # Generar error con distribución normal
-                # Usamos un factor de correlación para mantener alta similitud
-                error = np.random.normal(0, error_std * 0.6)  # 60% del error para mantener correlación
-                predicted_value = real_value + error
-                
-                # Limitar el error para mantener correlación realista
-                max_error = mae * 1.5
-                if abs(predicted_value - real_value) > max_error:
-                    predicted_value = real_value + np.sign(error) * max_error
-                
-                if not np.isfinite(predicted_value):
-                    continue
-                
-                scatter_data.append(PredictionScatterPoint(
-                    id=idx + 1,
-                    real=round(real_value, 2),
-                    predicted=round(predicted_value, 2),
-                    valvula=valvula_id,
-                    periodo=str(row['PERIODO']) if 'PERIODO' in row and pd.notna(row['PERIODO']) else None
-                ))
+                positions, next_key = keyset_page(
+                    ids, after, page_size, keys=keys, descending=bool(orden) and orden.startswith("-")
+                )
             except (ValueError, TypeError):
-                continue
-        
-        # Calcular métricas
-        if scatter_data and len(scatter_data) > 0:
-            real_values = [p.real for p in scatter_data]
-            pred_values = [p.predicted for p in scatter_data]
-            
-            error_promedio = np.mean([abs(p.real - p.predicted) for p in scatter_data])
+                raise HTTPException(status_code=400, detail="Cursor inválido")
+            if next_key is not None:
+                next_cursor = encode_cursor(query, next_key)
+        
+        scatter_data = records({
+            "id": ids[positions].tolist(),
+            "real": [real_values[i] for i in positions],
+            "predicted": [pred_values[i] for i in positions],
+            "valvula": [valvula_id] * len(positions),
+            "periodo": [periodo_values[i] for i in positions],
+        })
+        
+        # Calcular métricas (sobre todos los puntos)
+        if real_values:
+            error_promedio = np.mean(np.abs(np.array(real_values) - np.array(pred_values)))
             
             # Verificar que error_promedio sea finito
             if not np.isfinite(error_promedio):
@@ -496,14 +526,17 @@ def get_predictions_scatter(
             error_promedio = 0.0
             correlacion = None
         
-        return PredictionScatterResponse(
-            modelo=modelo,
-            valvula=valvula_id,
-            data=scatter_data,
-            total_puntos=len(scatter_data),
-            error_promedio=round(float(error_promedio), 2) if np.isfinite(error_promedio) else 0.0,
-            correlacion=round(float(correlacion), 2) if correlacion is not None and np.isfinite(correlacion) else None
-        )
+        # Respuesta serializada directo desde las columnas (mismo esquema que PredictionScatterResponse)
+        return FastJSONResponse({
+            "modelo": modelo,
+            "valvula": valvula_id,
+            "data": scatter_data,
+            "total_puntos": len(scatter_data),
+            "error_promedio": round(float(error_promedio), 2) if np.isfinite(error_promedio) else 0.0,
+            "correlacion": round(float(correlacion), 2) if correlacion is not None and np.isfinite(correlacion) else None,
+            "total_estimado": len(ids),
+            "next_cursor": next_cursor,
+        })
     
     except HTTPException:
         raise
@@ -547,11 +580,7 @@ def get_model_details(
             )
         
         # Cargar métricas del modelo
-        metrics_df = data_loader.load_metrics()
-        
-        modelo_data = metrics_df[metrics_df['MODELO'] == model_name]
-        if valvula_id:
-            modelo_data = modelo_data[modelo_data['VALVULA'] == valvula_id]
+        modelo_data = data_loader.metrics_for(valvula_id, model_name)
         
         if modelo_data.empty:
             raise HTTPException(
@@ -0,0 +1,123 @@
+"""Rutas de Predicción - Ensemble de modelos residentes por válvula"""
+from typing import Any, Callable
+
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.services import inference
+from app.services.inference import InferenceQueueFull, InferenceTimeout, inference_executor
+from app.services.model_registry import model_registry
+from app.api.fastjson import FastJSONResponse, float_column
+from app.schemas.responses import BatchPredictRequest, BatchPredictResponse, PredictRequest, PredictResponse
+
+router = APIRouter()
+
+
+async def _infer(fn: Callable[..., Any], *args: Any) -> Any:
+    """Ejecuta una tarea en el ejecutor de inferencia, traduciendo backpressure y timeout a HTTP"""
+    try:
+        return await inference_executor.run(fn, *args)
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+@router.post(
+    "",
+    response_model=PredictResponse,
+    summary="Predecir volumen de entrada",
+    description="Predicción con el ensemble de modelos entrenados de una válvula (Prophet, LightGBM, RandomForest, CatBoost)"
+)
+async def predict(request: PredictRequest):
+    """
+    Predice el volumen de entrada de una válvula.
+
+    Los modelos se cargan una sola vez y quedan residentes (ver
+    app.services.model_registry): una predicción cuesta lo que tardan los
+    modelos en predecir, no en deserializarse. La predicción corre en el
+    ejecutor de inferencia (app.services.inference), fuera del event loop:
+    503 si la cola está llena, 504 si no termina a tiempo.
+
+    Ejemplo:
+        POST /api/predict
+        {"valvula_id": "VALVULA_1", "fecha": "2025-08-01", "features": {"PRESION_FINAL": 10.5, ...}}
+    """
+    try:
+        # Puede leer y deserializar metadata_modelos: fuera del event loop
+        await run_in_threadpool(model_registry.models_available, request.valvula_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+    try:
+        result = await _infer(inference.predict, request.valvula_id, request.features, request.fecha)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al predecir {request.valvula_id}: {str(e)}"
+        )
+
+    if result["prediccion"] is None:
+        errores = "; ".join(f"{modelo}: {error}" for modelo, error in result["errores"].items())
+        raise HTTPException(
+            status_code=422,
+            detail=f"Ningún modelo de {request.valvula_id} pudo predecir "
+                   + (f"({errores})" if errores else "(¿falta la fecha?)")
+        )
+
+    return PredictResponse(**result)
+
+
+@router.post(
+    "/batch",
+    response_model=BatchPredictResponse,
+    summary="Predecir varias filas",
+    description="Predicciones del ensemble para muchas válvulas y períodos en un solo request: cada modelo predice una vez por válvula sobre todas sus filas"
+)
+async def predict_batch(request: BatchPredictRequest):
+    """
+    Predice el volumen de entrada de varias filas.
+
+    Las filas se agrupan por válvula; para cada una, cada modelo de árboles
+    predice una sola vez sobre la matriz de features apilada y Prophet una vez
+    sobre las fechas distintas. El ensemble se calcula con NumPy sobre todo el
+    grupo. Las respuestas vuelven en el orden de las filas. Todo el batch es
+    una sola tarea del ejecutor de inferencia.
+
+    Ejemplo:
+        POST /api/predict/batch
+        {"filas": [{"valvula_id": "VALVULA_1", "fecha": "2025-08-01", "features": {...}}, ...]}
+    """
+    filas = request.filas
+    if len(filas) > settings.PREDICT_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo {settings.PREDICT_BATCH_MAX_ROWS} filas por request (recibidas: {len(filas)})"
+        )
+
+    try:
+        result = await _infer(
+            inference.predict_rows,
+            [fila.valvula_id for fila in filas],
+            [fila.features for fila in filas],
+            [fila.fecha for fila in filas]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al predecir el batch: {str(e)}"
+        )
+
+    # Respuesta serializada directo desde los arrays (mismo esquema que BatchPredictResponse)
+    return FastJSONResponse({
+        "predicciones": float_column(result["prediccion"]),
+        "predicciones_por_modelo": {modelo: float_column(values) for modelo, values in result["predicciones"].items()},
+        "versiones": result["versiones"],
+        "errores": result["errores"],
+        "valvulas_no_encontradas": result["valvulas_no_encontradas"],
+    })
@@ -0,0 +1,159 @@
+"""Serialización por partes (streaming) de DataFrames: NDJSON, CSV y Arrow IPC
+
+Las exportaciones masivas no arman el payload completo: cada bloque de filas
+(varias válvulas chicas juntas, o una parte de una válvula grande) se
+serializa y se entrega al cliente antes de pasar al siguiente, así que la
+memoria usada depende del tamaño del bloque y no del total exportado.
+
+Arrow IPC usa el formato stream (un esquema y luego record batches) y requiere
+pyarrow; las columnas categóricas se exportan como texto para que todos los
+batches compartan el mismo esquema.
+"""
+import importlib.util
+from typing import Any, Dict, Iterable, Iterator, List
+
+import pandas as pd
+
+from app.api.fastjson import dumps, native_column
+
+
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Formato -> (media type, extensión del archivo)
+STREAM_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+def json_columns(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    """Columnas del DataFrame como listas de tipos nativos de Python (faltantes -> None)"""
+    return {name: native_column(df[name]) for name in df.columns}
+
+
+def ndjson_chunk(df: pd.DataFrame) -> bytes:
+    """Un objeto JSON por fila, separados por salto de línea"""
+    columns = json_columns(df)
+    keys = tuple(columns)
+    return b"".join(dumps(dict(zip(keys, row))) + b"\n" for row in zip(*columns.values()))
+
+
+def csv_chunk(df: pd.DataFrame, header: bool) -> bytes:
+    """Filas en CSV (la cabecera solo en el primer bloque)"""
+    return df.to_csv(index=False, header=header, lineterminator="\n").encode("utf-8")
+
+
+class _ChunkSink:
+    """Destino de escritura de pyarrow que acumula los bytes hasta que se retiran"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ArrowStreamEncoder:
+    """
+    Arrow IPC (formato stream) escrito de a un record batch por bloque
+
+    Args:
+        template: DataFrame (puede estar vacío) con las columnas y tipos de todos los bloques
+    """
+
+    def __init__(self, template: pd.DataFrame):
+        import pyarrow as pa
+
+        self._pa = pa
+        inferred = pa.Schema.from_pandas(template.iloc[0:0], preserve_index=False)
+        self.schema = pa.schema([
+            pa.field(f.name, f.type.value_type if pa.types.is_dictionary(f.type) else f.type)
+            for f in inferred
+        ])
+        self._sink = _ChunkSink()
+        self._writer = pa.ipc.new_stream(pa.PythonFile(self._sink, mode="w"), self.schema)
+
+    def header(self) -> bytes:
+        """Mensaje con el esquema (se escribe al crear el stream)"""
+        return self._sink.drain()
+
+    def write(self, df: pd.DataFrame) -> bytes:
+        """Bytes del record batch de un bloque"""
+        batch = self._pa.RecordBatch.from_pandas(df, schema=self.schema, preserve_index=False)
+        self._writer.write_batch(batch)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Marca de fin del stream"""
+        self._writer.close()
+        return self._sink.drain()
+
+
+def iter_blocks(frames: Iterable[pd.DataFrame], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Bloques de como mucho chunk_rows filas, en el orden de los frames
+
+    Los frames grandes se cortan por posición (sin copiar) y los chicos se
+    juntan hasta chunk_rows filas, para no pagar el costo fijo de serializar
+    un bloque por cada válvula con pocas filas.
+    """
+    pending: List[pd.DataFrame] = []
+    pending_rows = 0
+    for df in frames:
+        for start in range(0, len(df), chunk_rows):
+            block = df.iloc[start:start + chunk_rows]
+            if pending_rows + len(block) > chunk_rows and pending:
+                yield pending[0] if len(pending) == 1 else pd.concat(pending)
+                pending, pending_rows = [], 0
+            pending.append(block)
+            pending_rows += len(block)
+    if pending:
+        yield pending[0] if len(pending) == 1 else pd.concat(pending)
+
+
+def stream_frames(
+    frames: Iterable[pd.DataFrame],
+    formato: str,
+    template: pd.DataFrame,
+    chunk_rows: int
+) -> Iterator[bytes]:
+    """
+    Serializa una secuencia de DataFrames bloque por bloque
+
+    Args:
+        frames: DataFrames a exportar (se recorren de a uno)
+        formato: ndjson, csv o arrow
+        template: DataFrame con las columnas y tipos de la exportación (cabecera CSV / esquema Arrow)
+        chunk_rows: Máximo de filas serializadas por bloque
+    """
+    blocks = iter_blocks(frames, chunk_rows)
+
+    if formato == "arrow":
+        encoder = ArrowStreamEncoder(template)
+        yield encoder.header()
+        for block in blocks:
+            yield encoder.write(block)
+        yield encoder.close()
+        return
+
+    if formato == "csv":
+        # La cabecera va aunque no haya filas
+        yield csv_chunk(template.iloc[0:0], header=True)
+        for block in blocks:
+            yield csv_chunk(block, header=False)
+        return
+
+    for block in blocks:
+        yield ndjson_chunk(block)
@@ -32,6 +32,75 @@ class Settings:
     BASE_DIR: Path = Path(__file__).resolve().parent.parent
     DATA_PATH: Path = BASE_DIR.parent / "BALANC-IA"
     
+    # Snapshots Parquet de los CSVs (python -m app.services.snapshots)
+    USE_SNAPSHOTS: bool = os.getenv("USE_SNAPSHOTS", "true").lower() == "true"
+    
+    # Caché de solo lectura: los load_* devuelven vistas Copy-on-Write en lugar de copias
+    READONLY_CACHE: bool = os.getenv("READONLY_CACHE", "false").lower() == "true"
+    
+    # Segundos entre verificaciones de cambios en los CSVs fuente de cada dataset cacheado
+    CACHE_CHECK_INTERVAL: float = float(os.getenv("CACHE_CHECK_INTERVAL", "2"))
+    
+    # Presupuesto de memoria del caché de datasets en MB (LRU ponderado por tamaño; 0 = sin límite)
+    CACHE_MAX_MB: float = float(os.getenv("CACHE_MAX_MB", "512"))
+    
+    # ETags de las rutas de solo lectura: sal (cambiarla en cada deploy invalida los ETags
+    # aunque los datos no cambien) y max-age de Cache-Control
+    ETAG_SALT: str = os.getenv("ETAG_SALT", VERSION)
+    HTTP_CACHE_MAX_AGE: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+    
+    # Estados de las alertas compartidos entre workers: "sqlite" (WAL) o "memory" (un solo proceso)
+    ALERT_STATE_BACKEND: str = os.getenv("ALERT_STATE_BACKEND", "sqlite").lower()
+    ALERT_STATE_DB: Path = Path(os.getenv("ALERT_STATE_DB", str(BASE_DIR / "alert_states.db")))
+    
+    # Máximo de consultas por request en POST /api/batch
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+    
+    # Paginación por cursor (alertas y scatters): tamaño por defecto y máximo de una página
+    DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+    MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+    
+    # Exportación masiva (/api/export): máximo de filas serializadas por bloque del stream
+    EXPORT_CHUNK_ROWS: int = int(os.getenv("EXPORT_CHUNK_ROWS", "50000"))
+    
+    # Modelos entrenados (artefactos VALVULA_*_* y metadata_modelos) y segundos entre
+    # verificaciones de cambios en sus archivos (reemplazo en caliente)
+    MODELS_PATH: Path = Path(os.getenv("MODELS_PATH", str(DATA_PATH / "modelos")))
+    MODELS_CHECK_INTERVAL: float = float(os.getenv("MODELS_CHECK_INTERVAL", "5"))
+    
+    # Presupuesto de memoria de los modelos residentes en MB, por proceso (LRU; 0 = sin límite)
+    # y archivo con los accesos por modelo que ordenan la precarga
+    MODELS_MAX_MB: float = float(os.getenv("MODELS_MAX_MB", "1024"))
+    MODELS_ACCESS_STATS: Path = Path(os.getenv("MODELS_ACCESS_STATS", str(BASE_DIR / "model_access.json")))
+    
+    # Predecir RandomForest y LightGBM con el evaluador NumPy de árboles aplanados
+    # (app/services/tree_ensemble.py) en lugar de su predict
+    NUMPY_TREES: bool = os.getenv("NUMPY_TREES", "true").lower() == "true"
+    # Trabajo por llamada (filas x árboles x profundidad) hasta el que conviene el evaluador
+    # NumPy; con más se usa el predict del modelo. Cruces medidos con
+    # benchmarks/bench_tree_ensemble.py: el predict de LightGBM tiene mucho menos overhead
+    # por llamada que el de scikit-learn, así que su límite es mucho más bajo
+    NUMPY_TREES_MAX_WORK_RANDOMFOREST: int = int(os.getenv("NUMPY_TREES_MAX_WORK_RANDOMFOREST", "1000000"))
+    NUMPY_TREES_MAX_WORK_LIGHTGBM: int = int(os.getenv("NUMPY_TREES_MAX_WORK_LIGHTGBM", "15000"))
+    
+    # Máximo de filas por request en POST /api/predict/batch
+    PREDICT_BATCH_MAX_ROWS: int = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "20000"))
+    
+    # Inferencia en un pool de procesos (0 = en un hilo del proceso de la API): procesos,
+    # tareas en espera antes de rechazar con 503, timeout por request en segundos y
+    # método de arranque de los procesos
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "2"))
+    INFERENCE_QUEUE_SIZE: int = int(os.getenv("INFERENCE_QUEUE_SIZE", "32"))
+    INFERENCE_TIMEOUT: float = float(os.getenv("INFERENCE_TIMEOUT", "10"))
+    INFERENCE_START_METHOD: str = os.getenv("INFERENCE_START_METHOD", "spawn")
+    
+    # Guardar las mediciones (columnas float) en float32 en lugar de float64
+    COMPACT_FLOATS: bool = os.getenv("COMPACT_FLOATS", "false").lower() == "true"
+    
+    # Precarga en paralelo de todos los datasets al iniciar la API (ver /ready)
+    WARMUP_ON_STARTUP: bool = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+    WARMUP_WORKERS: int = int(os.getenv("WARMUP_WORKERS", "4"))
+    
     # Validar que la carpeta de datos existe
     @classmethod
     def validate_data_path(cls):
@@ -1,12 +1,45 @@
 """FastAPI Application - Entry Point"""
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.config import settings
-from app.api.routes import dashboard, balances, models, correlations, alerts, reliability, benchmark, forecast
+from app.api.etag import etag_middleware
+from app.api.routes import dashboard, balances, models, correlations, alerts, reliability, benchmark, forecast, batch, export, predict
 
 # Validar ruta de datos al inicio
 settings.validate_data_path()
 
+# El caché readonly entrega copias superficiales: requiere Copy-on-Write en todo el proceso
+if settings.READONLY_CACHE:
+    from app.services.data_loader import enable_copy_on_write
+    enable_copy_on_write()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Precarga los datasets en segundo plano; la API acepta conexiones mientras tanto (ver /ready)"""
+    from app.services.data_loader import data_loader
+    from app.services.inference import inference_executor
+    
+    def warm_up():
+        data_loader.warm_up()
+        dashboard.prime_views()
+        # Arranca los procesos de inferencia (cada uno precarga los modelos)
+        inference_executor.start()
+    
+    warmup = None
+    if settings.WARMUP_ON_STARTUP:
+        warmup = asyncio.get_running_loop().run_in_executor(None, warm_up)
+    
+    yield
+    
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+    inference_executor.shutdown()
+
+
 # Crear instancia de FastAPI
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -14,8 +47,12 @@ app = FastAPI(
     version=settings.VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+# ETags / GET condicional en las rutas de solo lectura
+app.middleware("http")(etag_middleware)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -51,9 +88,76 @@ def health_check():
         "status": "healthy",
         "data_path_exists": settings.DATA_PATH.exists(),
         "data_path": str(settings.DATA_PATH),
-        "valvulas_disponibles": valvulas_count
+        "valvulas_disponibles": valvulas_count,
+        "data_version": data_loader.data_version
+    }
+
+@app.get("/ready", tags=["Health"])
+def readiness_check():
+    """
+    Readiness para el balanceador: 503 ("warming") mientras se precargan los datasets,
+    200 ("ready") cuando terminó la precarga
+    """
+    from app.services.data_loader import data_loader
+    
+    warmup = data_loader.get_warmup_info()
+    if settings.WARMUP_ON_STARTUP and not data_loader.is_warm:
+        return JSONResponse(status_code=503, content={"status": "warming", **warmup})
+    
+    return {"status": "ready", **warmup}
+
+@app.get("/health/memory", tags=["Health"])
+def memory_usage():
+    """Memoria (deep) de cada dataset cacheado en este worker"""
+    from app.services.data_loader import data_loader
+    
+    datasets = data_loader.get_memory_usage()
+    return {
+        "total_bytes": sum(d["memory_bytes"] + d["partitions_bytes"] for d in datasets.values()),
+        "compact_floats": settings.COMPACT_FLOATS,
+        "datasets": datasets
     }
 
+@app.get("/health/cache", tags=["Health"])
+def cache_stats():
+    """Aciertos, fallos, desalojos y uso del presupuesto de memoria del caché de datasets"""
+    from app.services.data_loader import data_loader
+    from app.services.views import materialized_views
+    from app.services.alert_store import alert_store
+    
+    return {
+        **data_loader.get_cache_stats(),
+        "vistas_materializadas": materialized_views.get_info(),
+        "estados_alertas": alert_store.states.get_info()
+    }
+
+@app.get("/health/models", tags=["Health"])
+async def models_registry():
+    """
+    Modelos residentes (orden LRU) con su memoria estimada, hash (versión), accesos y
+    tiempo de carga, y uso del presupuesto MODELS_MAX_MB: los del proceso de la API y,
+    con INFERENCE_WORKERS > 0, los de uno de los procesos de inferencia
+    """
+    from app.services.model_registry import model_registry
+    from app.services import inference
+    from app.services.inference import inference_executor
+    
+    model_registry.check_artifacts()
+    info = {"api": model_registry.get_info()}
+    if inference_executor.workers > 0 and inference_executor.active:
+        try:
+            info["inferencia"] = await inference_executor.run(inference.registry_info)
+        except Exception as e:
+            info["inferencia"] = {"error": str(e)}
+    return info
+
+@app.get("/health/inference", tags=["Health"])
+def inference_stats():
+    """Ejecutor de inferencia: profundidad de la cola, rechazos, timeouts y percentiles de latencia"""
+    from app.services.inference import inference_executor
+    
+    return inference_executor.get_info()
+
 @app.get("/test/data-loader", tags=["Test"])
 def test_data_loader():
     """Probar que el Data Loader puede leer todos los CSVs"""
@@ -96,6 +200,29 @@ def test_data_loader():
         "results": results
     }
 
+@app.get("/test/cache-integrity", tags=["Test"])
+def test_cache_integrity():
+    """Verificar que ninguna ruta haya modificado los DataFrames compartidos del caché"""
+    from app.services.data_loader import data_loader
+    
+    if not data_loader.readonly:
+        return {
+            "status": "skipped",
+            "message": "El caché entrega copias profundas (READONLY_CACHE=false)"
+        }
+    
+    mutated = data_loader.verify_cache_integrity()
+    if mutated:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Rutas escribieron sobre frames compartidos del caché: {mutated}"
+        )
+    
+    return {
+        "status": "OK",
+        "datasets_verificados": len(data_loader._cache)
+    }
+
 # Registrar routers
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 app.include_router(balances.router, prefix="/api/balances", tags=["Balances"])
@@ -105,6 +232,9 @@ app.include_router(alerts.router, prefix="/api/alerts", tags=["Alertas"])
 app.include_router(reliability.router, prefix="/api/reliability", tags=["Confiabilidad"])
 app.include_router(benchmark.router, prefix="/api/benchmark", tags=["Benchmark"])
 app.include_router(forecast.router, prefix="/api/forecast", tags=["Pronósticos"])
+app.include_router(batch.router, prefix="/api", tags=["Batch"])
+app.include_router(export.router, prefix="/api/export", tags=["Exportación"])
+app.include_router(predict.router, prefix="/api/predict", tags=["Predicción"])
 
 if __name__ == "__main__":
     import uvicorn
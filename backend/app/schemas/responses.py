@@ -1,6 +1,6 @@
 """Schemas Pydantic para respuestas de la API"""
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict, Union
 from datetime import datetime
 
 
@@ -26,6 +26,19 @@ class LossIndexPoint(BaseModel):
     indice_predicho: Optional[float]
 
 
+class LossIndexTrendPoint(LossIndexPoint):
+    """Punto de evolución del índice de pérdidas con media móvil"""
+    indice_real_movil: Optional[float] = Field(None, description="Media móvil del índice real")
+    indice_predicho_movil: Optional[float] = Field(None, description="Media móvil del índice predicho")
+
+
+class LossIndexBreakdown(BaseModel):
+    """Evolución del índice de pérdidas total y por válvula"""
+    ventana: Optional[int] = Field(None, description="Períodos de la media móvil (None = sin media móvil)")
+    total: List[LossIndexTrendPoint]
+    por_valvula: Optional[Dict[str, List[LossIndexTrendPoint]]] = None
+
+
 class TopValve(BaseModel):
     """Válvula en el top de desbalances"""
     valvula: str
@@ -122,6 +135,8 @@ class PredictionScatterResponse(BaseModel):
     total_puntos: int
     error_promedio: float = Field(..., description="Error promedio absoluto")
     correlacion: Optional[float] = Field(None, description="Coeficiente de correlación")
+    total_estimado: Optional[int] = Field(None, description="Puntos que cumplen los filtros en todas las páginas")
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (None en la última página o sin paginar)")
 
 
 class FeatureImportance(BaseModel):
@@ -239,6 +254,8 @@ class CorrelationScatterResponse(BaseModel):
     data: List[CorrelationScatterPoint] = Field(..., description="Puntos del scatter plot")
     correlation: float = Field(..., description="Coeficiente de correlación de Pearson")
     total_puntos: int = Field(..., description="Total de puntos de datos")
+    total_estimado: Optional[int] = Field(None, description="Puntos que cumplen los filtros en todas las páginas")
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (None en la última página o sin paginar)")
 
 
 # ==================== ALERT SCHEMAS ====================
@@ -269,6 +286,8 @@ class AlertsResponse(BaseModel):
     """Lista de alertas"""
     alertas: List[Alert]
     total: int
+    total_estimado: Optional[int] = Field(None, description="Alertas que cumplen los filtros en todas las páginas")
+    next_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente (None en la última página o sin paginar)")
 
 
 class AlertStats(BaseModel):
@@ -306,6 +325,25 @@ class AlertUpdateResponse(BaseModel):
     alert: Optional[Alert] = None
 
 
+class AlertStateChange(BaseModel):
+    """Cambio de estado de una alerta dentro de un lote"""
+    id: int = Field(..., description="ID de la alerta")
+    estado: str = Field(..., description="Nuevo estado: pendiente, revisada, resuelta")
+
+
+class AlertBatchUpdateRequest(BaseModel):
+    """Request para actualizar el estado de varias alertas"""
+    cambios: List[AlertStateChange] = Field(..., description="Cambios de estado a aplicar")
+
+
+class AlertBatchUpdateResponse(BaseModel):
+    """Respuesta al actualizar varias alertas"""
+    success: bool
+    message: str
+    alertas: List[Alert] = Field(..., description="Alertas actualizadas")
+    no_encontradas: List[int] = Field(default_factory=list, description="IDs sin alerta")
+
+
 # ==================== PREDICTION SCHEMAS ====================
 
 class PredictionData(BaseModel):
@@ -323,6 +361,43 @@ class PredictionResponse(BaseModel):
     predicciones: List[PredictionData]
 
 
+class PredictRequest(BaseModel):
+    """Entrada de una predicción con el ensemble de modelos de una válvula"""
+    valvula_id: str = Field(..., description="Válvula (ej: VALVULA_1)")
+    features: Dict[str, Optional[float]] = Field(
+        default_factory=dict, description="Features de los modelos de árboles (None vale 0; un modelo al que le falta alguna de sus features no predice)"
+    )
+    fecha: Optional[datetime] = Field(None, description="Fecha a predecir (requerida para Prophet)")
+
+
+class PredictResponse(BaseModel):
+    """Predicción del ensemble y de cada modelo que participó"""
+    valvula_id: str
+    prediccion: Optional[float] = Field(None, description="Volumen de entrada predicho (promedio ponderado)")
+    predicciones: Dict[str, float] = Field(default_factory=dict, description="Predicción de cada modelo")
+    pesos: Dict[str, float] = Field(default_factory=dict, description="Pesos normalizados del ensemble")
+    versiones: Dict[str, str] = Field(default_factory=dict, description="Versión (hash) de cada artefacto usado")
+    errores: Dict[str, str] = Field(default_factory=dict, description="Error de cada modelo que no pudo predecir")
+
+
+class BatchPredictRequest(BaseModel):
+    """Varias predicciones (de una o más válvulas) en un solo request"""
+    filas: List[PredictRequest] = Field(..., description="Filas a predecir")
+
+
+class BatchPredictResponse(BaseModel):
+    """Predicciones del ensemble en el mismo orden que las filas del request"""
+    predicciones: List[Optional[float]] = Field(..., description="Predicción de cada fila (None si ningún modelo predijo)")
+    predicciones_por_modelo: Dict[str, List[Optional[float]]] = Field(
+        default_factory=dict, description="Predicción de cada modelo por fila (None donde el modelo no predijo)"
+    )
+    versiones: Dict[str, Dict[str, str]] = Field(default_factory=dict, description="Versión de cada artefacto usado, por válvula")
+    errores: Dict[str, Dict[str, str]] = Field(
+        default_factory=dict, description="Error de cada modelo que no pudo predecir, por válvula (sus filas quedan en None para ese modelo)"
+    )
+    valvulas_no_encontradas: List[str] = Field(default_factory=list, description="Válvulas sin modelos (sus filas quedan en None)")
+
+
 # ==================== UTILITY SCHEMAS ====================
 
 class ValvulasList(BaseModel):
@@ -347,3 +422,31 @@ class ErrorResponse(BaseModel):
     """Respuesta de error estándar"""
     detail: str
     error_code: Optional[str] = None
+
+
+# ==================== BATCH SCHEMAS ====================
+
+class BatchRequestItem(BaseModel):
+    """Consulta GET dentro de un batch"""
+    path: str = Field(..., description="Ruta de la API (ej: /api/models/metrics)")
+    params: Dict[str, Union[str, int, float, bool, List[Union[str, int, float, bool]]]] = Field(
+        default_factory=dict, description="Query params de la consulta"
+    )
+
+
+class BatchRequest(BaseModel):
+    """Lista de consultas a ejecutar en un solo request"""
+    requests: List[BatchRequestItem] = Field(..., description="Consultas GET a ejecutar")
+
+
+class BatchResult(BaseModel):
+    """Respuesta de una consulta del batch"""
+    path: str
+    status: int = Field(..., description="Código HTTP de la consulta")
+    body: Any = Field(None, description="Cuerpo de la respuesta")
+
+
+class BatchResponse(BaseModel):
+    """Respuestas de todas las consultas del batch, en el mismo orden"""
+    results: List[BatchResult]
+    data_version: int = Field(..., description="Versión de los datos con la que se respondió")
@@ -0,0 +1,218 @@
+"""Backends del estado de las alertas (pendiente / revisada / resuelta)
+
+El estado de cada alerta lo asigna el usuario (PATCH) y tiene que ser el mismo
+en todos los workers de uvicorn. El backend por defecto es un SQLite embebido
+en modo WAL compartido por todos los procesos:
+
+- Lecturas: caché en memoria del proceso con lectura transparente (read-through)
+  de la tabla completa; se invalida cuando otro proceso hace commit, lo que se
+  detecta con PRAGMA data_version (sin leer la tabla).
+- Escrituras: set_many escribe cualquier cantidad de estados en una sola
+  transacción; setdefault_many inserta los estados iniciales sin pisar los que
+  ya asignó otro worker.
+
+El backend en memoria conserva el comportamiento de un solo proceso.
+
+Los estados se guardan por clave estable de la alerta (válvula, nivel, tipo y
+ocurrencia; ver app.services.alert_store.alert_key), no por su posición en
+Alertas_Puntos.csv: si el archivo se regenera, cada estado sigue asociado a la
+misma alerta.
+"""
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Hashable, Mapping, Optional
+
+from app.config import settings
+
+
+class AlertStateBackend(ABC):
+    """Interfaz de los backends de estado de alertas (estados por clave de alerta)"""
+
+    @abstractmethod
+    def token(self) -> Hashable:
+        """Valor que cambia cada vez que cambia algún estado (en cualquier proceso)"""
+
+    @abstractmethod
+    def get_all(self) -> Dict[str, str]:
+        """Estados de todas las alertas (clave -> estado)"""
+
+    def get(self, alert_key: str) -> Optional[str]:
+        """Estado de una alerta, si tiene uno asignado"""
+        return self.get_all().get(alert_key)
+
+    @abstractmethod
+    def set_many(self, states: Mapping[str, str]):
+        """Asigna estados (una sola escritura para todo el lote)"""
+
+    def set(self, alert_key: str, estado: str):
+        """Asigna el estado de una alerta"""
+        self.set_many({alert_key: estado})
+
+    @abstractmethod
+    def setdefault_many(self, states: Mapping[str, str]) -> Dict[str, str]:
+        """
+        Asigna estados solo a las alertas que todavía no tienen uno
+
+        Returns:
+            dict: Estado vigente de cada alerta pedida (el existente o el nuevo)
+        """
+
+    def get_info(self) -> Dict:
+        """Descripción del backend para /health/cache"""
+        return {"backend": type(self).__name__}
+
+
+class MemoryStateBackend(AlertStateBackend):
+    """Estados en un dict del proceso (un solo worker)"""
+
+    def __init__(self):
+        self._states: Dict[str, str] = {}
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def token(self) -> Hashable:
+        return self._writes
+
+    def get_all(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._states)
+
+    def get(self, alert_key: str) -> Optional[str]:
+        return self._states.get(alert_key)
+
+    def set_many(self, states: Mapping[str, str]):
+        with self._lock:
+            self._states.update(states)
+            self._writes += 1
+
+    def setdefault_many(self, states: Mapping[str, str]) -> Dict[str, str]:
+        with self._lock:
+            missing = {alert_key: estado for alert_key, estado in states.items() if alert_key not in self._states}
+            if missing:
+                self._states.update(missing)
+                self._writes += 1
+            return {alert_key: self._states[alert_key] for alert_key in states}
+
+
+class SQLiteStateBackend(AlertStateBackend):
+    """
+    Estados en un archivo SQLite (WAL) compartido por todos los workers
+
+    La tabla alert_states_by_key reemplaza a alert_states (indexada por la
+    posición de la fila en el CSV); los estados de esa tabla no se migran
+    porque no identifican a la alerta.
+
+    Args:
+        path: Archivo de la base de datos (se crea si no existe)
+        busy_timeout: Segundos de espera cuando otro proceso tiene el lock de escritura
+    """
+
+    def __init__(self, path: Path, busy_timeout: float = 5.0):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=busy_timeout, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS alert_states_by_key ("
+            " alert_key TEXT PRIMARY KEY,"
+            " estado TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+
+        # Caché read-through de la tabla completa y versión de la base con la que se llenó
+        self._cache: Optional[Dict[str, str]] = None
+        self._cache_version: Optional[int] = None
+        self._writes = 0
+        self._reads = 0
+
+    def token(self) -> Hashable:
+        with self._lock:
+            return (self._db_version(), self._writes)
+
+    def get_all(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._cached())
+
+    def get(self, alert_key: str) -> Optional[str]:
+        with self._lock:
+            return self._cached().get(alert_key)
+
+    def set_many(self, states: Mapping[str, str]):
+        if not states:
+            return
+        now = time.time()
+        with self._lock:
+            self._write(
+                "INSERT INTO alert_states_by_key (alert_key, estado, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(alert_key) DO UPDATE SET estado = excluded.estado, updated_at = excluded.updated_at",
+                [(alert_key, estado, now) for alert_key, estado in states.items()]
+            )
+            if self._cache is not None:
+                self._cache.update(states)
+
+    def setdefault_many(self, states: Mapping[str, str]) -> Dict[str, str]:
+        now = time.time()
+        with self._lock:
+            cache = self._cached()
+            missing = [(alert_key, estado, now) for alert_key, estado in states.items() if alert_key not in cache]
+            if missing:
+                # INSERT OR IGNORE: si otro worker asignó el estado entre medio, gana el suyo
+                self._write(
+                    "INSERT OR IGNORE INTO alert_states_by_key (alert_key, estado, updated_at) VALUES (?, ?, ?)", missing
+                )
+                self._cache = None
+                cache = self._cached()
+            return {alert_key: cache[alert_key] for alert_key in states}
+
+    def get_info(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": type(self).__name__,
+                "path": str(self.path),
+                "alertas_con_estado": len(self._cached()),
+                "escrituras": self._writes,
+                "lecturas_tabla": self._reads,
+            }
+
+    def _write(self, sql: str, rows: list):
+        """Ejecuta un lote de escrituras en una sola transacción"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(sql, rows)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._writes += 1
+
+    def _db_version(self) -> int:
+        """PRAGMA data_version: cambia cuando otra conexión hace commit"""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _cached(self) -> Dict[str, str]:
+        """Tabla completa desde el caché, releyéndola si otro proceso escribió"""
+        version = self._db_version()
+        if self._cache is None or version != self._cache_version:
+            self._cache = dict(self._conn.execute("SELECT alert_key, estado FROM alert_states_by_key"))
+            self._cache_version = version
+            self._reads += 1
+        return self._cache
+
+
+def create_state_backend() -> AlertStateBackend:
+    """Backend configurado en settings.ALERT_STATE_BACKEND (sqlite por defecto)"""
+    if settings.ALERT_STATE_BACKEND == "memory":
+        return MemoryStateBackend()
+
+    try:
+        return SQLiteStateBackend(settings.ALERT_STATE_DB)
+    except sqlite3.Error as e:
+        # Ruta no escribible: los estados quedan solo en este proceso
+        print(f"⚠ No se pudo abrir {settings.ALERT_STATE_DB} ({e}); estados de alertas en memoria")
+        return MemoryStateBackend()
@@ -0,0 +1,451 @@
+"""Almacén indexado de alertas
+
+Las alertas enriquecidas (severidad, tipo, descripción, ubicación, fecha) se
+construyen una sola vez por versión de datos a partir de
+dashboard/Alertas_Puntos.csv y se indexan por id, válvula, nivel, severidad,
+tipo y estado, más un orden precalculado por fecha. Los filtros, las
+estadísticas, las alertas recientes y las páginas por cursor son lecturas de
+índices, y actualizar el estado de una alerta toca un único registro.
+
+Los estados se guardan en un backend compartido entre workers
+(app.services.alert_states), por clave estable de la alerta (alert_key); los
+cambios hechos por otro worker se aplican al índice en la siguiente lectura.
+"""
+import bisect
+import itertools
+import random
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Set, Tuple
+
+import pandas as pd
+
+from app.services.data_loader import data_loader
+from app.services.alert_states import AlertStateBackend, create_state_backend
+from app.schemas.responses import Alert, AlertMetrics
+
+
+# Estados permitidos para una alerta
+ALERT_STATES = ("pendiente", "revisada", "resuelta")
+
+# Severidades normalizadas (formato del frontend)
+SEVERITIES = ("critica", "alta", "media", "baja")
+
+# Mapeo de válvulas a sectores
+VALVE_SECTORS = {
+    "VALVULA_1": "Sector Norte",
+    "VALVULA_2": "Sector Centro",
+    "VALVULA_3": "Sector Sur",
+    "VALVULA_4": "Sector Este",
+    "VALVULA_5": "Sector Oeste"
+}
+
+
+def _generate_alert_description(nivel: str, mensajes: str, indice: float) -> str:
+    """Genera una descripción detallada basada en los datos de la alerta"""
+    if "Pérdidas negativas" in mensajes:
+        num_periodos = mensajes.split("periodo(s)")[0].split()[-1]
+        return f"Detección de pérdidas negativas en {num_periodos} periodo(s). Índice de pérdidas de {abs(indice):.1f}%. Requiere revisión de datos o posibles inconsistencias en mediciones."
+    elif nivel.upper() in ["CRITICO", "CRÍTICO"]:
+        return f"Índice de pérdidas crítico detectado ({abs(indice):.1f}%). Se superó el umbral crítico. Requiere intervención inmediata del equipo técnico."
+    elif nivel.upper() == "ALTO":
+        return f"Pérdidas superiores al promedio histórico. Índice de pérdidas en {abs(indice):.1f}%. Se recomienda investigación detallada."
+    elif nivel.upper() == "MEDIO":
+        return f"Índice de pérdidas ligeramente por encima del promedio ({abs(indice):.1f}%). Requiere seguimiento y monitoreo."
+    else:
+        return f"Desviación menor detectada. Índice de pérdidas: {abs(indice):.1f}%."
+
+
+def _determine_alert_type(nivel: str, indice: float) -> str:
+    """Determina el tipo de alerta basado en los datos"""
+    if indice < 0:
+        return "Anomalía"
+    elif nivel.upper() in ["CRITICO", "CRÍTICO", "ALTO"]:
+        return "Desbalance"
+    else:
+        return "Anomalía"
+
+
+def _normalize_severity(nivel: str) -> str:
+    """Normaliza el nivel de severidad al formato del frontend"""
+    nivel_upper = nivel.upper()
+    if nivel_upper in ["CRITICO", "CRÍTICO"]:
+        return "critica"
+    elif nivel_upper == "ALTO":
+        return "alta"
+    elif nivel_upper == "MEDIO":
+        return "media"
+    elif nivel_upper == "BAJO":
+        return "baja"
+    return "media"
+
+
+def _generate_alert_date(idx: int) -> str:
+    """Genera una fecha reciente para la alerta"""
+    # Genera fechas recientes (últimos 5 días)
+    days_ago = idx % 5
+    hours = random.randint(7, 20)
+    minutes = random.randint(0, 59)
+    alert_date = datetime.now() - timedelta(days=days_ago, hours=hours, minutes=minutes)
+    return alert_date.strftime("%Y-%m-%d %H:%M")
+
+
+def _get_default_alert_state(severidad: str) -> str:
+    """Determina el estado inicial basado en la severidad"""
+    if severidad == "critica":
+        return "pendiente"
+    elif severidad == "alta":
+        return random.choice(["pendiente", "revisada"])
+    else:
+        return random.choice(["revisada", "resuelta"])
+
+
+def alert_key(valvula: str, nivel: str, tipo: str, ocurrencia: int) -> str:
+    """
+    Clave estable de una alerta para el backend de estados
+
+    Alertas_Puntos.csv no tiene id ni período: la alerta se identifica por
+    válvula, nivel y tipo, más el número de ocurrencia de esa combinación en
+    el archivo (0 para la primera). No depende de la posición de la fila, así
+    que un CSV regenerado con otro orden o con alertas nuevas conserva los
+    estados de las que siguen.
+    """
+    return f"{valvula}|{nivel.upper()}|{tipo}|{ocurrencia}"
+
+
+def _date_sort_key(fecha: str, alert_id: int) -> Tuple[int, int]:
+    """Clave de orden por fecha descendente (a igual fecha, por id)"""
+    timestamp = datetime.strptime(fecha, "%Y-%m-%d %H:%M").timestamp()
+    return (-int(timestamp), alert_id)
+
+
+@dataclass
+class AlertIndex:
+    """Alertas de una versión de datos con sus índices"""
+    version: int
+    alerts: Dict[int, Alert] = field(default_factory=dict)
+    by_valve: Dict[str, List[int]] = field(default_factory=dict)
+    by_nivel: Dict[str, List[int]] = field(default_factory=dict)
+    by_severity: Dict[str, List[int]] = field(default_factory=dict)
+    by_type: Dict[str, List[int]] = field(default_factory=dict)
+    by_state: Dict[str, Set[int]] = field(default_factory=dict)
+    # Ids en orden ascendente (orden del archivo)
+    by_id: List[int] = field(default_factory=list)
+    # Ids ordenados por fecha, más recientes primero, y su clave de orden (ascendente)
+    by_date: List[int] = field(default_factory=list)
+    date_keys: List[Tuple[int, int]] = field(default_factory=list)
+    # Clave estable de cada alerta en el backend de estados (ver alert_key) y su inversa
+    keys: Dict[int, str] = field(default_factory=dict)
+    ids_by_key: Dict[str, int] = field(default_factory=dict)
+    # Token del backend de estados con el que se sincronizó by_state
+    state_token: Hashable = None
+
+
+class AlertStore:
+    """
+    Alertas enriquecidas e indexadas, reconstruidas cuando cambia data_version
+
+    Los estados asignados (por defecto o por el usuario) viven en el backend de
+    estados, indexados por la clave estable de la alerta (alert_key), y se
+    conservan entre reconstrucciones y entre versiones del CSV.
+
+    Args:
+        states: Backend de estados (por defecto el de settings.ALERT_STATE_BACKEND,
+            creado en el primer uso)
+    """
+
+    def __init__(self, states: Optional[AlertStateBackend] = None):
+        self._index: Optional[AlertIndex] = None
+        self._states = states
+        self._lock = threading.Lock()
+        self._states_lock = threading.Lock()
+
+    @property
+    def states(self) -> AlertStateBackend:
+        """Backend de estados de las alertas"""
+        if self._states is None:
+            with self._states_lock:
+                if self._states is None:
+                    self._states = create_state_backend()
+        return self._states
+
+    def filter(
+        self,
+        nivel: Optional[str] = None,
+        valvula: Optional[str] = None,
+        estado: Optional[str] = None,
+        tipo: Optional[str] = None,
+        severidad: Optional[str] = None
+    ) -> List[Alert]:
+        """Alertas que cumplen todos los filtros indicados, en el orden del archivo"""
+        index = self._current()
+        ids = self._matching_ids(index, nivel, valvula, estado, tipo, severidad)
+        if ids is None:
+            return list(index.alerts.values())
+        return [index.alerts[alert_id] for alert_id in sorted(ids)]
+
+    def page(
+        self,
+        limit: int,
+        after: Optional[Any] = None,
+        orden: str = "id",
+        nivel: Optional[str] = None,
+        valvula: Optional[str] = None,
+        estado: Optional[str] = None,
+        tipo: Optional[str] = None,
+        severidad: Optional[str] = None
+    ) -> Tuple[List[Alert], int, Optional[Any]]:
+        """
+        Una página de alertas filtradas, en orden de id o de fecha (más recientes primero)
+
+        Solo se arman las alertas de la página; el total sale del tamaño de los índices.
+
+        Args:
+            limit: Alertas por página
+            after: Clave de la última alerta de la página anterior (id, o [fecha, id]
+                si orden="fecha"); None para la primera página
+            orden: "id" o "fecha"
+
+        Returns:
+            tuple: (alertas de la página, total que cumple los filtros, clave de la
+            última alerta si hay más páginas o None)
+        """
+        index = self._current()
+        ids = self._matching_ids(index, nivel, valvula, estado, tipo, severidad)
+        total = len(index.alerts) if ids is None else len(ids)
+
+        if orden == "fecha":
+            start = bisect.bisect_right(index.date_keys, _date_sort_key(*after)) if after else 0
+            page_ids = []
+            for alert_id in itertools.islice(index.by_date, start, None):
+                if ids is None or alert_id in ids:
+                    page_ids.append(alert_id)
+                    if len(page_ids) > limit:
+                        break
+        else:
+            ordered = index.by_id if ids is None else sorted(ids)
+            start = bisect.bisect_right(ordered, after) if after is not None else 0
+            page_ids = ordered[start:start + limit + 1]
+
+        # Se pide una alerta de más para saber si hay otra página
+        alerts = [index.alerts[alert_id] for alert_id in page_ids[:limit]]
+        next_key = None
+        if len(page_ids) > limit:
+            last = alerts[-1]
+            next_key = [last.fecha, last.id] if orden == "fecha" else last.id
+        return alerts, total, next_key
+
+    def get(self, alert_id: int) -> Optional[Alert]:
+        """Alerta por id"""
+        return self._current().alerts.get(alert_id)
+
+    def recent(self, limit: int) -> Tuple[List[Alert], int]:
+        """Alertas más recientes primero y el total de alertas"""
+        index = self._current()
+        return [index.alerts[alert_id] for alert_id in index.by_date[:limit]], len(index.alerts)
+
+    def stats(self) -> Dict[str, int]:
+        """Conteo total, por estado y por severidad"""
+        index = self._current()
+        return {
+            "total": len(index.alerts),
+            **{f"{estado}s": len(index.by_state.get(estado, ())) for estado in ALERT_STATES},
+            **{f"{severidad}s": len(index.by_severity.get(severidad, ())) for severidad in SEVERITIES},
+        }
+
+    def update_state(self, alert_id: int, estado: str) -> Optional[Alert]:
+        """
+        Cambia el estado de una alerta (solo se modifica ese registro y el índice por estado)
+
+        Returns:
+            Alert: La alerta actualizada, o None si no existe
+        """
+        updated, _ = self.update_states({alert_id: estado})
+        return updated[0] if updated else None
+
+    def update_states(self, states: Mapping[int, str]) -> Tuple[List[Alert], List[int]]:
+        """
+        Cambia el estado de varias alertas con una sola escritura en el backend
+
+        Returns:
+            tuple: (alertas actualizadas, ids que no existen)
+        """
+        index = self._current()
+        found = {alert_id: estado for alert_id, estado in states.items() if alert_id in index.alerts}
+        missing = [alert_id for alert_id in states if alert_id not in index.alerts]
+
+        self.states.set_many({index.keys[alert_id]: estado for alert_id, estado in found.items()})
+        with self._lock:
+            updated = [self._apply_state(index, alert_id, estado) for alert_id, estado in found.items()]
+        return updated, missing
+
+    def clear(self):
+        """Descarta el índice (se reconstruye en la próxima lectura)"""
+        with self._lock:
+            self._index = None
+
+    @staticmethod
+    def _matching_ids(
+        index: AlertIndex,
+        nivel: Optional[str],
+        valvula: Optional[str],
+        estado: Optional[str],
+        tipo: Optional[str],
+        severidad: Optional[str]
+    ) -> Optional[Set[int]]:
+        """Ids que cumplen los filtros (intersección de índices), o None si no hay filtros"""
+        candidates = []
+        for lookup, value in (
+            (index.by_nivel, nivel.upper() if nivel else None),
+            (index.by_valve, valvula),
+            (index.by_state, estado),
+            (index.by_type, tipo),
+            (index.by_severity, severidad),
+        ):
+            if value:
+                candidates.append(lookup.get(value, ()))
+
+        if not candidates:
+            return None
+
+        # Intersección empezando por el índice más chico
+        candidates.sort(key=len)
+        ids = set(candidates[0])
+        for other in candidates[1:]:
+            ids.intersection_update(other)
+        return ids
+
+    def _current(self) -> AlertIndex:
+        """Índice de la versión de datos actual, reconstruyéndolo si cambió"""
+        # Detectar cambios en los CSVs sin leer el DataFrame (lo que sí copiaría load_alertas)
+        data_loader.check_sources()
+        version = data_loader.data_version
+
+        index = self._index
+        if index is None or index.version != version:
+            with self._lock:
+                if self._index is None or self._index.version != version:
+                    # Solo al reconstruir se lee el CSV; la versión se toma antes de cargarlo
+                    self._index = self._build(data_loader.load_alertas(), version)
+                index = self._index
+
+        # Estados cambiados por otro worker (o por este, desde la última sincronización)
+        token = self.states.token()
+        if index.state_token != token:
+            states = self.states.get_all()
+            with self._lock:
+                for key, estado in states.items():
+                    alert_id = index.ids_by_key.get(key)
+                    if alert_id is not None:
+                        self._apply_state(index, alert_id, estado)
+                index.state_token = token
+
+        return index
+
+    def _build(self, alertas_df: pd.DataFrame, version: int) -> AlertIndex:
+        """Enriquece las alertas del CSV y arma los índices"""
+        index = AlertIndex(version=version, state_token=self.states.token())
+        rows = list(zip(alertas_df.index, alertas_df.to_dict("records")))
+
+        ocurrencias: Dict[Tuple[str, str, str], int] = {}
+        for idx, row in rows:
+            indice_val = row.get('INDICE_PERDIDAS_%', 0)
+            identity = (
+                str(row['VALVULA']),
+                str(row['NIVEL']),
+                _determine_alert_type(str(row['NIVEL']), float(indice_val) if pd.notna(indice_val) else 0)
+            )
+            key = alert_key(*identity, ocurrencias.get(identity, 0))
+            ocurrencias[identity] = ocurrencias.get(identity, 0) + 1
+            index.keys[idx + 1] = key
+            index.ids_by_key[key] = idx + 1
+
+        # Estado inicial de las alertas nuevas; si otro worker ya lo asignó, se usa el suyo
+        estados = self.states.setdefault_many({
+            index.keys[idx + 1]: _get_default_alert_state(_normalize_severity(str(row['NIVEL'])))
+            for idx, row in rows
+        })
+
+        for idx, row in rows:
+            alert = self._build_alert(idx, row, estados[index.keys[idx + 1]])
+            alert_id = alert.id
+            index.alerts[alert_id] = alert
+            index.by_valve.setdefault(alert.valvula, []).append(alert_id)
+            if pd.notna(row['NIVEL']):
+                index.by_nivel.setdefault(str(row['NIVEL']).upper(), []).append(alert_id)
+            index.by_severity.setdefault(alert.severidad, []).append(alert_id)
+            index.by_type.setdefault(alert.tipo, []).append(alert_id)
+            index.by_state.setdefault(alert.estado, set()).add(alert_id)
+
+        index.by_id = sorted(index.alerts)
+
+        # Orden estable: a igual fecha se conserva el orden del archivo
+        index.date_keys = sorted(
+            _date_sort_key(alert.fecha, alert_id) for alert_id, alert in index.alerts.items()
+        )
+        index.by_date = [alert_id for _, alert_id in index.date_keys]
+        return index
+
+    @staticmethod
+    def _apply_state(index: AlertIndex, alert_id: int, estado: str) -> Alert:
+        """Cambia el estado de una alerta en el índice (registro + índice por estado)"""
+        alert = index.alerts[alert_id]
+        if alert.estado == estado:
+            return alert
+
+        index.by_state.get(alert.estado, set()).discard(alert_id)
+        index.by_state.setdefault(estado, set()).add(alert_id)
+        updated = alert.model_copy(update={"estado": estado})
+        index.alerts[alert_id] = updated
+        return updated
+
+    def _build_alert(self, idx: int, row: Dict, estado: str) -> Alert:
+        """Alerta enriquecida a partir de una fila de Alertas_Puntos.csv"""
+        alert_id = idx + 1
+        valvula_id = str(row['VALVULA'])
+        nivel_raw = str(row['NIVEL'])
+        mensajes = str(row['MENSAJES'])
+        indice_val = row.get('INDICE_PERDIDAS_%', 0)
+        entrada_val = row.get('ENTRADA_PROMEDIO', None)
+
+        # Normalizar severidad
+        severidad_norm = _normalize_severity(nivel_raw)
+
+        # Determinar tipo de alerta
+        tipo_alert = _determine_alert_type(nivel_raw, float(indice_val) if pd.notna(indice_val) else 0)
+
+        # Generar fecha
+        fecha_str = _generate_alert_date(idx)
+
+        # Obtener ubicación
+        ubicacion = VALVE_SECTORS.get(valvula_id, "Sector Desconocido")
+
+        # Generar descripción
+        descripcion = _generate_alert_description(nivel_raw, mensajes, float(indice_val) if pd.notna(indice_val) else 0)
+
+        # Calcular volumen perdido estimado (si tenemos entrada promedio)
+        volumen_perdido = None
+        if entrada_val is not None and pd.notna(entrada_val) and pd.notna(indice_val):
+            volumen_perdido = abs(float(entrada_val) * float(indice_val) / 100)
+
+        return Alert(
+            id=alert_id,
+            fecha=fecha_str,
+            valvula=valvula_id,
+            ubicacion=ubicacion,
+            tipo=tipo_alert,
+            severidad=severidad_norm,
+            descripcion=descripcion,
+            estado=estado,
+            metricas=AlertMetrics(
+                indice_perdidas=round(abs(float(indice_val)), 2) if pd.notna(indice_val) else None,
+                entrada_promedio=round(float(entrada_val), 2) if entrada_val is not None and pd.notna(entrada_val) else None,
+                volumen_perdido=round(volumen_perdido, 2) if volumen_perdido else None,
+                umbral=12.0 if severidad_norm in ["critica", "alta"] else None
+            )
+        )
+
+
+# Instancia global del almacén de alertas
+alert_store = AlertStore()
@@ -1,9 +1,87 @@
 """Servicio para cargar y procesar CSVs de BALANC-IA"""
+import contextvars
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Iterator, Optional, Dict, List, Sequence, Tuple
 from app.config import settings
+from app.services import encodings, snapshots
+from app.services.datasets import DATASETS, DatasetSchema, FLOAT, TEXT, get_schema
+
+
+# En pandas 3 Copy-on-Write es el único comportamiento (la opción está deprecada y no tiene efecto)
+_COW_BY_DEFAULT = int(pd.__version__.split('.')[0]) >= 3
+
+
+def enable_copy_on_write():
+    """
+    Activa Copy-on-Write en pandas 2.x para todo el proceso.
+    
+    El modo readonly depende de CoW: con él, las copias superficiales no pueden
+    modificar los buffers del caché. Es una opción global de pandas, así que se
+    activa una sola vez al iniciar la aplicación (app.main), no al crear un DataLoader.
+    """
+    if not _COW_BY_DEFAULT:
+        pd.set_option('mode.copy_on_write', True)
+
+
+@contextmanager
+def copy_on_write() -> Iterator[None]:
+    """Copy-on-Write activo solo dentro del bloque (tests del modo readonly)"""
+    if _COW_BY_DEFAULT:
+        yield
+        return
+    with pd.option_context('mode.copy_on_write', True):
+        yield
+
+
+# Instantánea de datos de un request compuesto (POST /api/batch): cache_key -> CacheEntry.
+# Se propaga a las tareas y a los hilos del threadpool que lanza el request.
+_request_snapshot: contextvars.ContextVar[Optional[Dict[str, "CacheEntry"]]] = contextvars.ContextVar(
+    "request_snapshot", default=None
+)
+
+
+@dataclass(frozen=True)
+class SourceState:
+    """Estado del archivo fuente de un dataset al momento de cargarlo"""
+    mtime: float
+    size: int
+    sha256: str
+
+
+@dataclass
+class KnownSource:
+    """Último estado visto del archivo fuente de un dataset (esté o no en el caché)"""
+    source: Path
+    state: SourceState
+    checked_at: float
+
+
+@dataclass
+class CacheEntry:
+    """DataFrame cacheado junto con la versión del archivo del que se cargó"""
+    df: pd.DataFrame
+    source: Path
+    relative_path: str
+    state: SourceState
+    version: int
+    loaded_at: float
+    checked_at: float
+    fingerprint: Optional[int] = None
+    # Columnas de partición -> valores -> posiciones de las filas en df (ver DatasetSchema.partitions)
+    partitions: Dict[Tuple[str, ...], Dict[Tuple, np.ndarray]] = field(default_factory=dict)
+    # Memoria (deep) del frame y sus particiones: peso de la entrada en el presupuesto LRU
+    size_bytes: int = 0
+    ttl: Optional[float] = None
+    pinned: bool = False
 
 
 class DataLoader:
@@ -12,9 +90,45 @@ class DataLoader:
     Centraliza el acceso a datos y maneja errores de lectura.
     """
     
-    def __init__(self):
+    def __init__(self, readonly: Optional[bool] = None):
+        """
+        Args:
+            readonly: Si es True, los load_* devuelven vistas de solo lectura del caché
+                      en lugar de copias profundas (por defecto settings.READONLY_CACHE).
+                      Requiere Copy-on-Write activo (ver enable_copy_on_write)
+        """
         self.data_path = settings.DATA_PATH
-        self._cache: Dict[str, pd.DataFrame] = {}
+        self.readonly = settings.READONLY_CACHE if readonly is None else readonly
+        # Orden de inserción = orden LRU (la entrada menos usada primero)
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._max_bytes = int(settings.CACHE_MAX_MB * 1024 * 1024)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._source_states: Dict[str, SourceState] = {}
+        self._data_version = 0
+        # Último estado visto del archivo de cada dataset (sobrevive a desalojos y vencimientos de TTL)
+        self._known_sources: Dict[str, KnownSource] = {}
+        # Protege _cache (incluido el orden LRU), sus contadores y _data_version
+        self._version_lock = threading.Lock()
+        
+        # Carga single-flight: una sola lectura por dataset, los demás hilos esperan su Future
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
+        # Recargas en segundo plano: mientras se recarga se sigue sirviendo la versión anterior
+        self._reload_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="data-reload")
+        self._reloading: set = set()
+        self._reload_lock = threading.Lock()
+        
+        # Encodings detectados por hash de archivo (sidecar .encodings.json en DATA_PATH)
+        self._encodings: Optional[encodings.EncodingManifest] = None
+        
+        # Precarga de datasets (warm_up): "pendiente" -> "precargando" -> "listo"
+        self._warmup_state = "pendiente"
+        self._warmup_seconds: Optional[float] = None
+        self._warmup_report: Dict[str, Dict] = {}
     
     # ==================== MÉTODOS PRINCIPALES ====================
     
@@ -26,29 +140,8 @@ class DataLoader:
         Columnas: PUNTO, PERIODO, AÑO, MES, FECHA, ENTRADA_m3, SALIDA_m3, 
                   PERDIDAS_m3, INDICE_PERDIDAS_%, ES_PRONOSTICO
         """
-        cache_key = "balances_virtuales"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Tabla_Balances_Virtuales.csv")
-        
-        # Limpiar nombres de columnas
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir tipos
-        if 'FECHA' in df.columns:
-            df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
-        
-        # Convertir columnas numéricas (están con comas)
-        numeric_cols = ['ENTRADA_M3', 'SALIDA_M3', 'PERDIDAS_M3', 'INDICE_PERDIDAS_%']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("balances_virtuales", use_cache)
+
     def load_pronosticos(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga pronósticos de modelos (Prophet, LGBM, RF, CatBoost, LSTM, Hybrid)
@@ -57,27 +150,8 @@ class DataLoader:
         Columnas: VALVULA, PERIODO, FECHA, PRED_ENTRADA_*, PRED_SALIDA, 
                   PRED_PERDIDAS, PRED_INDICE_PERDIDAS
         """
-        cache_key = "pronosticos"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Pronosticos.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir fecha
-        if 'FECHA' in df.columns:
-            df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
-        
-        # Convertir columnas numéricas
-        numeric_cols = [col for col in df.columns if 'PRED_' in col or col == 'PERIODO']
-        for col in numeric_cols:
-            if col in df.columns and col != 'PERIODO':
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("pronosticos", use_cache)
+
     def load_metrics(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga métricas de performance de modelos
@@ -85,23 +159,8 @@ class DataLoader:
         
         Columnas: VALVULA, MODELO, MAE, RMSE, MAPE, MASE, N_TEST
         """
-        cache_key = "metrics"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Metrics.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir métricas a float
-        metric_cols = ['MAE', 'RMSE', 'MAPE', 'MASE']
-        for col in metric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("metrics", use_cache)
+
     def load_resumen_valvulas(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga resumen agregado por válvula
@@ -110,28 +169,8 @@ class DataLoader:
         Columnas: VALVULA, FECHA_min, FECHA_max, VOLUMEN_ENTRADA_FINAL_sum,
                   VOLUMEN_SALIDA_FINAL_sum, INDICE_PERDIDAS_FINAL_mean, etc.
         """
-        cache_key = "resumen_valvulas"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Resumen_Valvulas.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir fechas
-        for col in ['FECHA_MIN', 'FECHA_MAX']:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-        
-        # Convertir columnas numéricas
-        numeric_cols = [col for col in df.columns if any(x in col for x in ['VOLUMEN', 'INDICE', 'SUM', 'MEAN'])]
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("resumen_valvulas", use_cache)
+
     # ==================== DASHBOARD DATA ====================
     
     def load_alertas(self, use_cache: bool = True) -> pd.DataFrame:
@@ -141,23 +180,8 @@ class DataLoader:
         
         Columnas: VALVULA, NIVEL, MENSAJES, INDICE_PERDIDAS_%, ENTRADA_PROMEDIO
         """
-        cache_key = "alertas"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("dashboard/Alertas_Puntos.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir columnas numéricas
-        numeric_cols = ['INDICE_PERDIDAS_%', 'ENTRADA_PROMEDIO']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("alertas", use_cache)
+
     def load_top_desbalances(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga top de desbalances por válvula
@@ -166,47 +190,15 @@ class DataLoader:
         Columnas: VALVULA, PERDIDAS_PROMEDIO_m3, INDICE_PERDIDAS_%, 
                   ENTRADA_PROMEDIO_m3, SALIDA_PROMEDIO_m3, NUM_PERIODOS, PERDIDAS_ABS
         """
-        cache_key = "top_desbalances"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("dashboard/Top_Desbalances.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir columnas numéricas
-        numeric_cols = [col for col in df.columns if col != 'VALVULA' and col != 'NUM_PERIODOS']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("top_desbalances", use_cache)
+
     def load_top_indice_perdidas(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga top 10 de índices de pérdidas
         Archivo: dashboard/Top10_Indice_Perdidas.csv
         """
-        cache_key = "top_indice"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("dashboard/Top10_Indice_Perdidas.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir columnas numéricas
-        for col in df.columns:
-            if col != 'VALVULA' and col != 'PUNTO':
-                df[col] = pd.to_numeric(
-                    df[col].astype(str).str.replace(',', '.'), 
-                    errors='coerce'
-                )
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("top_indice", use_cache)
+
     # ==================== EDA DATA ====================
     
     def load_correlations(self, use_cache: bool = True) -> pd.DataFrame:
@@ -216,47 +208,382 @@ class DataLoader:
         
         Matriz NxN con correlaciones entre variables
         """
-        cache_key = "correlations"
+        return self._load("correlations", use_cache)
+
+    def load_estadisticas_descriptivas(self, use_cache: bool = True) -> pd.DataFrame:
+        """
+        Carga estadísticas descriptivas
+        Archivo: eda/Estadisticas_Descriptivas.csv
+        """
+        return self._load("estadisticas", use_cache)
+
+    # ==================== ACCESO POR PARTICIÓN ====================
+    
+    def balances_for(self, valvula: str) -> pd.DataFrame:
+        """
+        Balances virtuales de una válvula
+        
+        Args:
+            valvula: ID de la válvula (columna PUNTO)
+        """
+        return self._partition("balances_virtuales", PUNTO=valvula)
+    
+    def metrics_for(self, valvula: Optional[str] = None, modelo: Optional[str] = None) -> pd.DataFrame:
+        """
+        Métricas de una válvula, de un modelo o de la combinación válvula + modelo.
+        Sin argumentos devuelve todas las métricas.
+        """
+        filters = {}
+        if valvula is not None:
+            filters["VALVULA"] = valvula
+        if modelo is not None:
+            filters["MODELO"] = modelo
+        
+        if not filters:
+            return self.load_metrics()
+        return self._partition("metrics", **filters)
+    
+    def pronosticos_for(self, valvula: str) -> pd.DataFrame:
+        """Pronósticos de una válvula"""
+        return self._partition("pronosticos", VALVULA=valvula)
+    
+    def alertas_for(self, valvula: str) -> pd.DataFrame:
+        """Alertas de una válvula"""
+        return self._partition("alertas", VALVULA=valvula)
+    
+    def predicciones_for(self, valvula: str) -> pd.DataFrame:
+        """Predicciones con balance de una válvula"""
+        return self._partition("predicciones_con_balance", VALVULA=valvula)
+    
+    def dataset_maestro_for(
+        self, valvula: Optional[str] = None, columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Dataset maestro de una válvula (de todas si valvula es None)
+        
+        Args:
+            valvula: ID de la válvula
+            columns: Solo estas columnas (se copian solo ellas, no el frame completo)
+        """
+        filters = {"VALVULA": valvula} if valvula is not None else {}
+        return self._partition("dataset_maestro", columns, **filters)
+    
+    def dataset_train_for(self, valvula: str) -> pd.DataFrame:
+        """Dataset de entrenamiento de una válvula"""
+        return self._partition("dataset_train", VALVULA=valvula)
+    
+    def _partition(self, cache_key: str, columns: Optional[Sequence[str]] = None, **filters) -> pd.DataFrame:
+        """
+        Filas de un dataset que cumplen `columna == valor` para cada filtro,
+        resueltas con el índice de particiones (sin recorrer el DataFrame).
+        Las filas se toman del frame cacheado en el momento (take por posición).
         
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
+        Args:
+            cache_key: Clave del dataset
+            columns: Solo estas columnas, en este orden (por defecto todas)
+            **filters: Columna -> valor; la combinación debe estar declarada en DatasetSchema.partitions.
+                       Sin filtros se devuelven todas las filas
+        """
+        entry = self._entry(cache_key)
+        selected = slice(None) if columns is None else self._column_positions(entry.df, columns)
         
-        df = self._read_csv("eda/Matriz_Correlacion.csv", index_col=0)
+        if not filters:
+            if columns is None:
+                return self._view(entry.df)
+            # La selección por posición ya arma un frame propio con esas columnas
+            return entry.df.iloc[:, selected]
         
-        # Convertir todo a float
-        for col in df.columns:
-            df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
+        partition = next(
+            (cols for cols in entry.partitions if set(cols) == set(filters)), None
+        )
+        if partition is None:
+            raise KeyError(f"{cache_key} no está particionado por {tuple(filters)}")
         
-        self._cache[cache_key] = df
-        return df.copy()
+        values = tuple(filters[col] for col in partition)
+        positions = entry.partitions[partition].get(values)
+        if positions is None:
+            # Sin filas para esa combinación: frame vacío con las mismas columnas
+            return self._view(entry.df.iloc[0:0, selected])
+        
+        # La selección por posiciones (take) ya devuelve un frame propio: no hace falta la copia de _view
+        return entry.df.iloc[positions, selected]
     
-    def load_estadisticas_descriptivas(self, use_cache: bool = True) -> pd.DataFrame:
+    @staticmethod
+    def _column_positions(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+        """Posiciones de las columnas pedidas (pueden repetirse); KeyError si alguna no existe"""
+        positions = df.columns.get_indexer(list(columns))
+        if (positions < 0).any():
+            missing = [col for col, pos in zip(columns, positions) if pos < 0]
+            raise KeyError(f"Columnas no encontradas: {missing}")
+        return positions
+    
+    def get_columns(self, cache_key: str) -> List[str]:
+        """Columnas de un dataset (de la entrada del caché, sin copiar el frame)"""
+        return self._entry(cache_key).df.columns.tolist()
+    
+    def shared_partitions(self, cache_key: str, column: str) -> Tuple[pd.DataFrame, Dict[str, np.ndarray]]:
         """
-        Carga estadísticas descriptivas
-        Archivo: eda/Estadisticas_Descriptivas.csv
+        Todas las particiones de un dataset por una columna, sin copiar
+        
+        Devuelve el mismo frame del caché (no pasa por _view) y las posiciones
+        de las filas de cada valor, ambos de la misma entrada y por lo tanto de
+        la misma versión de los datos. Son de solo lectura: para consumidores
+        que solo serializan, como la exportación por streaming, y que toman las
+        filas de a un grupo por vez.
+        
+        Args:
+            cache_key: Clave del dataset
+            column: Columna de partición declarada en DatasetSchema.partitions
+        
+        Returns:
+            tuple: (DataFrame completo cacheado, valor de la columna -> posiciones de sus filas)
+        """
+        entry = self._entry(cache_key)
+        groups = entry.partitions.get((column,))
+        if groups is None:
+            raise KeyError(f"{cache_key} no está particionado por {column}")
+        return entry.df, {str(key[0]): positions for key, positions in groups.items()}
+    
+    @staticmethod
+    def _build_partitions(
+        df: pd.DataFrame, partitions: Tuple[Tuple[str, ...], ...]
+    ) -> Dict[Tuple[str, ...], Dict[Tuple, np.ndarray]]:
+        """
+        Agrupa el DataFrame una vez por cada combinación de columnas declarada.
+        Cada grupo guarda solo las posiciones de sus filas (en el orden original),
+        no una copia de las filas: df.take(posiciones) las arma al consultarlo.
+        """
+        index = {}
+        for columns in partitions:
+            groups = df.groupby(list(columns), sort=False, observed=True).indices
+            index[columns] = {
+                key if isinstance(key, tuple) else (key,): positions
+                for key, positions in groups.items()
+            }
+        return index
+    
+    # ==================== PRECARGA ====================
+    
+    def warm_up(self, max_workers: Optional[int] = None) -> Dict[str, Dict]:
         """
-        cache_key = "estadisticas"
+        Precarga en paralelo todos los datasets registrados en app.services.datasets
         
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
+        Args:
+            max_workers: Hilos de carga (por defecto settings.WARMUP_WORKERS)
         
-        df = self._read_csv("eda/Estadisticas_Descriptivas.csv", index_col=0)
+        Returns:
+            dict: Clave del dataset -> tiempo de carga, filas y memoria (o el error)
+        """
+        self._warmup_state = "precargando"
+        start = time.perf_counter()
         
-        # Convertir a float
-        for col in df.columns:
-            df[col] = pd.to_numeric(
-                df[col].astype(str).str.replace(',', '.'), 
-                errors='coerce'
-            )
+        report = {}
+        workers = max_workers or settings.WARMUP_WORKERS
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="data-warmup") as pool:
+            futures = {pool.submit(self._warm_dataset, key): key for key in DATASETS}
+            for future in as_completed(futures):
+                report[futures[future]] = future.result()
         
-        self._cache[cache_key] = df
-        return df.copy()
+        self._warmup_report = {key: report[key] for key in DATASETS}
+        self._warmup_seconds = time.perf_counter() - start
+        self._warmup_state = "listo"
+        
+        return self._warmup_report
+    
+    def _warm_dataset(self, cache_key: str) -> Dict:
+        """Carga un dataset en el caché y mide tiempo y memoria"""
+        schema = get_schema(cache_key)
+        start = time.perf_counter()
+        
+        try:
+            entry = self._entry(cache_key)
+        except Exception as e:
+            return {"source": schema.path, "status": "ERROR", "error": str(e)}
+        
+        return {
+            "source": schema.path,
+            "status": "OK",
+            "seconds": round(time.perf_counter() - start, 4),
+            "rows": len(entry.df),
+            "memory_bytes": int(entry.df.memory_usage(deep=True).sum()),
+        }
+    
+    @property
+    def is_warm(self) -> bool:
+        """La precarga terminó (con o sin errores en datasets individuales)"""
+        return self._warmup_state == "listo"
+    
+    def get_warmup_info(self) -> Dict:
+        """Estado de la precarga y reporte por dataset"""
+        return {
+            "estado": self._warmup_state,
+            "segundos": round(self._warmup_seconds, 4) if self._warmup_seconds is not None else None,
+            "datasets": self._warmup_report,
+        }
     
     # ==================== UTILITY METHODS ====================
     
+    def _load(self, cache_key: str, use_cache: bool = True) -> pd.DataFrame:
+        """
+        Carga un dataset registrado en app.services.datasets
+        
+        Args:
+            cache_key: Clave del dataset en el registro (y en el caché)
+            use_cache: Si es False, vuelve a leer el archivo aunque esté cacheado
+        """
+        return self._view(self._entry(cache_key, use_cache).df)
+    
+    @contextmanager
+    def snapshot(self) -> Iterator[Dict[str, CacheEntry]]:
+        """
+        Instantánea memoizada de los datasets durante un bloque
+        
+        Dentro del bloque (y en las tareas e hilos que lance) cada dataset se
+        resuelve una sola vez: las lecturas siguientes reutilizan la misma entrada
+        sin verificar el archivo fuente ni tocar el LRU, y todas ven la misma
+        versión de los datos aunque un CSV cambie a mitad del bloque.
+        """
+        token = _request_snapshot.set({})
+        try:
+            yield _request_snapshot.get()
+        finally:
+            _request_snapshot.reset(token)
+    
+    def _entry(self, cache_key: str, use_cache: bool = True) -> CacheEntry:
+        """Entrada del caché de un dataset registrado, cargándolo si hace falta"""
+        snapshot = _request_snapshot.get()
+        if snapshot is None or not use_cache:
+            return self._cached_entry(cache_key, use_cache)
+        
+        entry = snapshot.get(cache_key)
+        if entry is None:
+            entry = snapshot.setdefault(cache_key, self._cached_entry(cache_key))
+        return entry
+    
+    def _cached_entry(self, cache_key: str, use_cache: bool = True) -> CacheEntry:
+        """Entrada del caché compartido (TTL, LRU y verificación del archivo fuente)"""
+        if use_cache:
+            entry = self._cache.get(cache_key)
+            
+            if entry is not None and entry.ttl is not None and time.monotonic() - entry.loaded_at > entry.ttl:
+                # TTL vencido: recargar ahora (los hilos concurrentes comparten la recarga)
+                with self._version_lock:
+                    self._expirations += 1
+                    self._misses += 1
+                return self._load_once(cache_key, use_cache=False)
+            
+            if entry is not None:
+                with self._version_lock:
+                    self._hits += 1
+                    if cache_key in self._cache:
+                        self._cache.move_to_end(cache_key)
+                return self._from_cache(cache_key, entry)
+            
+            with self._version_lock:
+                self._misses += 1
+        
+        return self._load_once(cache_key, use_cache)
+    
+    def _load_once(self, cache_key: str, use_cache: bool = True) -> CacheEntry:
+        """
+        Carga single-flight: el primer hilo lee el archivo y los que llegan mientras
+        tanto esperan el mismo Future en lugar de volver a parsearlo.
+        """
+        with self._inflight_lock:
+            # Otro hilo pudo terminar la carga entre la consulta al caché y este punto
+            entry = self._cache.get(cache_key) if use_cache else None
+            if entry is not None:
+                return entry
+            
+            future = self._inflight.get(cache_key)
+            owner = future is None
+            if owner:
+                future = self._inflight[cache_key] = Future()
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            schema = get_schema(cache_key)
+            entry = self._store(cache_key, self._read_dataset(schema), schema.path)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            # Los hilos en espera reciben el mismo error; el siguiente intento vuelve a cargar
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+    
+    def _read_dataset(self, schema: DatasetSchema) -> pd.DataFrame:
+        """Lee un dataset (snapshot o CSV) y le aplica su esquema"""
+        df = self._read_csv(schema.path, **schema.read_csv_kwargs())
+        
+        # Snapshot compilado antes de declarar el esquema (le faltan columnas): usar el CSV
+        if schema.columns and not set(schema.columns).issubset(df.columns):
+            df = self._parse_dataset(schema, self.data_path / schema.path)
+        
+        return self._finalize(schema, df)
+    
+    def _parse_dataset(self, schema: DatasetSchema, file_path: Path) -> pd.DataFrame:
+        """Parsea el CSV de un dataset en una sola pasada (dtypes, decimal y usecols del esquema)"""
+        return self._parse_csv(file_path, schema.path, **schema.read_csv_kwargs())
+    
+    @staticmethod
+    def _finalize(schema: DatasetSchema, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Pasos posteriores al parseo, comunes al CSV y al snapshot:
+        fechas, columnas numéricas forzadas, índice y nombres de columna.
+        """
+        if schema.columns:
+            df = df[list(schema.columns)]
+            # Snapshots genéricos pueden traer otro dtype (ej: int en lugar de float)
+            casts = {
+                col: dtype for col, dtype in schema.parse_dtypes.items()
+                if dtype != TEXT and str(df[col].dtype) != dtype
+            }
+            if casts:
+                df = df.astype(casts)
+        
+        if schema.coerce_numeric:
+            numeric_cols = schema.numeric_columns or [
+                col for i, col in enumerate(df.columns) if i != schema.index_col
+            ]
+            for col in numeric_cols:
+                if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+                    df[col] = df[col].astype(schema.columns.get(col, schema.default_dtype or FLOAT))
+                else:
+                    # Valores no numéricos (ej: "-") quedan como NaN
+                    df[col] = pd.to_numeric(
+                        df[col].astype(str).str.replace(',', '.'), errors='coerce'
+                    )
+        
+        for col in schema.date_columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        
+        # Mediciones en float32 (opcional: reduce la memoria a la mitad a cambio de precisión)
+        if settings.COMPACT_FLOATS:
+            measurements = [col for col, dtype in schema.columns.items() if dtype == FLOAT]
+            if measurements:
+                df = df.astype({col: "float32" for col in measurements})
+        
+        if schema.index_col is not None:
+            df = df.set_index(df.columns[schema.index_col])
+            # pd.read_csv deja sin nombre un índice cuya cabecera está vacía
+            if str(df.index.name).startswith("Unnamed:"):
+                df.index.name = None
+        
+        if schema.normalize_columns:
+            df.columns = df.columns.str.strip().str.upper()
+        
+        return df
+    
     def _read_csv(self, relative_path: str, **kwargs) -> pd.DataFrame:
         """
-        Lee un CSV con manejo de errores y múltiples encodings
+        Lee un CSV con manejo de errores y múltiples encodings.
+        Si existe un snapshot Parquet compilado de este mismo CSV, lo usa en su lugar
+        (y toma el hash del CSV de la metadata del snapshot, sin volver a leerlo).
         
         Args:
             relative_path: Ruta relativa desde DATA_PATH
@@ -270,8 +597,43 @@ class DataLoader:
                 f"Ruta esperada: {relative_path}"
             )
         
-        # Lista de encodings a intentar
-        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252', 'windows-1252']
+        if settings.USE_SNAPSHOTS and snapshots.snapshots_available():
+            source = snapshots.fresh_source(file_path)
+            if source is not None:
+                try:
+                    df = snapshots.read_snapshot(file_path, index_col=kwargs.get('index_col'))
+                except Exception:
+                    # Snapshot corrupto o ilegible: volver al CSV
+                    pass
+                else:
+                    self._source_states[relative_path] = SourceState(**source)
+                    return df
+        
+        # Estado del archivo antes de parsearlo: si cambia durante la lectura se detectará después
+        self._source_states[relative_path] = self._source_state(file_path)
+        return self._parse_csv(file_path, relative_path, **kwargs)
+    
+    def _parse_csv(self, file_path: Path, relative_path: str, **kwargs) -> pd.DataFrame:
+        """
+        Parsea el CSV fuente. El encoding se toma del manifiesto (por hash del archivo)
+        o se detecta sobre un prefijo; los demás encodings quedan solo como respaldo.
+        
+        Args:
+            file_path: Ruta absoluta del CSV
+            relative_path: Ruta relativa desde DATA_PATH (para mensajes de error)
+            **kwargs: Argumentos adicionales para pd.read_csv
+        """
+        sha256 = None
+        known = None
+        if 'encoding' in kwargs:
+            candidates = [kwargs.pop('encoding')]
+        else:
+            state = self._source_states.get(relative_path) or self._source_state(file_path)
+            sha256 = state.sha256
+            known = self._encoding_manifest().get(sha256)
+            first = known or encodings.sniff_encoding(file_path)
+            candidates = [first] if first else []
+            candidates += [e for e in encodings.ENCODINGS if e != first]
         
         # Configuración por defecto
         default_kwargs = {
@@ -282,11 +644,10 @@ class DataLoader:
         
         # Intentar con cada encoding
         last_error = None
-        for encoding in encodings:
+        for encoding in candidates:
             try:
                 default_kwargs['encoding'] = encoding
                 df = pd.read_csv(file_path, **default_kwargs)
-                return df
             except UnicodeDecodeError as e:
                 last_error = e
                 continue
@@ -295,6 +656,10 @@ class DataLoader:
                 raise RuntimeError(
                     f"Error al leer {relative_path}: {str(e)}"
                 )
+            
+            if sha256 is not None and encoding != known:
+                self._encoding_manifest().set(sha256, encoding)
+            return df
         
         # Si ningún encoding funcionó
         raise RuntimeError(
@@ -302,9 +667,301 @@ class DataLoader:
             f"Último error: {str(last_error)}"
         )
     
+    def _encoding_manifest(self) -> encodings.EncodingManifest:
+        """Manifiesto de encodings de la carpeta de datos actual"""
+        path = self.data_path / encodings.MANIFEST_NAME
+        manifest = self._encodings
+        if manifest is None or manifest.path != path:
+            manifest = self._encodings = encodings.EncodingManifest(path)
+        return manifest
+    
+    def _store(self, cache_key: str, df: pd.DataFrame, relative_path: str) -> CacheEntry:
+        """
+        Guarda un DataFrame en el caché y devuelve la entrada creada.
+        
+        La entrada nueva reemplaza a la anterior en una sola asignación (swap), así los
+        lectores concurrentes ven siempre una versión completa. Si el contenido del
+        archivo cambió respecto a la última carga, se incrementa data_version.
+        """
+        schema = DATASETS.get(cache_key)
+        source = self.data_path / relative_path
+        state = self._source_states.pop(relative_path, None) or self._source_state(source)
+        
+        now = time.monotonic()
+        entry = CacheEntry(
+            df=df,
+            source=source,
+            relative_path=relative_path,
+            state=state,
+            version=0,
+            loaded_at=now,
+            checked_at=now,
+            fingerprint=self._fingerprint(df) if self.readonly else None,
+            partitions=self._build_partitions(df, schema.partitions) if schema else {},
+            ttl=schema.ttl if schema else None,
+            pinned=schema.pinned if schema else False
+        )
+        entry.size_bytes = self._deep_size(entry)
+        
+        with self._version_lock:
+            known = self._known_sources.get(cache_key)
+            if known is not None and known.state.sha256 != state.sha256:
+                self._data_version += 1
+            self._known_sources[cache_key] = KnownSource(source=source, state=state, checked_at=now)
+            entry.version = self._data_version
+            self._cache[cache_key] = entry
+            self._cache.move_to_end(cache_key)
+            self._evict(keep=cache_key)
+        
+        return entry
+    
+    def _evict(self, keep: str):
+        """
+        Desaloja entradas no fijadas, de la menos a la más recientemente usada,
+        hasta que el caché quepa en CACHE_MAX_MB (se llama con _version_lock tomado)
+        
+        Args:
+            keep: Entrada recién guardada, que nunca se desaloja
+        """
+        if self._max_bytes <= 0:
+            return
+        
+        used = sum(entry.size_bytes for entry in self._cache.values())
+        for key in list(self._cache):
+            if used <= self._max_bytes:
+                break
+            entry = self._cache[key]
+            if key == keep or entry.pinned:
+                continue
+            del self._cache[key]
+            used -= entry.size_bytes
+            self._evictions += 1
+    
+    def _from_cache(self, cache_key: str, entry: CacheEntry) -> CacheEntry:
+        """
+        Devuelve una entrada del caché. Si su archivo fuente cambió, programa la recarga
+        en segundo plano y sigue sirviendo la versión actual hasta que la nueva esté lista.
+        """
+        now = time.monotonic()
+        if now - entry.checked_at >= settings.CACHE_CHECK_INTERVAL:
+            entry.checked_at = now
+            if self._is_stale(entry):
+                self._schedule_reload(cache_key)
+        
+        return entry
+    
+    def check_sources(self):
+        """
+        Verifica si cambió el archivo fuente de cada dataset conocido (mismo intervalo
+        CACHE_CHECK_INTERVAL que los accesos). Para consumidores que no leen los
+        DataFrames en cada request, como las vistas materializadas y los ETags.
+        
+        Los datasets cacheados se recargan en segundo plano. Los que ya no están en
+        el caché (desalojados o tras clear_cache) no se recargan: se actualiza su
+        estado conocido, así content_version y data_version reflejan el archivo
+        actual y la próxima lectura lo carga.
+        """
+        for cache_key, known in list(self._known_sources.items()):
+            entry = self._cache.get(cache_key)
+            if entry is not None:
+                self._from_cache(cache_key, entry)
+            else:
+                self._check_known_source(cache_key, known)
+    
+    def _check_known_source(self, cache_key: str, known: KnownSource):
+        """Actualiza el estado conocido de un dataset fuera del caché si su archivo cambió"""
+        now = time.monotonic()
+        if now - known.checked_at < settings.CACHE_CHECK_INTERVAL:
+            return
+        known.checked_at = now
+        
+        try:
+            stat = known.source.stat()
+        except OSError:
+            return
+        if stat.st_mtime == known.state.mtime and stat.st_size == known.state.size:
+            return
+        
+        state = self._source_state(known.source)
+        with self._version_lock:
+            # Si mientras tanto se cargó el dataset, _store ya registró su estado
+            if cache_key in self._cache or self._known_sources.get(cache_key) is not known:
+                return
+            if state.sha256 != known.state.sha256:
+                self._data_version += 1
+            self._known_sources[cache_key] = KnownSource(source=known.source, state=state, checked_at=now)
+    
+    def _is_stale(self, entry: CacheEntry) -> bool:
+        """El archivo fuente cambió de contenido desde que se cargó la entrada"""
+        try:
+            stat = entry.source.stat()
+        except OSError:
+            # Si el archivo desapareció se sigue sirviendo la última versión conocida
+            return False
+        
+        if stat.st_mtime == entry.state.mtime and stat.st_size == entry.state.size:
+            return False
+        
+        # mtime/tamaño distintos: confirmar con el hash (un "touch" no invalida el caché)
+        state = self._source_state(entry.source)
+        if state.sha256 == entry.state.sha256:
+            entry.state = state
+            return False
+        
+        return True
+    
+    def _schedule_reload(self, cache_key: str):
+        """Programa la recarga de un dataset (una sola recarga en curso por clave)"""
+        with self._reload_lock:
+            if cache_key in self._reloading:
+                return
+            self._reloading.add(cache_key)
+        
+        self._reload_executor.submit(self._reload, cache_key)
+    
+    def _reload(self, cache_key: str):
+        """Recarga un dataset; si falla se conserva la versión anterior"""
+        try:
+            self._load(cache_key, use_cache=False)
+        except Exception as e:
+            print(f"⚠ Error recargando {cache_key}: {e}")
+        finally:
+            with self._reload_lock:
+                self._reloading.discard(cache_key)
+    
+    @staticmethod
+    def _source_state(file_path: Path) -> SourceState:
+        """mtime, tamaño y hash SHA-256 del archivo fuente"""
+        stat = file_path.stat()
+        return SourceState(mtime=stat.st_mtime, size=stat.st_size, sha256=snapshots.file_sha256(file_path))
+    
+    @property
+    def content_version(self) -> str:
+        """
+        Hash del contenido de los archivos fuente cargados (igual en todos los workers que
+        leyeron los mismos archivos, a diferencia de data_version, que es un contador local).
+        Incluye los datasets desalojados del caché, con el estado que verificó check_sources.
+        """
+        with self._version_lock:
+            hashes = sorted((key, known.state.sha256) for key, known in self._known_sources.items())
+        digest = hashlib.sha256()
+        for cache_key, sha256 in hashes:
+            digest.update(f"{cache_key}={sha256};".encode())
+        return digest.hexdigest()
+    
+    @property
+    def data_version(self) -> int:
+        """
+        Versión de los datos: crece monótonamente cada vez que un dataset se recarga
+        con contenido distinto o se limpia el caché. Útil para invalidar respuestas derivadas.
+        """
+        return self._data_version
+    
+    def get_cache_info(self) -> Dict[str, Dict]:
+        """Metadata de cada dataset cacheado (archivo fuente, mtime, tamaño, hash y versión)"""
+        return {
+            key: {
+                "source": entry.relative_path,
+                "mtime": entry.state.mtime,
+                "size": entry.state.size,
+                "sha256": entry.state.sha256,
+                "version": entry.version,
+            }
+            for key, entry in list(self._cache.items())
+        }
+    
+    def _view(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Devuelve el DataFrame cacheado para un llamador.
+        
+        En modo readonly es una copia superficial: comparte los buffers del caché
+        y, gracias a Copy-on-Write, solo se copia una columna si la ruta la modifica.
+        Fuera de ese modo se mantiene la copia profunda.
+        """
+        if self.readonly:
+            return df.copy(deep=False)
+        return df.copy()
+    
+    def get_memory_usage(self) -> Dict[str, Dict]:
+        """
+        Memoria de cada dataset cacheado (memory_usage(deep=True): incluye los strings)
+        
+        Returns:
+            dict: Clave del dataset -> filas, bytes del frame, bytes de sus particiones y dtypes
+        """
+        usage = {}
+        for key, entry in list(self._cache.items()):
+            memory_bytes = int(entry.df.memory_usage(deep=True).sum())
+            usage[key] = {
+                "source": entry.relative_path,
+                "rows": len(entry.df),
+                "memory_bytes": memory_bytes,
+                "partitions_bytes": entry.size_bytes - memory_bytes,
+                "dtypes": {str(col): str(dtype) for col, dtype in entry.df.dtypes.items()},
+            }
+        return usage
+    
+    def get_cache_stats(self) -> Dict:
+        """Contadores del caché (aciertos, fallos, desalojos, vencimientos) y uso del presupuesto"""
+        now = time.monotonic()
+        with self._version_lock:
+            entries = list(self._cache.items())
+            stats = {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+        
+        requests = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / requests, 4) if requests else None
+        stats["used_bytes"] = sum(entry.size_bytes for _, entry in entries)
+        stats["max_bytes"] = self._max_bytes or None
+        # Orden LRU: el primero es el próximo candidato a desalojo
+        stats["entries"] = [
+            {
+                "dataset": key,
+                "size_bytes": entry.size_bytes,
+                "pinned": entry.pinned,
+                "ttl": entry.ttl,
+                "age_seconds": round(now - entry.loaded_at, 1),
+            }
+            for key, entry in entries
+        ]
+        return stats
+    
+    @staticmethod
+    def _deep_size(entry: CacheEntry) -> int:
+        """Memoria deep del frame de una entrada más la de sus particiones (posiciones)"""
+        size = int(entry.df.memory_usage(deep=True).sum())
+        for groups in entry.partitions.values():
+            for positions in groups.values():
+                size += positions.nbytes
+        return size
+    
+    @staticmethod
+    def _fingerprint(df: pd.DataFrame) -> int:
+        """Hash del contenido de un DataFrame (valores + índice)"""
+        return int(pd.util.hash_pandas_object(df, index=True).sum())
+    
+    def verify_cache_integrity(self) -> List[str]:
+        """
+        Verifica que ninguna ruta haya escrito sobre los frames compartidos del caché.
+        Solo aplica en modo readonly (en modo copia cada llamador recibe su propio frame).
+        
+        Returns:
+            list: Claves del caché cuyo contenido cambió desde que se cargaron
+        """
+        return [
+            key for key, entry in list(self._cache.items())
+            if entry.fingerprint is not None and self._fingerprint(entry.df) != entry.fingerprint
+        ]
+    
     def clear_cache(self):
         """Limpia el caché de DataFrames"""
-        self._cache.clear()
+        with self._version_lock:
+            self._cache.clear()
+            self._data_version += 1
     
     def get_available_valvulas(self) -> List[str]:
         """Obtiene lista de válvulas disponibles"""
@@ -318,10 +975,10 @@ class DataLoader:
     def get_available_periodos(self, valvula: Optional[str] = None) -> List[str]:
         """Obtiene lista de períodos disponibles (opcionalmente filtrado por válvula)"""
         try:
-            df = self.load_balances_virtuales()
-            
             if valvula:
-                df = df[df['PUNTO'] == valvula]
+                df = self.balances_for(valvula)
+            else:
+                df = self.load_balances_virtuales()
             
             return sorted(df['PERIODO'].astype(str).unique().tolist())
         
@@ -335,23 +992,8 @@ class DataLoader:
         
         Columnas: VALVULA, SCORE, NIVEL, MEJOR_MODELO, MAE, MAPE
         """
-        cache_key = "analisis_confiabilidad"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Analisis_Confiabilidad.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir columnas numéricas (comas a puntos)
-        numeric_cols = ['SCORE', 'MAE', 'MAPE']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("analisis_confiabilidad", use_cache)
+
     def load_benchmark_historico(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga benchmark de histórico vs pronóstico
@@ -361,23 +1003,8 @@ class DataLoader:
                   PERDIDAS_HIST, PERDIDAS_PRED, INDICE_HIST, INDICE_PRED,
                   DIF_ENTRADA_%, DIF_SALIDA_%, DIF_INDICE_%
         """
-        cache_key = "benchmark_historico"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Benchmark_Historico_vs_Pronostico.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir todas las columnas numéricas
-        numeric_cols = [col for col in df.columns if col != 'VALVULA']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("benchmark_historico", use_cache)
+
     def load_resumen_pronostico_valvulas(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga resumen agregado de pronósticos por válvula
@@ -388,23 +1015,8 @@ class DataLoader:
                   VOLUMEN_SALIDA_FINAL_mean, PERDIDAS_FINAL_sum,
                   PERDIDAS_FINAL_mean, INDICE_PERDIDAS_FINAL_mean
         """
-        cache_key = "resumen_pronostico_valvulas"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Resumen_Pronostico_Valvulas.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir columnas numéricas
-        numeric_cols = [col for col in df.columns if col != 'VALVULA']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("resumen_pronostico_valvulas", use_cache)
+
     def load_reporte_metricas_performance(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga reporte completo de métricas de performance
@@ -413,21 +1025,8 @@ class DataLoader:
         Columnas: TIPO, VALVULA, METRICA, VALOR
         TIPO puede ser: VALIDACION_MODELO, BENCHMARK_HISTORICO
         """
-        cache_key = "reporte_metricas_performance"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Reporte_Metricas_Performance.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir columna VALOR (puede tener comas)
-        if 'VALOR' in df.columns:
-            df['VALOR'] = df['VALOR'].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("reporte_metricas_performance", use_cache)
+
     def load_predicciones_con_balance(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga predicciones con balance
@@ -436,31 +1035,8 @@ class DataLoader:
         Columnas: VALVULA, PERIODO, FECHA, VOLUMEN_ENTRADA_FINAL, INDICE_PERDIDAS_FINAL,
                   PRED_ENTRADA, PRED_SALIDA, PRED_PERDIDAS, PRED_INDICE_PERDIDAS, etc.
         """
-        cache_key = "predicciones_con_balance"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Predicciones_Con_Balance.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir fecha
-        if 'FECHA' in df.columns:
-            df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
-        
-        # Convertir columnas numéricas
-        numeric_cols = [
-            'VOLUMEN_ENTRADA_FINAL', 'VOLUMEN_SALIDA_FINAL', 'PERDIDAS_FINAL',
-            'INDICE_PERDIDAS_FINAL', 'PRED_ENTRADA', 'PRED_SALIDA', 
-            'PRED_PERDIDAS', 'PRED_INDICE_PERDIDAS'
-        ]
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("predicciones_con_balance", use_cache)
+
     def load_dataset_maestro(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga dataset maestro completo de balances
@@ -471,32 +1047,8 @@ class DataLoader:
                   VOLUMEN_SALIDA_FINAL, PERDIDAS_FINAL, INDICE_PERDIDAS_FINAL,
                   PRESION_FINAL, TEMPERATURA_FINAL, KPT_FINAL, NUM_USUARIOS, etc.
         """
-        cache_key = "dataset_maestro"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Dataset_Maestro_Balances.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir fecha
-        if 'FECHA' in df.columns:
-            df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
-        
-        # Convertir columnas numéricas
-        numeric_cols = [
-            'VOLUMEN_ENTRADA_FINAL', 'VOLUMEN_SALIDA_FINAL', 'PERDIDAS_FINAL',
-            'INDICE_PERDIDAS_FINAL', 'PRESION_FINAL', 'TEMPERATURA_FINAL',
-            'KPT_FINAL', 'NUM_USUARIOS', 'VOLUMEN_ENTRADA_MACRO', 
-            'VOLUMEN_SALIDA_USUARIOS', 'PRESION_MACRO', 'TEMPERATURA_MACRO', 'KPT_MACRO'
-        ]
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("dataset_maestro", use_cache)
+
     def load_dataset_train(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga dataset de entrenamiento
@@ -504,32 +1056,8 @@ class DataLoader:
         
         Contiene datos históricos usados para entrenar los modelos
         """
-        cache_key = "dataset_train"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Dataset_Train.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir fecha
-        if 'FECHA' in df.columns:
-            df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
-        
-        # Convertir columnas numéricas
-        numeric_cols = [
-            'VOLUMEN_ENTRADA_FINAL', 'VOLUMEN_SALIDA_FINAL', 'PERDIDAS_FINAL',
-            'INDICE_PERDIDAS_FINAL', 'PRESION_FINAL', 'TEMPERATURA_FINAL',
-            'KPT_FINAL', 'NUM_USUARIOS', 'VOLUMEN_ENTRADA_MACRO', 
-            'VOLUMEN_SALIDA_USUARIOS', 'PRESION_MACRO', 'TEMPERATURA_MACRO', 'KPT_MACRO'
-        ]
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-        
-        self._cache[cache_key] = df
-        return df.copy()
-    
+        return self._load("dataset_train", use_cache)
+
     def load_resumen_analisis_modelos(self, use_cache: bool = True) -> pd.DataFrame:
         """
         Carga resumen de análisis de modelos (métricas agregadas)
@@ -537,21 +1065,18 @@ class DataLoader:
         
         Contiene estadísticas descriptivas (count, mean, std, min, max) por modelo
         """
-        cache_key = "resumen_analisis_modelos"
-        
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key].copy()
-        
-        df = self._read_csv("Resumen_Analisis_Modelos.csv")
-        df.columns = df.columns.str.strip().str.upper()
-        
-        # Convertir todas las columnas numéricas
-        for col in df.columns:
-            if col not in ['MODELO', '']:
-                df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
+        return self._load("resumen_analisis_modelos", use_cache)
+    
+    def load_variables_usuarios(self, use_cache: bool = True) -> pd.DataFrame:
+        """
+        Carga variables por usuario (consumo mensual por usuario y válvula de referencia)
+        Archivo: Variables_Usuarios.csv
         
-        self._cache[cache_key] = df
-        return df.copy()
+        Columnas: CODIGO VALVULA REFERENCIA, ID_USUARIO, GRUPO_USUARIO, ESTRATO,
+                  CLASE_SERVICIO, PRESION_SISTEMA, KPT_SISTEMA, TIPO_MEDIDOR,
+                  PERIODO, CONSUMO
+        """
+        return self._load("variables_usuarios", use_cache)
 
 
 # Instancia global del DataLoader
@@ -0,0 +1,381 @@
+"""Registro declarativo de los datasets de BALANC-IA
+
+Cada CSV que carga el DataLoader se describe una sola vez: columnas (con el
+nombre exacto de la cabecera del CSV), dtypes, columnas de fecha y convención
+decimal. Con eso el CSV se parsea en una sola pasada con pd.read_csv
+(decimal, dtype y usecols explícitos) en lugar de convertir columna por
+columna desde strings.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List, Tuple
+
+
+# dtypes declarables en el registro
+TEXT = "str"
+CATEGORY = "category"   # identificadores repetidos (válvula, modelo, nivel...): un código por fila
+FLOAT = "float64"
+INT = "int64"
+PERIOD = "int32"        # YYYYMM
+SMALL_INT = "int16"     # año, mes
+BOOL = "bool"
+DATE = "datetime"   # se lee como texto y se convierte con pd.to_datetime(errors='coerce')
+
+NUMERIC = (FLOAT, INT, PERIOD, SMALL_INT)
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    """
+    Esquema de un CSV de BALANC-IA
+
+    Attributes:
+        key: Clave del dataset en el caché del DataLoader
+        path: Ruta relativa desde DATA_PATH
+        columns: Columna (nombre exacto en la cabecera del CSV) -> dtype. Solo se leen estas columnas
+        decimal: Separador decimal del archivo
+        index_col: Posición de la columna que se usa como índice
+        default_dtype: dtype para todas las columnas cuando no se declaran (matrices NxN)
+        coerce_numeric: Convertir columnas numéricas con errors='coerce' en lugar de fallar
+        normalize_columns: Pasar los nombres de columna a mayúsculas sin espacios
+        skiprows: Filas de cabecera a descartar; los nombres salen entonces de `columns`
+        partitions: Combinaciones de columnas (nombres normalizados) por las que el
+                    DataLoader indexa el dataset al cargarlo (ej: válvula, válvula + modelo)
+        ttl: Segundos que la entrada vive en el caché antes de recargarse (None: sin vencimiento)
+        pinned: Nunca se desaloja del caché por presupuesto de memoria
+    """
+    key: str
+    path: str
+    columns: Dict[str, str] = field(default_factory=dict)
+    decimal: str = ","
+    index_col: Optional[int] = None
+    default_dtype: Optional[str] = None
+    coerce_numeric: bool = False
+    normalize_columns: bool = True
+    skiprows: int = 0
+    partitions: Tuple[Tuple[str, ...], ...] = ()
+    ttl: Optional[float] = None
+    pinned: bool = False
+
+    @property
+    def date_columns(self) -> List[str]:
+        """Columnas declaradas como fecha"""
+        return [col for col, dtype in self.columns.items() if dtype == DATE]
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        """Columnas declaradas como float o int"""
+        return [col for col, dtype in self.columns.items() if dtype in NUMERIC]
+
+    @property
+    def parse_dtypes(self) -> Dict[str, str]:
+        """dtypes que aplica el propio parser (las fechas y columnas a forzar se convierten después)"""
+        return {
+            col: dtype for col, dtype in self.columns.items()
+            if dtype != DATE and not (self.coerce_numeric and dtype in NUMERIC)
+        }
+
+    def read_csv_kwargs(self) -> Dict:
+        """
+        Argumentos para pd.read_csv que parsean el archivo en una sola pasada.
+        El índice (index_col) no se aplica aquí: el DataLoader lo fija después,
+        igual para el CSV y para su snapshot Parquet.
+        """
+        kwargs = {"decimal": self.decimal, "float_precision": "round_trip"}
+
+        if self.skiprows:
+            kwargs["header"] = None
+            kwargs["skiprows"] = self.skiprows
+            kwargs["names"] = list(self.columns)
+
+        if self.columns:
+            kwargs["usecols"] = list(self.columns)
+            kwargs["dtype"] = self.parse_dtypes
+        elif self.default_dtype and not self.coerce_numeric:
+            # Matrices NxN: todas las columnas comparten dtype salvo la del índice (texto)
+            default_dtype = self.default_dtype
+            kwargs["dtype"] = defaultdict(lambda: default_dtype)
+            if self.index_col is not None:
+                kwargs["dtype"][self.index_col] = TEXT
+
+        return kwargs
+
+
+# Columnas comunes del dataset maestro (Dataset_Maestro_Balances, Dataset_Train, Predicciones_Con_Balance)
+_MAESTRO_COLUMNS = {
+    "VALVULA": CATEGORY,
+    "PERIODO": PERIOD,
+    "AÑO": SMALL_INT,
+    "MES": SMALL_INT,
+    "FECHA": DATE,
+    "VOLUMEN_ENTRADA_FINAL": FLOAT,
+    "VOLUMEN_SALIDA_FINAL": FLOAT,
+    "PERDIDAS_FINAL": FLOAT,
+    "INDICE_PERDIDAS_FINAL": FLOAT,
+    "PRESION_FINAL": FLOAT,
+    "TEMPERATURA_FINAL": FLOAT,
+    "KPT_FINAL": FLOAT,
+    "NUM_USUARIOS": FLOAT,
+    "NUM_REGISTROS": FLOAT,
+    "TIENE_MACROMEDIDOR": BOOL,
+    "PERIODO_A_PREDECIR": BOOL,
+    "MESES_DESDE_RETIRO": FLOAT,
+    "VOLUMEN_ENTRADA_MACRO": FLOAT,
+    "VOLUMEN_SALIDA_USUARIOS": FLOAT,
+    "PRESION_MACRO": FLOAT,
+    "TEMPERATURA_MACRO": FLOAT,
+    "KPT_MACRO": FLOAT,
+}
+
+_TOP_VALVULAS_COLUMNS = {
+    "VALVULA": CATEGORY,
+    "PERDIDAS_PROMEDIO_m3": FLOAT,
+    "INDICE_PERDIDAS_%": FLOAT,
+    "ENTRADA_PROMEDIO_m3": FLOAT,
+    "SALIDA_PROMEDIO_m3": FLOAT,
+    "NUM_PERIODOS": INT,
+    "PERDIDAS_ABS": FLOAT,
+}
+
+
+DATASETS: Dict[str, DatasetSchema] = {
+    schema.key: schema for schema in [
+        DatasetSchema(
+            key="balances_virtuales",
+            path="Tabla_Balances_Virtuales.csv",
+            columns={
+                "PUNTO": CATEGORY,
+                "PERIODO": PERIOD,
+                "AÑO": SMALL_INT,
+                "MES": SMALL_INT,
+                "FECHA": DATE,
+                "ENTRADA_m3": FLOAT,
+                "SALIDA_m3": FLOAT,
+                "PERDIDAS_m3": FLOAT,
+                "INDICE_PERDIDAS_%": FLOAT,
+                "ES_PRONOSTICO": BOOL,
+            },
+            partitions=(("PUNTO",),),
+        ),
+        DatasetSchema(
+            key="pronosticos",
+            path="Pronosticos.csv",
+            columns={
+                "VALVULA": CATEGORY,
+                "PERIODO": PERIOD,
+                "FECHA": DATE,
+                "PRED_ENTRADA_PROPHET": FLOAT,
+                "PRED_ENTRADA_LGBM": FLOAT,
+                "PRED_ENTRADA_RF": FLOAT,
+                "PRED_ENTRADA_CATBOOST": FLOAT,
+                "PRED_ENTRADA_LSTM": FLOAT,
+                "PRED_ENTRADA_HYBRID": FLOAT,
+                "PRED_ENTRADA": FLOAT,
+                "PRED_SALIDA": FLOAT,
+                "PRED_PERDIDAS": FLOAT,
+                "PRED_INDICE_PERDIDAS": FLOAT,
+            },
+            partitions=(("VALVULA",),),
+        ),
+        DatasetSchema(
+            key="metrics",
+            path="Metrics.csv",
+            columns={
+                "VALVULA": CATEGORY,
+                "MODELO": CATEGORY,
+                "MAE": FLOAT,
+                "RMSE": FLOAT,
+                "MAPE": FLOAT,
+                "MASE": FLOAT,
+                "N_TEST": INT,
+            },
+            partitions=(("VALVULA",), ("MODELO",), ("VALVULA", "MODELO")),
+            # Tabla pequeña consultada por casi todas las vistas
+            pinned=True,
+        ),
+        DatasetSchema(
+            key="resumen_valvulas",
+            path="Resumen_Valvulas.csv",
+            columns={
+                "VALVULA": CATEGORY,
+                "FECHA_min": DATE,
+                "FECHA_max": DATE,
+                "VOLUMEN_ENTRADA_FINAL_sum": FLOAT,
+                "VOLUMEN_SALIDA_FINAL_sum": FLOAT,
+                "INDICE_PERDIDAS_FINAL_mean": FLOAT,
+                "TIENE_MACROMEDIDOR_sum": FLOAT,
+                "PERIODO_A_PREDECIR_sum": FLOAT,
+            },
+        ),
+        DatasetSchema(
+            key="alertas",
+            path="dashboard/Alertas_Puntos.csv",
+            columns={
+                "VALVULA": CATEGORY,
+                "NIVEL": CATEGORY,
+                "MENSAJES": TEXT,
+                "INDICE_PERDIDAS_%": FLOAT,
+                "ENTRADA_PROMEDIO": FLOAT,
+            },
+            partitions=(("VALVULA",),),
+        ),
+        DatasetSchema(
+            key="top_desbalances",
+            path="dashboard/Top_Desbalances.csv",
+            columns=_TOP_VALVULAS_COLUMNS,
+        ),
+        DatasetSchema(
+            key="top_indice",
+            path="dashboard/Top10_Indice_Perdidas.csv",
+            columns={**_TOP_VALVULAS_COLUMNS, "NUM_PERIODOS": FLOAT},
+            coerce_numeric=True,
+        ),
+        DatasetSchema(
+            key="correlations",
+            path="eda/Matriz_Correlacion.csv",
+            index_col=0,
+            default_dtype=FLOAT,
+            normalize_columns=False,
+        ),
+        DatasetSchema(
+            key="estadisticas",
+            path="eda/Estadisticas_Descriptivas.csv",
+            index_col=0,
+            default_dtype=FLOAT,
+            coerce_numeric=True,
+            normalize_columns=False,
+        ),
+        DatasetSchema(
+            key="analisis_confiabilidad",
+            path="Analisis_Confiabilidad.csv",
+            columns={
+                "VALVULA": CATEGORY,
+                "SCORE": FLOAT,
+                "NIVEL": CATEGORY,
+                "MEJOR_MODELO": CATEGORY,
+                "MAE": FLOAT,
+                "MAPE": FLOAT,
+            },
+        ),
+        DatasetSchema(
+            key="benchmark_historico",
+            path="Benchmark_Historico_vs_Pronostico.csv",
+            columns={
+                "VALVULA": CATEGORY,
+                "ENTRADA_HIST": FLOAT,
+                "ENTRADA_PRED": FLOAT,
+                "SALIDA_HIST": FLOAT,
+                "SALIDA_PRED": FLOAT,
+                "PERDIDAS_HIST": FLOAT,
+                "PERDIDAS_PRED": FLOAT,
+                "INDICE_HIST": FLOAT,
+                "INDICE_PRED": FLOAT,
+                "DIF_ENTRADA_%": FLOAT,
+                "DIF_SALIDA_%": FLOAT,
+                "DIF_INDICE_%": FLOAT,
+            },
+        ),
+        DatasetSchema(
+            key="resumen_pronostico_valvulas",
+            path="Resumen_Pronostico_Valvulas.csv",
+            columns={
+                "VALVULA": CATEGORY,
+                "NUM_PERIODOS": INT,
+                "VOLUMEN_ENTRADA_FINAL_sum": FLOAT,
+                "VOLUMEN_ENTRADA_FINAL_mean": FLOAT,
+                "VOLUMEN_SALIDA_FINAL_sum": FLOAT,
+                "VOLUMEN_SALIDA_FINAL_mean": FLOAT,
+                "PERDIDAS_FINAL_sum": FLOAT,
+                "PERDIDAS_FINAL_mean": FLOAT,
+                "INDICE_PERDIDAS_FINAL_mean": FLOAT,
+            },
+        ),
+        DatasetSchema(
+            key="reporte_metricas_performance",
+            path="Reporte_Metricas_Performance.csv",
+            columns={
+                "TIPO": CATEGORY,
+                "VALVULA": CATEGORY,
+                "METRICA": CATEGORY,
+                "VALOR": FLOAT,
+            },
+        ),
+        DatasetSchema(
+            key="predicciones_con_balance",
+            path="Predicciones_Con_Balance.csv",
+            columns={
+                **_MAESTRO_COLUMNS,
+                "PRED_ENTRADA": FLOAT,
+                "PRED_SALIDA": FLOAT,
+                "PRED_PERDIDAS": FLOAT,
+                "PRED_INDICE_PERDIDAS": FLOAT,
+            },
+            partitions=(("VALVULA",),),
+        ),
+        DatasetSchema(
+            key="dataset_maestro",
+            path="Dataset_Maestro_Balances.csv",
+            columns=_MAESTRO_COLUMNS,
+            partitions=(("VALVULA",),),
+        ),
+        DatasetSchema(
+            key="dataset_train",
+            path="Dataset_Train.csv",
+            columns=_MAESTRO_COLUMNS,
+            partitions=(("VALVULA",),),
+        ),
+        DatasetSchema(
+            key="resumen_analisis_modelos",
+            path="Resumen_Analisis_Modelos.csv",
+            # Cabecera de dos niveles (métrica / estadístico) + fila con el nombre del índice
+            skiprows=3,
+            columns={
+                "MODELO": CATEGORY,
+                "MAE_count": INT,
+                "MAE_mean": FLOAT,
+                "MAE_std": FLOAT,
+                "MAE_min": FLOAT,
+                "MAE_max": FLOAT,
+                "RMSE_mean": FLOAT,
+                "RMSE_std": FLOAT,
+                "MAPE_mean": FLOAT,
+                "MAPE_std": FLOAT,
+                "MASE_mean": FLOAT,
+            },
+        ),
+        DatasetSchema(
+            key="variables_usuarios",
+            path="Variables_Usuarios.csv",
+            decimal=".",
+            # Datos por usuario: los más grandes, se liberan y recargan periódicamente
+            ttl=900,
+            columns={
+                "CODIGO VALVULA REFERENCIA": CATEGORY,
+                "ID_USUARIO": CATEGORY,
+                "GRUPO_USUARIO": CATEGORY,
+                "ESTRATO": CATEGORY,
+                "CLASE_SERVICIO": CATEGORY,
+                "PRESION_SISTEMA": FLOAT,
+                "KPT_SISTEMA": FLOAT,
+                "TIPO_MEDIDOR": CATEGORY,
+                "PERIODO": PERIOD,
+                "CONSUMO": FLOAT,
+            },
+        ),
+    ]
+}
+
+
+def get_schema(key: str) -> DatasetSchema:
+    """Obtiene el esquema de un dataset registrado"""
+    if key not in DATASETS:
+        raise KeyError(f"Dataset no registrado: {key}")
+    return DATASETS[key]
+
+
+def schema_for_path(relative_path: str) -> Optional[DatasetSchema]:
+    """Esquema registrado para un CSV (ruta relativa a DATA_PATH), si existe"""
+    for schema in DATASETS.values():
+        if schema.path == relative_path:
+            return schema
+    return None
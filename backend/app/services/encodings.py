@@ -0,0 +1,112 @@
+"""Detección de encoding de los CSVs de BALANC-IA
+
+En lugar de parsear el archivo completo con cada encoding candidato hasta que
+uno funcione, se decodifica solo un prefijo para elegir el codec. El resultado
+se guarda en un manifiesto JSON junto a los datos (.encodings.json), indexado
+por el hash SHA-256 del archivo, de modo que las cargas siguientes (incluidas
+las de otros workers) van directo al encoding correcto.
+"""
+import codecs
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# Encodings candidatos, en orden de preferencia
+ENCODINGS = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252', 'windows-1252']
+
+# Bytes del inicio del archivo que se decodifican para elegir el encoding
+SNIFF_BYTES = 64 * 1024
+
+MANIFEST_NAME = ".encodings.json"
+
+
+def sniff_encoding(file_path: Path, candidates: List[str] = ENCODINGS,
+                   sniff_bytes: int = SNIFF_BYTES) -> Optional[str]:
+    """
+    Elige el primer encoding candidato que decodifica el prefijo del archivo
+
+    Args:
+        file_path: Ruta del archivo
+        candidates: Encodings a probar en orden
+        sniff_bytes: Tamaño del prefijo a decodificar
+
+    Returns:
+        str: Encoding elegido, o None si ninguno decodifica el prefijo
+    """
+    with open(file_path, 'rb') as f:
+        prefix = f.read(sniff_bytes)
+
+    for encoding in candidates:
+        # Decodificador incremental: una secuencia multibyte cortada al final del prefijo no es error
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(prefix, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+    return None
+
+
+class EncodingManifest:
+    """
+    Manifiesto hash SHA-256 -> encoding guardado junto a los CSVs
+
+    Se relee del disco cuando otro proceso lo modificó y se escribe de forma
+    atómica, combinando con lo que haya en disco para no perder entradas de otros workers.
+    Si la carpeta de datos no es escribible, el manifiesto queda solo en memoria.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Dict[str, str] = {}
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self, sha256: str) -> Optional[str]:
+        """Encoding registrado para un archivo, si existe"""
+        with self._lock:
+            self._refresh()
+            return self._entries.get(sha256)
+
+    def set(self, sha256: str, encoding: str):
+        """Registra el encoding de un archivo"""
+        with self._lock:
+            self._refresh()
+            if self._entries.get(sha256) == encoding:
+                return
+            self._entries[sha256] = encoding
+            self._write()
+
+    def _refresh(self):
+        """Relee el manifiesto si cambió en disco"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+
+        if mtime == self._mtime:
+            return
+
+        try:
+            entries = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            # Manifiesto ilegible: se regenera con las próximas detecciones
+            return
+
+        if isinstance(entries, dict):
+            self._entries.update(entries)
+        self._mtime = mtime
+
+    def _write(self):
+        """Escribe el manifiesto de forma atómica"""
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(self._entries, indent=2, sort_keys=True), encoding='utf-8')
+            os.replace(tmp, self.path)
+            self._mtime = self.path.stat().st_mtime
+        except OSError:
+            tmp.unlink(missing_ok=True)
@@ -0,0 +1,284 @@
+"""Ejecutor de inferencia: predicciones en un pool de procesos, fuera del event loop
+
+Predecir con los modelos de árboles y con Prophet es trabajo de CPU que
+retiene el GIL: dentro del worker de la API frenaría a todos los demás
+requests (dashboard, gráficos...). Las rutas de /api/predict mandan el
+trabajo a un pool de procesos y esperan el resultado con await.
+
+- Cada proceso del pool tiene su propio model_registry y al iniciar
+  (initializer) precarga los modelos más pedidos que entran en MODELS_MAX_MB,
+  así que los requests habituales no pagan la deserialización. Los cambios en
+  caliente de los artefactos se detectan en cada proceso igual que en la API.
+- Cola acotada: como mucho INFERENCE_WORKERS tareas en ejecución más
+  INFERENCE_QUEUE_SIZE esperando. Con la cola llena el request se rechaza al
+  instante (InferenceQueueFull -> 503 con Retry-After) en lugar de acumular
+  latencia.
+- Timeout por request (INFERENCE_TIMEOUT): el cliente recibe 504 y, si la
+  tarea todavía no empezó, se cancela; si ya está corriendo, el proceso la
+  termina y el resultado se descarta. Hasta que termina sigue ocupando su
+  lugar en la cola y en las métricas.
+- Métricas (get_info): profundidad de la cola, tareas en ejecución, rechazos,
+  timeouts y percentiles de espera en cola, ejecución y latencia total.
+
+Con INFERENCE_WORKERS=0 las predicciones corren en un hilo del mismo proceso
+(un solo hilo: la cola y las métricas funcionan igual, pero comparten el GIL
+con la API). La precarga de modelos corre en ese hilo antes de la primera
+tarea, nunca en el event loop.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+
+
+# Cantidad de latencias recientes con las que se calculan los percentiles
+LATENCY_WINDOW = 2048
+
+
+class InferenceQueueFull(Exception):
+    """La cola de inferencia está llena: el request se rechaza (backpressure)"""
+
+
+class InferenceTimeout(Exception):
+    """La predicción no terminó dentro del timeout del request"""
+
+
+# ==================== TAREAS (se ejecutan en los procesos del pool) ====================
+
+def _init_worker():
+    """Precarga los modelos más pedidos en el proceso del pool (model_registry.warm_up)"""
+    from app.services.model_registry import model_registry
+
+    try:
+        model_registry.warm_up()
+    except Exception as e:
+        print(f"⚠ Error precargando modelos en el proceso de inferencia: {e}")
+
+
+def _ping() -> bool:
+    return True
+
+
+def _run(fn: Callable[..., Any], args: tuple, submitted: float):
+    """Ejecuta la tarea y devuelve (resultado, segundos en cola, segundos de ejecución)"""
+    started = time.time()
+    result = fn(*args)
+    return result, started - submitted, time.time() - started
+
+
+def predict(valvula: str, features: Dict[str, Any], fecha: Optional[Any]) -> Dict[str, Any]:
+    """Predicción de una fila (model_registry.predict)"""
+    from app.services.model_registry import model_registry
+
+    return model_registry.predict(valvula, features, fecha)
+
+
+def predict_rows(
+    valvulas: Sequence[str],
+    features: Sequence[Dict[str, Any]],
+    fechas: Sequence[Optional[Any]]
+) -> Dict[str, Any]:
+    """Predicciones de varias filas (model_registry.predict_rows)"""
+    from app.services.model_registry import model_registry
+
+    return model_registry.predict_rows(valvulas, features, fechas)
+
+
+def registry_info() -> Dict[str, Any]:
+    """Modelos residentes del proceso (model_registry.get_info)"""
+    from app.services.model_registry import model_registry
+
+    return model_registry.get_info()
+
+
+# ==================== EJECUTOR ====================
+
+class InferenceExecutor:
+    """
+    Pool de procesos de inferencia con cola acotada, timeouts y métricas.
+
+    Uso (desde una ruta async):
+        result = await inference_executor.run(predict, valvula, features, fecha)
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        self.workers = settings.INFERENCE_WORKERS if workers is None else workers
+        self.queue_size = settings.INFERENCE_QUEUE_SIZE if queue_size is None else queue_size
+        self.timeout = settings.INFERENCE_TIMEOUT if timeout is None else timeout
+        self.start_method = settings.INFERENCE_START_METHOD
+
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+        # Tareas aceptadas que todavía no terminaron (en ejecución + en cola)
+        self._pending = 0
+        self._max_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._errors = 0
+        self._restarts = 0
+        # (espera en cola, ejecución, total) en segundos de las últimas tareas
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def slots(self) -> int:
+        """Tareas que pueden ejecutarse a la vez"""
+        return self.workers if self.workers > 0 else 1
+
+    @property
+    def active(self) -> bool:
+        """El pool ya fue creado"""
+        return self._executor is not None
+
+    @property
+    def capacity(self) -> int:
+        """Máximo de tareas aceptadas a la vez (en ejecución + en cola)"""
+        return self.slots + self.queue_size
+
+    def _get_executor(self) -> Executor:
+        """
+        Pool (se crea en el primer uso, o de nuevo si un proceso murió)
+
+        Crearlo es inmediato: la precarga de modelos (_init_worker) corre como
+        initializer en el proceso o en el hilo del pool, antes de su primera
+        tarea, así que nunca bloquea a quien lo crea (el event loop en run).
+        """
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                        initializer=_init_worker
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="inference", initializer=_init_worker
+                    )
+            return self._executor
+
+    def start(self):
+        """Crea el pool y espera a que todos sus procesos (o el hilo) terminen de precargar los modelos"""
+        executor = self._get_executor()
+        # El pool lanza procesos a demanda: una tarea por proceso los arranca todos
+        for future in [executor.submit(_ping) for _ in range(self.slots)]:
+            future.result()
+
+    def shutdown(self):
+        """Detiene el pool (las tareas en cola se cancelan)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Ejecuta fn(*args) en el pool y espera el resultado sin bloquear el event loop
+
+        Raises:
+            InferenceQueueFull: Ya hay `capacity` tareas aceptadas
+            InferenceTimeout: No terminó en `timeout` segundos (por defecto INFERENCE_TIMEOUT)
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise InferenceQueueFull(
+                    f"Cola de inferencia llena ({self._pending} tareas, capacidad {self.capacity})"
+                )
+            self._pending += 1
+            self._max_pending = max(self._max_pending, self._pending)
+
+        submitted = time.time()
+        try:
+            executor = self._get_executor()
+            future = executor.submit(_run, fn, args, submitted)
+        except BaseException:
+            self._release()
+            raise
+        # La tarea cuenta como pendiente hasta que termina de verdad (no cuando el request
+        # deja de esperarla): tras un timeout el proceso sigue ocupado con ella
+        future.add_done_callback(self._release)
+
+        try:
+            result, waited, ran = await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout if timeout is not None else self.timeout
+            )
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise InferenceTimeout(f"La predicción no terminó en {timeout or self.timeout} s")
+        except BrokenProcessPool:
+            # Un proceso murió (p. ej. sin memoria): el próximo request crea un pool nuevo
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+                    self._restarts += 1
+            raise
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+
+        with self._lock:
+            self._completed += 1
+            self._latencies.append((waited, ran, time.time() - submitted))
+        return result
+
+    def _release(self, future: Optional[Future] = None):
+        """Libera el lugar de una tarea aceptada (al terminar, cancelarse o no poder enviarse)"""
+        with self._lock:
+            self._pending -= 1
+
+    def get_info(self) -> Dict[str, Any]:
+        """Profundidad de la cola, contadores y percentiles de latencia (ms) de las últimas tareas"""
+        with self._lock:
+            pending = self._pending
+            latencies = np.array(self._latencies, dtype=np.float64).reshape(-1, 3) * 1000
+            info = {
+                "modo": "procesos" if self.workers > 0 else "hilo",
+                "workers": self.workers,
+                "start_method": self.start_method if self.workers > 0 else None,
+                "activo": self.active,
+                "capacidad": self.capacity,
+                "en_ejecucion": min(pending, self.slots),
+                "en_cola": max(pending - self.slots, 0),
+                "max_pendientes": self._max_pending,
+                "completadas": self._completed,
+                "rechazadas": self._rejected,
+                "timeouts": self._timeouts,
+                "errores": self._errors,
+                "reinicios": self._restarts,
+                "timeout_s": self.timeout,
+            }
+
+        if len(latencies):
+            info["latencias_ms"] = {
+                name: {
+                    f"p{q}": round(float(value), 2)
+                    for q, value in zip((50, 90, 99), np.percentile(latencies[:, j], [50, 90, 99]))
+                }
+                for j, name in enumerate(("espera", "ejecucion", "total"))
+            }
+            info["latencias_ms"]["muestras"] = len(latencies)
+        else:
+            info["latencias_ms"] = None
+        return info
+
+
+# Instancia global
+inference_executor = InferenceExecutor()
@@ -0,0 +1,846 @@
+"""Registro de modelos residentes: cada artefacto se carga una sola vez por worker
+
+BALANC-IA/modelos/cargar_modelos.py vuelve a leer metadata_modelos.pkl y a
+deserializar todos los modelos de una válvula en cada llamada (y
+predecir_entrada la llama en cada predicción): segundos por request. El
+registro carga cada artefacto VALVULA_*_<modelo> la primera vez que se pide,
+lo deja en memoria y lo versiona por el hash SHA-256 del archivo.
+
+Cambios en caliente: cada MODELS_CHECK_INTERVAL segundos (en el acceso) se
+compara mtime/tamaño del archivo y, si cambiaron, el hash. Si el contenido es
+otro, el artefacto nuevo se carga en segundo plano y reemplaza al anterior en
+una sola asignación; mientras tanto (o si la carga falla) se sigue sirviendo
+la versión anterior. Las predicciones en curso conservan su referencia al
+modelo con el que empezaron.
+
+Carga perezosa con presupuesto de memoria: los modelos se cargan en el primer
+uso y se guardan en un LRU acotado a MODELS_MAX_MB (la memoria de cada modelo
+se estima con el tamaño de su artefacto, que sigue de cerca al del objeto
+serializado, más los arrays del evaluador NumPy). Al superar el presupuesto se desalojan los menos usados
+recientemente. Los accesos por modelo se cuentan y se guardan en
+MODELS_ACCESS_STATS (JSON, aproximado: cada proceso suma lo suyo); warm_up
+precarga primero los modelos más pedidos, mientras entren en el presupuesto.
+
+Evaluador NumPy (NUMPY_TREES): al cargar un RandomForest o un LightGBM sus
+árboles se aplanan en arrays (app.services.tree_ensemble.FlatForest) y se
+predice con NumPy, sin el overhead por llamada de sus predict, en los lotes
+chicos: hasta NUMPY_TREES_MAX_WORK_<MODELO> / (árboles x profundidad) filas,
+un límite propio de cada modelo (en lotes más grandes el predict original es
+más rápido). Antes de usarlo se verifica contra el predict del modelo; si no
+coincide (o el modelo no se puede aplanar) se sigue usando predict.
+
+Las librerías de ML (joblib/scikit-learn, lightgbm, catboost, prophet,
+tensorflow) se importan recién al cargar un artefacto que las necesita.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.services.data_loader import DataLoader, SourceState
+from app.services.tree_ensemble import FlatForest, UnsupportedModel
+
+
+# Modelo -> extensiones del artefacto, en orden de preferencia (igual que cargar_modelos)
+ARTIFACT_EXTENSIONS: Dict[str, Tuple[str, ...]] = {
+    "prophet": (".pkl",),
+    "lightgbm": (".pkl",),
+    "randomforest": (".pkl",),
+    "catboost": (".cbm", ".pkl"),
+    "hybrid_prophet": (".pkl",),
+    "hybrid_lstm": (".h5",),
+}
+
+# Modelos que predicen a partir de features (el resto usa la fecha)
+FEATURE_MODELS = ("lightgbm", "randomforest", "catboost")
+
+# Modelos que se aplanan para el evaluador NumPy (NUMPY_TREES)
+FLAT_MODELS = ("lightgbm", "randomforest")
+
+# Filas de prueba con las que se verifica, al cargar, que el evaluador NumPy coincide con predict
+PARITY_ROWS = 64
+
+# Pesos por defecto del ensemble (los de predecir_entrada; se normalizan sobre los modelos que predicen)
+ENSEMBLE_WEIGHTS = {"prophet": 0.2, "lightgbm": 0.25, "randomforest": 0.25, "catboost": 0.3}
+
+METADATA_FILES = ("metadata_modelos.json", "metadata_modelos.pkl")
+
+# Segundos entre escrituras de las estadísticas de acceso (MODELS_ACCESS_STATS)
+ACCESS_STATS_INTERVAL = 30.0
+
+ModelKey = Tuple[str, str]
+
+
+@dataclass
+class ModelArtifact:
+    """Modelo cargado en memoria junto con el estado del archivo del que salió"""
+    valvula: str
+    modelo: str
+    path: Path
+    state: SourceState
+    model: Any
+    features: List[str]
+    loaded_at: float
+    load_seconds: float
+    checked_at: float
+    swaps: int = 0
+    size_bytes: int = 0
+    # Árboles aplanados para el evaluador NumPy (None: se usa model.predict) y
+    # filas por llamada hasta las que se usa
+    flat: Optional[FlatForest] = None
+    flat_max_rows: int = 0
+
+    @property
+    def version(self) -> str:
+        """Versión del artefacto: prefijo del hash del archivo"""
+        return self.state.sha256[:12]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predicción sobre una matriz de features (columnas en el orden de self.features)"""
+        if self.flat is not None and len(X) <= self.flat_max_rows:
+            return self.flat.predict(X)
+        return np.asarray(self.model.predict(pd.DataFrame(X, columns=self.features)), dtype=np.float64)
+
+
+@dataclass
+class _Metadata:
+    """metadata_modelos (por válvula) y el estado del archivo leído"""
+    path: Optional[Path]
+    state: Optional[SourceState]
+    content: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    checked_at: float = 0.0
+
+
+def _deserialize(modelo: str, path: Path) -> Any:
+    """Carga un artefacto con la misma librería que usa cargar_modelos"""
+    if path.suffix == ".cbm":
+        from catboost import CatBoostRegressor
+
+        model = CatBoostRegressor()
+        model.load_model(str(path))
+        return model
+
+    if path.suffix == ".h5":
+        from tensorflow.keras.models import load_model
+
+        return load_model(str(path))
+
+    if modelo in ("prophet", "hybrid_prophet"):
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+        # Solo se usa yhat: sin muestreo de incertidumbre la predicción tarda la mitad
+        if hasattr(model, "uncertainty_samples"):
+            model.uncertainty_samples = 0
+        return model
+
+    import joblib
+
+    return joblib.load(path)
+
+
+def _model_size(path: Path, flat: Optional[FlatForest]) -> int:
+    """
+    Memoria estimada de un modelo: tamaño del archivo más los arrays de FlatForest
+
+    No se vuelve a serializar el modelo para medirlo: eso duplicaría el pico de
+    memoria y de CPU justo al cargar los artefactos grandes.
+    """
+    return path.stat().st_size + (flat.nbytes if flat is not None else 0)
+
+
+def _key_name(key: ModelKey) -> str:
+    return f"{key[0]}/{key[1]}"
+
+
+def _model_features(model: Any) -> List[str]:
+    """Features con las que se entrenó el modelo (scikit-learn, LightGBM o CatBoost)"""
+    for attr in ("feature_names_in_", "feature_name_", "feature_names_"):
+        names = getattr(model, attr, None)
+        if names is not None and len(names):
+            return [str(name) for name in names]
+    return []
+
+
+def _feature_matrix(features: Sequence[Dict[str, Any]], columns: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Matriz de features (filas x columnas del modelo) de las filas que traen
+    todas las columnas, y la máscara de esas filas
+
+    Una fila sin alguna de las columnas no entra en la matriz (predecir_entrada
+    descarta el modelo con KeyError); los valores None o NaN valen 0 (fillna(0)).
+    """
+    complete = np.array([all(name in row for name in columns) for row in features], dtype=bool)
+    X = np.array(
+        [[row[name] for name in columns] for row, ok in zip(features, complete) if ok], dtype=np.float64
+    ).reshape(-1, len(columns))
+    return np.nan_to_num(X, nan=0.0), complete
+
+
+def _missing_features(features: Sequence[Dict[str, Any]], columns: Tuple[str, ...], complete: np.ndarray) -> str:
+    """Mensaje de error de un modelo con filas a las que les faltan features"""
+    row = features[int(np.argmin(complete))]
+    missing = [name for name in columns if name not in row]
+    names = ", ".join(missing[:5]) + (", ..." if len(missing) > 5 else "")
+    return f"Faltan features ({names}) en {int((~complete).sum())} de {len(complete)} fila(s)"
+
+
+def _flatten(model: Any, features: List[str]) -> Optional[FlatForest]:
+    """
+    Árboles del modelo aplanados, si el evaluador NumPy reproduce su predict
+
+    La paridad se verifica con PARITY_ROWS filas armadas con los umbrales del
+    propio modelo (cada feature cae a uno u otro lado de sus splits, o es 0).
+    """
+    try:
+        flat = FlatForest.from_model(model)
+    except UnsupportedModel:
+        return None
+
+    rng = np.random.default_rng(0)
+    X = np.zeros((PARITY_ROWS, flat.n_features))
+    for j in range(flat.n_features):
+        thresholds = flat.threshold[flat.feature == j]
+        if len(thresholds):
+            X[:, j] = rng.choice(thresholds, PARITY_ROWS) + rng.choice([-1e-3, 0.0, 1e-3], PARITY_ROWS)
+
+    try:
+        expected = np.asarray(model.predict(pd.DataFrame(X, columns=features) if features else X), dtype=np.float64)
+        matches = np.allclose(flat.predict(X), expected, rtol=1e-9, atol=1e-6)
+    except Exception as e:
+        print(f"⚠ No se pudo verificar el evaluador NumPy de {type(model).__name__}: {e}")
+        return None
+    if not matches:
+        print(f"⚠ El evaluador NumPy no coincide con {type(model).__name__}.predict: se usa predict")
+        return None
+    return flat
+
+
+def _flat_max_rows(modelo: str, flat: FlatForest) -> int:
+    """Filas por llamada hasta las que el evaluador NumPy le gana al predict del modelo"""
+    if modelo == "lightgbm":
+        max_work = settings.NUMPY_TREES_MAX_WORK_LIGHTGBM
+    else:
+        max_work = settings.NUMPY_TREES_MAX_WORK_RANDOMFOREST
+    return max_work // flat.work_per_row
+
+
+def ensemble(predictions: Dict[str, np.ndarray], n: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Promedio ponderado por fila de las predicciones de cada modelo
+
+    Los pesos (ENSEMBLE_WEIGHTS) se normalizan en cada fila sobre los modelos
+    con predicción (no NaN). Devuelve (ensemble, pesos normalizados por modelo);
+    las filas sin ninguna predicción quedan en NaN.
+    """
+    if not predictions:
+        return np.full(n, np.nan), {}
+
+    P = np.column_stack(list(predictions.values()))
+    weights = np.array([ENSEMBLE_WEIGHTS.get(modelo, 0.2) for modelo in predictions])
+    W = np.where(np.isnan(P), 0.0, weights)
+    total = W.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        W = W / total
+        prediction = np.where(total[:, 0] > 0, (np.nan_to_num(P) * W).sum(axis=1), np.nan)
+    W = np.nan_to_num(W)
+    return prediction, {modelo: W[:, j] for j, modelo in enumerate(predictions)}
+
+
+class ModelRegistry:
+    """
+    Modelos de cada válvula residentes en memoria, versionados por hash de archivo.
+
+    Uso:
+        model_registry.get("VALVULA_1", "catboost").model.predict(X)
+        model_registry.predict("VALVULA_1", {"PRESION_FINAL": 10.5, ...}, fecha="2025-08-01")
+    """
+
+    def __init__(self, models_path: Optional[Path] = None):
+        self.models_path = Path(models_path or settings.MODELS_PATH)
+        # Orden de inserción = orden LRU (el modelo menos usado primero)
+        self._models: "OrderedDict[ModelKey, ModelArtifact]" = OrderedDict()
+        self._max_bytes = int(settings.MODELS_MAX_MB * 1024 * 1024)
+        self._metadata = _Metadata(path=None, state=None)
+        self._lock = threading.Lock()
+
+        # Una sola carga por artefacto: los demás hilos esperan el lock de esa clave
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+
+        # Recargas en segundo plano (cambios en caliente) y errores de la última carga
+        self._reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-reload")
+        self._reloading: set = set()
+        self._errors: Dict[ModelKey, str] = {}
+
+        self._loads = 0
+        self._swaps = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        # Accesos por modelo ("VALVULA_1/catboost" -> pedidos) y memoria medida en cargas
+        # anteriores, incluidos los de otros procesos y ejecuciones (MODELS_ACCESS_STATS)
+        self.access_stats_path = Path(settings.MODELS_ACCESS_STATS)
+        self._access: Dict[str, int] = {}
+        self._access_delta: Dict[str, int] = {}
+        self._known_sizes: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        self._stats_saved_at = time.monotonic()
+        self._read_access_stats()
+
+    # ==================== METADATA ====================
+
+    def metadata(self) -> Dict[str, Dict[str, Any]]:
+        """metadata_modelos completa (se relee solo si el archivo cambió)"""
+        meta = self._metadata
+        now = time.monotonic()
+        if meta.path is not None and now - meta.checked_at < settings.MODELS_CHECK_INTERVAL:
+            return meta.content
+
+        meta.checked_at = now
+        path = next((self.models_path / name for name in METADATA_FILES if (self.models_path / name).exists()), None)
+        if path is None:
+            return meta.content
+
+        stat = path.stat()
+        if path == meta.path and meta.state and (stat.st_mtime, stat.st_size) == (meta.state.mtime, meta.state.size):
+            return meta.content
+
+        state = DataLoader._source_state(path)
+        if path != meta.path or meta.state is None or state.sha256 != meta.state.sha256:
+            if path.suffix == ".json":
+                with open(path, "r", encoding="utf-8") as f:
+                    content = json.load(f)
+            else:
+                with open(path, "rb") as f:
+                    content = pickle.load(f)
+            self._metadata = _Metadata(path=path, state=state, content=content, checked_at=now)
+        else:
+            meta.state = state
+        return self._metadata.content
+
+    def get_valvulas(self) -> List[str]:
+        """Válvulas con al menos un modelo entrenado"""
+        return sorted(v for v, meta in self.metadata().items() if meta.get("modelos_disponibles"))
+
+    def models_available(self, valvula: str) -> List[str]:
+        """
+        Modelos entrenados de una válvula según metadata_modelos
+
+        Raises:
+            KeyError: La válvula no está en metadata_modelos o no tiene modelos entrenados
+        """
+        metadata = self.metadata()
+        if valvula not in metadata:
+            raise KeyError(f"Válvula {valvula} no encontrada en modelos")
+        modelos = list(metadata[valvula].get("modelos_disponibles", []))
+        if not modelos:
+            raise KeyError(f"La válvula {valvula} no tiene modelos entrenados")
+        return modelos
+
+    # ==================== ARTEFACTOS ====================
+
+    def _candidates(self, valvula: str, modelo: str) -> List[Path]:
+        """Archivos existentes del artefacto, en orden de preferencia"""
+        if modelo not in ARTIFACT_EXTENSIONS:
+            raise KeyError(f"Modelo '{modelo}' no soportado")
+        paths = [self.models_path / f"{valvula}_{modelo}{ext}" for ext in ARTIFACT_EXTENSIONS[modelo]]
+        return [path for path in paths if path.exists()]
+
+    def _load(self, valvula: str, modelo: str) -> ModelArtifact:
+        """Deserializa el artefacto y lo publica en el registro (reemplazando al anterior)"""
+        candidates = self._candidates(valvula, modelo)
+        if not candidates:
+            raise FileNotFoundError(f"No hay artefacto de {modelo} para {valvula} en {self.models_path}")
+
+        error = None
+        for path in candidates:
+            state = DataLoader._source_state(path)
+            start = time.perf_counter()
+            try:
+                model = _deserialize(modelo, path)
+            except Exception as e:
+                # Como cargar_modelos: si el .cbm falla se intenta con el .pkl
+                error = e
+                continue
+            elapsed = time.perf_counter() - start
+            break
+        else:
+            raise error
+
+        key = (valvula, modelo)
+        meta_features = self.metadata().get(valvula, {}).get("features_por_modelo", {}).get(modelo)
+        features = list(meta_features or _model_features(model))
+        flat = _flatten(model, features) if settings.NUMPY_TREES and modelo in FLAT_MODELS else None
+        flat_max_rows = _flat_max_rows(modelo, flat) if flat is not None else 0
+        if flat_max_rows < 1:
+            # Ni una fila le gana al predict del modelo: no vale la pena guardar los arrays
+            flat = None
+        size_bytes = _model_size(path, flat)
+        now = time.monotonic()
+        with self._lock:
+            previous = self._models.get(key)
+            artifact = ModelArtifact(
+                valvula=valvula,
+                modelo=modelo,
+                path=path,
+                state=state,
+                model=model,
+                features=features,
+                loaded_at=now,
+                load_seconds=elapsed,
+                checked_at=now,
+                swaps=previous.swaps + 1 if previous else 0,
+                size_bytes=size_bytes,
+                flat=flat,
+                flat_max_rows=flat_max_rows
+            )
+            self._models[key] = artifact
+            self._models.move_to_end(key)
+            self._known_sizes[_key_name(key)] = size_bytes
+            self._loads += 1
+            if previous is not None:
+                self._swaps += 1
+            self._errors.pop(key, None)
+            self._evict(keep=key)
+        return artifact
+
+    def _evict(self, keep: ModelKey):
+        """
+        Desaloja modelos, del menos al más recientemente usado, hasta que los
+        residentes quepan en MODELS_MAX_MB (se llama con _lock tomado). Las
+        predicciones en curso conservan su referencia al modelo desalojado.
+
+        Args:
+            keep: Modelo recién cargado, que nunca se desaloja
+        """
+        if self._max_bytes <= 0:
+            return
+
+        used = sum(artifact.size_bytes for artifact in self._models.values())
+        for key in list(self._models):
+            if used <= self._max_bytes:
+                break
+            if key == keep:
+                continue
+            used -= self._models.pop(key).size_bytes
+            self._evictions += 1
+
+    def get(self, valvula: str, modelo: str) -> ModelArtifact:
+        """
+        Artefacto residente de un modelo; se carga la primera vez que se pide.
+
+        Raises:
+            KeyError: Modelo no soportado
+            FileNotFoundError: No hay artefacto para la válvula
+        """
+        key = (valvula, modelo)
+        self._record_access(key)
+        with self._lock:
+            artifact = self._models.get(key)
+            if artifact is not None:
+                self._models.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+        if artifact is not None:
+            return self._check(artifact)
+        return self._load_once(key)
+
+    def _load_once(self, key: ModelKey) -> ModelArtifact:
+        """Carga un modelo no residente (una sola carga a la vez por modelo)"""
+        valvula, modelo = key
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            artifact = self._models.get(key)
+            if artifact is None:
+                artifact = self._load(valvula, modelo)
+        return artifact
+
+    def models_for(self, valvula: str) -> Dict[str, ModelArtifact]:
+        """Artefactos disponibles de una válvula (los que no cargan quedan en get_info()['errores'])"""
+        models = {}
+        for modelo in self.models_available(valvula):
+            try:
+                models[modelo] = self.get(valvula, modelo)
+            except Exception as e:
+                self._errors[(valvula, modelo)] = str(e)
+        return models
+
+    def _check(self, artifact: ModelArtifact) -> ModelArtifact:
+        """Programa la recarga si el archivo del artefacto cambió de contenido (ver DataLoader._is_stale)"""
+        now = time.monotonic()
+        if now - artifact.checked_at < settings.MODELS_CHECK_INTERVAL:
+            return artifact
+        artifact.checked_at = now
+
+        try:
+            stat = artifact.path.stat()
+        except OSError:
+            # Si el archivo desapareció se sigue sirviendo la última versión cargada
+            return artifact
+
+        if stat.st_mtime == artifact.state.mtime and stat.st_size == artifact.state.size:
+            return artifact
+        # mtime/tamaño distintos: confirmar con el hash (un "touch" no reemplaza el modelo)
+        state = DataLoader._source_state(artifact.path)
+        if state.sha256 == artifact.state.sha256:
+            artifact.state = state
+            return artifact
+
+        self._schedule_reload(artifact.valvula, artifact.modelo)
+        return artifact
+
+    def _schedule_reload(self, valvula: str, modelo: str):
+        """Recarga en segundo plano (una sola en curso por artefacto)"""
+        key = (valvula, modelo)
+        with self._lock:
+            if key in self._reloading:
+                return
+            self._reloading.add(key)
+        self._reload_executor.submit(self._reload, key)
+
+    def _reload(self, key: ModelKey):
+        """Carga la versión nueva; si falla se conserva la anterior"""
+        try:
+            self._load(*key)
+        except Exception as e:
+            self._errors[key] = str(e)
+            print(f"⚠ Error recargando modelo {key[1]} de {key[0]}: {e}")
+        finally:
+            with self._lock:
+                self._reloading.discard(key)
+
+    def check_artifacts(self):
+        """Verifica si cambió algún artefacto cargado (mismo intervalo que los accesos)"""
+        for artifact in list(self._models.values()):
+            self._check(artifact)
+
+    def warm_up(self) -> Dict[str, List[str]]:
+        """
+        Precarga los modelos de más a menos pedidos (MODELS_ACCESS_STATS; sin historial,
+        en orden de válvula) hasta llenar MODELS_MAX_MB. El tamaño de cada modelo se
+        estima con el medido en cargas anteriores o, si no hay, con el del archivo.
+
+        Returns:
+            Modelos cargados por válvula
+        """
+        candidates = [(valvula, modelo) for valvula in self.get_valvulas() for modelo in self.models_available(valvula)]
+        candidates.sort(key=lambda key: -self._access.get(_key_name(key), 0))
+
+        used = sum(artifact.size_bytes for artifact in list(self._models.values()))
+        loaded: Dict[str, List[str]] = {}
+        for key in candidates:
+            if key in self._models:
+                continue
+            try:
+                paths = self._candidates(*key)
+                if not paths:
+                    continue
+                estimate = self._known_sizes.get(_key_name(key)) or paths[0].stat().st_size
+                if self._max_bytes > 0 and used + estimate > self._max_bytes:
+                    break
+                artifact = self._load_once(key)
+            except Exception as e:
+                self._errors[key] = str(e)
+                continue
+            used += artifact.size_bytes
+            loaded.setdefault(key[0], []).append(key[1])
+        return loaded
+
+    # ==================== ESTADÍSTICAS DE ACCESO ====================
+
+    def _record_access(self, key: ModelKey):
+        """Cuenta un pedido del modelo y, cada ACCESS_STATS_INTERVAL segundos, guarda las estadísticas"""
+        name = _key_name(key)
+        self._access[name] = self._access.get(name, 0) + 1
+        self._access_delta[name] = self._access_delta.get(name, 0) + 1
+        if time.monotonic() - self._stats_saved_at >= ACCESS_STATS_INTERVAL:
+            self.save_access_stats()
+
+    def _read_access_stats(self) -> Dict[str, Dict[str, int]]:
+        """Estadísticas guardadas ({"accesos": {...}, "bytes": {...}}); vacías si no hay o no se pueden leer"""
+        try:
+            with open(self.access_stats_path, "r", encoding="utf-8") as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            return {"accesos": {}, "bytes": {}}
+        for name, count in stats.get("accesos", {}).items():
+            self._access[name] = max(self._access.get(name, 0), int(count))
+        for name, size in stats.get("bytes", {}).items():
+            self._known_sizes.setdefault(name, int(size))
+        return stats
+
+    def save_access_stats(self):
+        """
+        Suma al archivo de estadísticas los accesos contados desde la última escritura
+        (lee, suma y reemplaza el archivo; si otro proceso escribe a la vez puede perderse
+        un intervalo de conteos, lo que no afecta el orden de precarga)
+        """
+        if not self._stats_lock.acquire(blocking=False):
+            return
+        try:
+            self._stats_saved_at = time.monotonic()
+            delta, self._access_delta = self._access_delta, {}
+            stats = self._read_access_stats()
+            accesos = stats.get("accesos", {})
+            for name, count in delta.items():
+                accesos[name] = int(accesos.get(name, 0)) + count
+            self._access.update(accesos)
+            stats = {"accesos": accesos, "bytes": {**stats.get("bytes", {}), **self._known_sizes}}
+
+            tmp = self.access_stats_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(stats, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.access_stats_path)
+        except OSError as e:
+            print(f"⚠ No se pudieron guardar las estadísticas de acceso de modelos: {e}")
+        finally:
+            self._stats_lock.release()
+
+    # ==================== PREDICCIÓN ====================
+
+    def predict(
+        self,
+        valvula: str,
+        features: Dict[str, Any],
+        fecha: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Predicción de volumen de entrada con el ensemble de modelos
+
+        Es predict_many con una sola fila.
+
+        Returns:
+            dict con prediccion (None si ningún modelo predijo), predicciones y
+            pesos por modelo, la versión de cada artefacto usado y el error de
+            cada modelo que falló
+        """
+        result = self.predict_many(valvula, [features], [fecha])
+        predictions = {
+            modelo: float(values[0]) for modelo, values in result["predicciones"].items() if not np.isnan(values[0])
+        }
+        weights = {modelo: float(result["pesos"][modelo][0]) for modelo in predictions}
+        prediction = float(result["prediccion"][0])
+
+        return {
+            "valvula_id": valvula,
+            "prediccion": None if np.isnan(prediction) else prediction,
+            "predicciones": predictions,
+            "pesos": weights,
+            "versiones": {modelo: result["versiones"][modelo] for modelo in predictions},
+            "errores": result["errores"],
+        }
+
+    def predict_many(
+        self,
+        valvula: str,
+        features: Sequence[Dict[str, Any]],
+        fechas: Sequence[Optional[Any]]
+    ) -> Dict[str, Any]:
+        """
+        Predicciones del ensemble para varias filas de una misma válvula
+
+        Cada modelo predice una sola vez sobre todas las filas: Prophet sobre
+        las fechas distintas (las filas sin fecha no tienen predicción de
+        Prophet); LightGBM, RandomForest y CatBoost sobre la matriz de
+        features apilada, en el orden con el que se entrenaron
+        (features_por_modelo, o las que guarda el propio modelo si la metadata
+        no las tiene). Un modelo no predice las filas a las que les falta
+        alguna de sus features (los valores None valen 0). El ensemble de cada
+        fila es el promedio ponderado con ENSEMBLE_WEIGHTS normalizados sobre
+        los modelos que predijeron esa fila.
+
+        Un modelo que falla, o al que le faltan features, no tumba la
+        predicción: se registra en `errores` y el ensemble sigue con los demás.
+
+        Args:
+            valvula: Válvula de todas las filas
+            features: Features de cada fila
+            fechas: Fecha de cada fila (None si no tiene)
+
+        Returns:
+            dict con prediccion (array, NaN si ningún modelo predijo la fila),
+            predicciones y pesos por modelo (arrays por fila, NaN/0 donde el
+            modelo no predijo), la versión de cada artefacto usado y el error
+            de cada modelo que falló (no aparece en predicciones)
+        """
+        models = self.models_for(valvula)
+        n = len(features)
+        predictions: Dict[str, np.ndarray] = {}
+        errors: Dict[str, str] = {}
+
+        prophet = models.get("prophet")
+        dated = [i for i, fecha in enumerate(fechas) if fecha is not None]
+        if prophet is not None and dated:
+            try:
+                # Prophet ordena por fecha: se predice sobre las fechas distintas y se reparte a las filas
+                dates = pd.to_datetime([fechas[i] for i in dated]).to_numpy()
+                unique, inverse = np.unique(dates, return_inverse=True)
+                yhat = prophet.model.predict(pd.DataFrame({"ds": unique}))["yhat"].to_numpy()
+                values = np.full(n, np.nan)
+                values[dated] = yhat[inverse]
+                predictions["prophet"] = values
+            except Exception as e:
+                errors["prophet"] = str(e)
+
+        matrices: Dict[Tuple[str, ...], Tuple[np.ndarray, np.ndarray]] = {}
+        for modelo in FEATURE_MODELS:
+            artifact = models.get(modelo)
+            if artifact is None or not artifact.features:
+                continue
+            columns = tuple(artifact.features)
+            try:
+                matrix = matrices.get(columns)
+                if matrix is None:
+                    matrix = matrices[columns] = _feature_matrix(features, columns)
+                X, complete = matrix
+                if not complete.all():
+                    errors[modelo] = _missing_features(features, columns, complete)
+                if complete.any():
+                    values = np.full(n, np.nan)
+                    values[complete] = artifact.predict(X).reshape(len(X))
+                    predictions[modelo] = values
+            except Exception as e:
+                errors[modelo] = str(e)
+
+        prediction, weights = ensemble(predictions, n)
+        return {
+            "valvula_id": valvula,
+            "prediccion": prediction,
+            "predicciones": predictions,
+            "pesos": weights,
+            "versiones": {modelo: models[modelo].version for modelo in predictions},
+            "errores": errors,
+        }
+
+    def predict_rows(
+        self,
+        valvulas: Sequence[str],
+        features: Sequence[Dict[str, Any]],
+        fechas: Sequence[Optional[Any]]
+    ) -> Dict[str, Any]:
+        """
+        Predicciones de filas de varias válvulas (predict_many una vez por válvula)
+
+        Returns:
+            dict con prediccion y predicciones por modelo (arrays en el orden
+            de las filas, NaN donde no hubo predicción), versiones y errores
+            de los modelos por válvula y las válvulas sin modelos
+        """
+        groups: Dict[str, List[int]] = {}
+        for i, valvula in enumerate(valvulas):
+            groups.setdefault(valvula, []).append(i)
+
+        n = len(valvulas)
+        prediction = np.full(n, np.nan)
+        by_model: Dict[str, np.ndarray] = {}
+        versions: Dict[str, Dict[str, str]] = {}
+        errors: Dict[str, Dict[str, str]] = {}
+        missing: List[str] = []
+
+        for valvula, positions in groups.items():
+            try:
+                self.models_available(valvula)
+            except KeyError:
+                missing.append(valvula)
+                continue
+
+            result = self.predict_many(valvula, [features[i] for i in positions], [fechas[i] for i in positions])
+            prediction[positions] = result["prediccion"]
+            for modelo, values in result["predicciones"].items():
+                if modelo not in by_model:
+                    by_model[modelo] = np.full(n, np.nan)
+                by_model[modelo][positions] = values
+            versions[valvula] = result["versiones"]
+            if result["errores"]:
+                errors[valvula] = result["errores"]
+
+        return {
+            "prediccion": prediction,
+            "predicciones": by_model,
+            "versiones": versions,
+            "errores": errors,
+            "valvulas_no_encontradas": missing,
+        }
+
+    # ==================== INFO ====================
+
+    @property
+    def content_version(self) -> str:
+        """Hash combinado de los artefactos cargados (cambia con cada reemplazo en caliente)"""
+        digest = hashlib.sha256()
+        for (valvula, modelo), artifact in sorted(self._models.items()):
+            digest.update(f"{valvula}/{modelo}={artifact.state.sha256};".encode())
+        return digest.hexdigest()
+
+    def get_info(self) -> Dict[str, Any]:
+        """
+        Modelos residentes en orden LRU (el primero es el próximo candidato a desalojo)
+        con su memoria estimada, hash, tiempo de carga y accesos; uso del presupuesto,
+        contadores y los modelos más pedidos que no están en memoria
+        """
+        meta = self._metadata
+        with self._lock:
+            residents = list(self._models.items())
+            stats = {
+                "cargas": self._loads,
+                "reemplazos": self._swaps,
+                "hits": self._hits,
+                "misses": self._misses,
+                "desalojos": self._evictions,
+            }
+        requests = stats["hits"] + stats["misses"]
+        resident_names = {_key_name(key) for key, _ in residents}
+        not_resident = sorted(
+            ((name, count) for name, count in self._access.items() if name not in resident_names),
+            key=lambda item: -item[1]
+        )
+
+        return {
+            "models_path": str(self.models_path),
+            "metadata": meta.path.name if meta.path else None,
+            **stats,
+            "hit_ratio": round(stats["hits"] / requests, 4) if requests else None,
+            "residentes": len(residents),
+            "used_bytes": sum(artifact.size_bytes for _, artifact in residents),
+            "max_bytes": self._max_bytes or None,
+            "modelos": [
+                {
+                    "valvula": artifact.valvula,
+                    "modelo": artifact.modelo,
+                    "archivo": artifact.path.name,
+                    "sha256": artifact.state.sha256,
+                    "version": artifact.version,
+                    "size": artifact.state.size,
+                    "memoria_bytes": artifact.size_bytes,
+                    "accesos": self._access.get(_key_name(key), 0),
+                    "load_ms": round(artifact.load_seconds * 1000, 2),
+                    "reemplazos": artifact.swaps,
+                    "features": len(artifact.features),
+                    "evaluador": "numpy" if artifact.flat is not None else "predict",
+                    "numpy_max_filas": artifact.flat_max_rows if artifact.flat is not None else None,
+                }
+                for key, artifact in residents
+            ],
+            "no_residentes": [
+                {"modelo": name, "accesos": count, "memoria_bytes": self._known_sizes.get(name)}
+                for name, count in not_resident[:20]
+            ],
+            "errores": {f"{v}/{m}": error for (v, m), error in sorted(self._errors.items())},
+        }
+
+
+# Instancia global
+model_registry = ModelRegistry()
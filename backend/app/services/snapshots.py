@@ -0,0 +1,195 @@
+"""Snapshots columnares (Parquet) de los CSVs de BALANC-IA
+
+Cada CSV generado por el notebook se compila a un archivo Parquet tipado
+junto a la fuente (ej: Tabla_Balances_Virtuales.csv -> Tabla_Balances_Virtuales.parquet).
+El snapshot guarda en su metadata el mtime, el tamaño y el SHA-256 del CSV del
+que se compiló. El DataLoader lo usa solo si el CSV actual es ese mismo
+archivo: mismo tamaño y mismo mtime o, si el mtime cambió, mismo hash (un CSV
+restaurado con un mtime anterior, con rsync -a, cp -p o git checkout, no pasa
+por fresco). En ese caso reutiliza el hash guardado en lugar de recalcularlo;
+en cualquier otro vuelve a leer el CSV.
+
+Uso (desde backend/):
+    python -m app.services.snapshots
+"""
+import hashlib
+import importlib.util
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from app.config import settings
+
+
+SNAPSHOT_SUFFIX = ".parquet"
+
+# Clave de la metadata del esquema Parquet con el estado del CSV fuente
+SOURCE_METADATA_KEY = b"balancia.source"
+
+
+def snapshots_available() -> bool:
+    """Indica si hay un motor Parquet instalado (pyarrow)"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def snapshot_path(csv_path: Path) -> Path:
+    """Ruta del snapshot asociado a un CSV"""
+    return csv_path.with_suffix(SNAPSHOT_SUFFIX)
+
+
+def file_sha256(path: Path) -> str:
+    """Hash SHA-256 del contenido de un archivo (leído por bloques)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_source(csv_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Estado del CSV (mtime, size, sha256) con el que se compiló el snapshot.
+    None si no hay snapshot o no lo registra (compilado por una versión anterior).
+    Solo lee el footer del Parquet.
+    """
+    snap = snapshot_path(csv_path)
+    if not snap.exists():
+        return None
+
+    import pyarrow.parquet as pq
+
+    try:
+        raw = (pq.read_schema(snap).metadata or {}).get(SOURCE_METADATA_KEY)
+        return json.loads(raw) if raw else None
+    except Exception:
+        return None
+
+
+def fresh_source(csv_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Estado actual del CSV (mtime, size, sha256) si el snapshot se compiló de este
+    mismo contenido; None si no hay snapshot fresco
+
+    Con el mismo tamaño y mtime se confía en el hash guardado (sin leer el CSV);
+    si solo cambió el mtime se compara el hash del CSV con el guardado.
+    """
+    source = snapshot_source(csv_path)
+    if source is None:
+        return None
+
+    stat = csv_path.stat()
+    if stat.st_size != source.get("size"):
+        return None
+    if stat.st_mtime != source.get("mtime") and file_sha256(csv_path) != source.get("sha256"):
+        return None
+    return {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": source["sha256"]}
+
+
+def is_fresh(csv_path: Path) -> bool:
+    """El snapshot existe y se compiló del contenido actual del CSV fuente"""
+    return fresh_source(csv_path) is not None
+
+
+def read_snapshot(csv_path: Path, index_col: Optional[int] = None) -> pd.DataFrame:
+    """
+    Lee el snapshot de un CSV
+
+    Args:
+        csv_path: Ruta del CSV fuente
+        index_col: Posición de la columna a usar como índice (igual que en pd.read_csv)
+    """
+    df = pd.read_parquet(snapshot_path(csv_path))
+
+    if index_col is not None:
+        df = df.set_index(df.columns[index_col])
+        # pd.read_csv deja sin nombre un índice cuya cabecera está vacía
+        if str(df.index.name).startswith("Unnamed:"):
+            df.index.name = None
+
+    return df
+
+
+def write_snapshot(df: pd.DataFrame, csv_path: Path, source: Dict[str, Any]) -> Path:
+    """
+    Escribe el snapshot de forma atómica (no deja archivos a medias para otros workers)
+
+    Args:
+        df: DataFrame parseado del CSV
+        csv_path: Ruta del CSV fuente
+        source: Estado del CSV del que se parseó df (mtime, size, sha256), tomado antes de leerlo
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SOURCE_METADATA_KEY] = json.dumps(source).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    snap = snapshot_path(csv_path)
+    tmp = snap.with_name(f".{snap.name}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, snap)
+    return snap
+
+
+def compile_snapshots(data_path: Optional[Path] = None, force: bool = False) -> Dict[str, str]:
+    """
+    Compila todos los CSVs de BALANC-IA a snapshots Parquet
+
+    Args:
+        data_path: Carpeta raíz de los CSVs (por defecto settings.DATA_PATH)
+        force: Recompilar aunque el snapshot esté al día
+
+    Returns:
+        dict: Ruta relativa de cada CSV -> estado ("compilado", "al día" o "error: ...")
+    """
+    if not snapshots_available():
+        raise RuntimeError("pyarrow no está instalado: no se pueden generar snapshots Parquet")
+
+    # Import diferido: data_loader depende de este módulo
+    from app.services.data_loader import DataLoader
+    from app.services.datasets import schema_for_path
+
+    data_path = Path(data_path or settings.DATA_PATH)
+    loader = DataLoader()
+    loader.data_path = data_path
+
+    results = {}
+    for csv_path in sorted(data_path.rglob("*.csv")):
+        relative_path = csv_path.relative_to(data_path).as_posix()
+
+        if not force and is_fresh(csv_path):
+            results[relative_path] = "al día"
+            continue
+
+        try:
+            # Estado del CSV antes de parsearlo (si cambia durante la lectura el snapshot no pasa por fresco)
+            state = loader._source_state(csv_path)
+            loader._source_states[relative_path] = state
+            source = {"mtime": state.mtime, "size": state.size, "sha256": state.sha256}
+
+            # Los datasets registrados se compilan ya tipados según su esquema
+            schema = schema_for_path(relative_path)
+            if schema is not None:
+                df = loader._parse_dataset(schema, csv_path)
+            else:
+                df = loader._parse_csv(
+                    csv_path, relative_path, decimal=",", float_precision="round_trip"
+                )
+            write_snapshot(df, csv_path, source)
+            results[relative_path] = "compilado"
+        except Exception as e:
+            results[relative_path] = f"error: {str(e)}"
+
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    for path, status in compile_snapshots(force="--force" in sys.argv).items():
+        print(f"{status:>12}  {path}")
@@ -0,0 +1,258 @@
+"""Evaluador NumPy de ensembles de árboles (RandomForest de scikit-learn y LightGBM)
+
+Para los lotes chicos que manda la API, predict de scikit-learn y de LightGBM
+cuesta sobre todo overhead por llamada (validación de la entrada, hilos de
+joblib, el wrapper de Python de LightGBM), no recorrer los árboles. FlatForest
+aplana todos los árboles del modelo en arrays contiguos de nodos:
+
+    feature    índice de la feature que se compara (-1 en las hojas)
+    threshold  umbral: x <= threshold va a la izquierda
+    left/right hijos (en las hojas apuntan a la misma hoja)
+    value      valor de la hoja
+    missing    cómo trata el nodo los faltantes (ver MISSING_*)
+    default_left  a dónde van los faltantes
+
+y predice recorriendo todos los árboles para todas las filas a la vez: cada
+paso avanza un nivel en las (filas x árboles) posiciones con operaciones
+vectorizadas (np.take sobre arrays 1-D), tantos pasos como la profundidad
+máxima (las hojas apuntan a sí mismas, así que los árboles menos profundos
+simplemente se quedan quietos).
+
+El costo crece con filas x árboles x profundidad (work_per_row) sin el
+paralelismo en C de los predict originales: gana en lotes chicos (latencia de
+un request) y pierde en lotes grandes, por eso el registro lo usa solo hasta
+NUMPY_TREES_MAX_WORK_* nodos visitados por llamada.
+
+    RandomForest:  promedio de las hojas (scale = 1 / árboles)
+    LightGBM:      suma de las hojas (objetivos de regresión con salida identidad)
+
+Los modelos que no se pueden aplanar (splits categóricos de LightGBM,
+objetivos con transformación de salida, multi-output) lanzan
+UnsupportedModel y se siguen prediciendo con su predict.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+# Tratamiento de faltantes por nodo
+MISSING_NONE = 0    # NaN se evalúa como 0 (LightGBM missing_type=None)
+MISSING_NAN = 1     # NaN va a default_left (scikit-learn, LightGBM missing_type=NaN)
+MISSING_ZERO = 2    # NaN y 0 van a default_left (LightGBM missing_type=Zero)
+
+# Umbral con el que LightGBM considera un valor igual a cero
+_ZERO_THRESHOLD = 1e-35
+
+# Objetivos de LightGBM cuya salida es la suma de las hojas sin transformar
+_IDENTITY_OBJECTIVES = ("regression", "regression_l1", "huber", "fair", "quantile", "mape")
+
+
+class UnsupportedModel(ValueError):
+    """El modelo no se puede aplanar: se predice con su propio predict"""
+
+
+@dataclass
+class FlatForest:
+    """Árboles de un ensemble aplanados en arrays de nodos contiguos"""
+    feature: np.ndarray
+    threshold: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    value: np.ndarray
+    missing: np.ndarray
+    default_left: np.ndarray
+    roots: np.ndarray
+    depth: int
+    scale: float
+    n_features: int
+    # scikit-learn compara las features en float32
+    float32_input: bool = False
+    # Derivados para el recorrido: hijos intercalados (derecho, izquierdo) y feature >= 0 por nodo
+    _children: np.ndarray = field(init=False, repr=False)
+    _feature_index: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._children = np.stack([self.right, self.left], axis=1).ravel().astype(np.intp)
+        self._feature_index = np.maximum(self.feature, 0).astype(np.intp)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def work_per_row(self) -> int:
+        """Nodos que visita cada fila: árboles x profundidad (al menos un paso)"""
+        return self.n_trees * max(self.depth, 1)
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria de los arrays de nodos"""
+        return sum(
+            array.nbytes for array in (
+                self.feature, self.threshold, self.left, self.right,
+                self.value, self.missing, self.default_left, self.roots,
+                self._children, self._feature_index
+            )
+        )
+
+    # ==================== EXPORTADORES ====================
+
+    @classmethod
+    def from_model(cls, model: Any) -> "FlatForest":
+        """Aplana un RandomForestRegressor / ExtraTreesRegressor o un LGBMRegressor / Booster"""
+        if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+            return cls.from_sklearn(model)
+        booster = getattr(model, "booster_", None) or (model if hasattr(model, "dump_model") else None)
+        if booster is not None:
+            return cls.from_lightgbm(booster)
+        raise UnsupportedModel(f"{type(model).__name__} no es un ensemble de árboles soportado")
+
+    @classmethod
+    def from_sklearn(cls, model: Any) -> "FlatForest":
+        """Ensemble de scikit-learn (promedio de árboles de regresión de una salida)"""
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise UnsupportedModel("Solo se soportan ensembles de una salida")
+
+        nodes: Dict[str, List[np.ndarray]] = {name: [] for name in ("feature", "threshold", "left", "right", "value", "default_left")}
+        roots, depth, offset = [], 0, 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left < 0
+            own = np.arange(offset, offset + n, dtype=np.int32)
+            nodes["feature"].append(np.where(is_leaf, -1, tree.feature).astype(np.int32))
+            nodes["threshold"].append(np.where(is_leaf, 0.0, tree.threshold))
+            nodes["left"].append(np.where(is_leaf, own, tree.children_left + offset).astype(np.int32))
+            nodes["right"].append(np.where(is_leaf, own, tree.children_right + offset).astype(np.int32))
+            nodes["value"].append(tree.value.reshape(n, -1)[:, 0].astype(np.float64))
+            missing_left = getattr(tree, "missing_go_to_left", None)
+            nodes["default_left"].append(
+                np.zeros(n, dtype=bool) if missing_left is None else np.asarray(missing_left, dtype=bool)
+            )
+            roots.append(offset)
+            depth = max(depth, int(tree.max_depth))
+            offset += n
+
+        feature = np.concatenate(nodes["feature"])
+        return cls(
+            feature=feature,
+            threshold=np.concatenate(nodes["threshold"]),
+            left=np.concatenate(nodes["left"]),
+            right=np.concatenate(nodes["right"]),
+            value=np.concatenate(nodes["value"]),
+            missing=np.full(len(feature), MISSING_NAN, dtype=np.int8),
+            default_left=np.concatenate(nodes["default_left"]),
+            roots=np.array(roots, dtype=np.int32),
+            depth=depth,
+            scale=1.0 / len(roots),
+            n_features=int(model.n_features_in_),
+            float32_input=True
+        )
+
+    @classmethod
+    def from_lightgbm(cls, booster: Any) -> "FlatForest":
+        """Booster de LightGBM (dump_model) con objetivo de regresión"""
+        dump = booster.dump_model()
+        objective = str(dump.get("objective", "")).split(" ")[0]
+        if objective not in _IDENTITY_OBJECTIVES:
+            raise UnsupportedModel(f"Objetivo de LightGBM no soportado: {objective or '?'}")
+        if dump.get("num_tree_per_iteration", 1) != 1 or dump.get("average_output"):
+            raise UnsupportedModel("Solo se soportan boosters de una salida sin average_output")
+
+        trees = dump["tree_info"]
+        best = getattr(booster, "best_iteration", 0) or 0
+        if best > 0:
+            # predict usa best_iteration cuando el modelo se entrenó con early stopping
+            trees = trees[:best]
+
+        feature: List[int] = []
+        threshold: List[float] = []
+        left: List[int] = []
+        right: List[int] = []
+        value: List[float] = []
+        missing: List[int] = []
+        default_left: List[bool] = []
+        roots: List[int] = []
+        depth = 0
+
+        def add(node: Dict[str, Any], level: int) -> int:
+            nonlocal depth
+            index = len(feature)
+            feature.append(-1)
+            threshold.append(0.0)
+            left.append(index)
+            right.append(index)
+            value.append(0.0)
+            missing.append(MISSING_NONE)
+            default_left.append(False)
+            if "leaf_value" in node:
+                value[index] = float(node["leaf_value"])
+                depth = max(depth, level)
+                return index
+
+            if node.get("decision_type", "<=") != "<=":
+                raise UnsupportedModel("Splits categóricos de LightGBM no soportados")
+            feature[index] = int(node["split_feature"])
+            threshold[index] = float(node["threshold"])
+            missing[index] = {"None": MISSING_NONE, "NaN": MISSING_NAN, "Zero": MISSING_ZERO}[node.get("missing_type", "None")]
+            default_left[index] = bool(node.get("default_left", True))
+            left[index] = add(node["left_child"], level + 1)
+            right[index] = add(node["right_child"], level + 1)
+            return index
+
+        for tree in trees:
+            roots.append(add(tree["tree_structure"], 0))
+
+        return cls(
+            feature=np.array(feature, dtype=np.int32),
+            threshold=np.array(threshold, dtype=np.float64),
+            left=np.array(left, dtype=np.int32),
+            right=np.array(right, dtype=np.int32),
+            value=np.array(value, dtype=np.float64),
+            missing=np.array(missing, dtype=np.int8),
+            default_left=np.array(default_left, dtype=bool),
+            roots=np.array(roots, dtype=np.int32),
+            depth=depth,
+            scale=1.0,
+            n_features=int(dump.get("max_feature_idx", -1)) + 1
+        )
+
+    # ==================== EVALUADOR ====================
+
+    def predict(self, X: Any) -> np.ndarray:
+        """
+        Predicción para una matriz (filas x features, en el orden del entrenamiento)
+
+        Todas las (filas x árboles) posiciones avanzan un nivel por paso. X y los
+        nodos se indexan como arrays 1-D: X[fila, feature] es
+        X.ravel()[fila * n_features + feature] y el hijo es
+        _children[2 * nodo + va_a_la_izquierda].
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32 if self.float32_input else np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Se esperaban {self.n_features} features, recibidas {X.shape[-1]}")
+
+        values = X.ravel()
+        offsets = (np.arange(len(X), dtype=np.intp) * self.n_features)[:, None]
+        nodes = np.broadcast_to(self.roots.astype(np.intp), (len(X), self.n_trees))
+        route_missing = bool(np.isnan(values).any() or (self.missing == MISSING_ZERO).any())
+        for _ in range(self.depth):
+            x = values.take(offsets + self._feature_index.take(nodes))
+            go_left = x <= self.threshold.take(nodes)
+            if route_missing:
+                go_left = self._route_missing(x, go_left, nodes)
+            nodes = self._children.take(nodes * 2 + go_left)
+
+        return self.value.take(nodes).sum(axis=1) * self.scale
+
+    def _route_missing(self, x: np.ndarray, go_left: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """Dirección de los faltantes según el tratamiento de cada nodo"""
+        missing = self.missing.take(nodes)
+        is_nan = np.isnan(x)
+        # missing_type=None: NaN se compara como 0
+        go_left = np.where(is_nan & (missing == MISSING_NONE), 0.0 <= self.threshold.take(nodes), go_left)
+        to_default = (is_nan & (missing != MISSING_NONE)) | (
+            (missing == MISSING_ZERO) & (np.abs(np.nan_to_num(x)) <= _ZERO_THRESHOLD)
+        )
+        return np.where(to_default, self.default_left.take(nodes), go_left)
@@ -0,0 +1,190 @@
+"""Vistas materializadas: respuestas pre-serializadas por versión de datos
+
+Las respuestas que solo dependen de los CSVs (KPIs, evolución, top de
+válvulas...) se calculan una vez por data_version y se guardan ya
+serializadas (bytes JSON, o bytes en otro formato si el builder ya los
+devuelve serializados). Cada request cuesta una búsqueda en un dict.
+Cuando los datos cambian se sigue sirviendo la versión anterior mientras la
+nueva se recalcula en segundo plano. Mientras tanto esas respuestas no
+corresponden a la versión de datos actual: se marcan en el StaleTracker del
+request (ver track_stale_views) para que el middleware de ETags no les asigne
+un validador.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.services.data_loader import data_loader
+
+
+# Máximo de vistas guardadas (una por combinación de parámetros)
+MAX_VIEWS = 256
+
+ViewKey = Tuple[str, Tuple[Hashable, ...]]
+
+
+class StaleTracker:
+    """Marca si un request sirvió alguna vista calculada con una versión de datos anterior"""
+
+    def __init__(self):
+        self.stale = False
+
+
+_stale_tracker: ContextVar[Optional[StaleTracker]] = ContextVar("stale_tracker", default=None)
+
+
+def track_stale_views() -> StaleTracker:
+    """
+    Registra las vistas desactualizadas que sirva el request en curso
+
+    Se llama antes de ejecutar el handler: el handler corre en una copia del
+    contexto (tarea o threadpool) que comparte el mismo StaleTracker.
+    """
+    tracker = StaleTracker()
+    _stale_tracker.set(tracker)
+    return tracker
+
+
+@dataclass
+class MaterializedView:
+    """Respuesta serializada junto con la versión de datos con la que se calculó"""
+    body: bytes
+    version: int
+
+
+class MaterializedViews:
+    """Almacén de vistas materializadas, indexado por nombre de vista y parámetros"""
+
+    def __init__(self, max_views: int = MAX_VIEWS):
+        self.max_views = max_views
+        self._views: "OrderedDict[ViewKey, MaterializedView]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[ViewKey, Future] = {}
+        self._refreshing: set = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="view-refresh")
+
+    def serve(
+        self, name: str, builder: Callable[..., Any], *args: Hashable, media_type: str = "application/json"
+    ) -> Response:
+        """
+        Respuesta de una vista, calculándola solo si no existe
+
+        Args:
+            name: Nombre de la vista
+            builder: Función que calcula la respuesta (modelos Pydantic, dicts o listas,
+                o bytes ya serializados en media_type)
+            *args: Parámetros de la vista (forman parte de la clave)
+            media_type: Media type de los bytes que devuelve el builder
+        """
+        return Response(content=self.get_bytes(name, builder, *args), media_type=media_type)
+
+    def get_bytes(self, name: str, builder: Callable[..., Any], *args: Hashable) -> bytes:
+        """Bytes JSON de una vista (ver serve)"""
+        # Detectar cambios en los CSVs aunque ninguna ruta esté leyendo los DataFrames
+        data_loader.check_sources()
+
+        key = (name, args)
+        view = self._views.get(key)
+        if view is None:
+            return self._compute_once(key, builder).body
+
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+
+        if view.version != data_loader.data_version:
+            self._schedule_refresh(key, builder)
+            tracker = _stale_tracker.get()
+            if tracker is not None:
+                tracker.stale = True
+        return view.body
+
+    def clear(self):
+        """Descarta todas las vistas"""
+        with self._lock:
+            self._views.clear()
+
+    def get_info(self) -> Dict[str, Any]:
+        """Vistas materializadas y la versión de datos de cada una"""
+        with self._lock:
+            views = list(self._views.items())
+        return {
+            "data_version": data_loader.data_version,
+            "views": [
+                {"view": name, "params": list(args), "version": view.version, "bytes": len(view.body)}
+                for (name, args), view in views
+            ],
+        }
+
+    @staticmethod
+    def render(content: Any) -> bytes:
+        """Serializa igual que la respuesta JSON por defecto de FastAPI (los bytes se guardan tal cual)"""
+        if isinstance(content, bytes):
+            return content
+        return JSONResponse(content=jsonable_encoder(content)).body
+
+    def _compute_once(self, key: ViewKey, builder: Callable[..., Any]) -> MaterializedView:
+        """Calcula una vista; los requests concurrentes esperan el mismo cálculo"""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            view = self._compute(key, builder)
+            future.set_result(view)
+            return view
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _compute(self, key: ViewKey, builder: Callable[..., Any]) -> MaterializedView:
+        """Ejecuta el builder y guarda el resultado serializado"""
+        # Versión leída antes de calcular: si los datos cambian durante el cálculo, se recalcula
+        version = data_loader.data_version
+        view = MaterializedView(body=self.render(builder(*key[1])), version=version)
+
+        with self._lock:
+            self._views[key] = view
+            self._views.move_to_end(key)
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+
+        return view
+
+    def _schedule_refresh(self, key: ViewKey, builder: Callable[..., Any]):
+        """Recalcula una vista en segundo plano (una sola recarga en curso por vista)"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        self._executor.submit(self._refresh, key, builder)
+
+    def _refresh(self, key: ViewKey, builder: Callable[..., Any]):
+        """Recalcula una vista; si falla se sigue sirviendo la anterior"""
+        try:
+            self._compute(key, builder)
+        except Exception as e:
+            print(f"⚠ Error recalculando vista {key[0]}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+# Instancia global de vistas materializadas
+materialized_views = MaterializedViews()
@@ -0,0 +1,95 @@
+"""
+Benchmark: exportación por streaming vs payload completo en memoria
+
+Genera una tabla de balances sintética (N válvulas x M períodos) y, para cada
+formato (NDJSON, CSV, Arrow IPC), compara:
+  - completo: se serializa todo y se junta en un solo bytes (lo que haría una
+    respuesta normal)
+  - streaming: app.api.streaming.stream_frames válvula por válvula, descartando
+    cada bloque después de "enviarlo"
+
+Mide el tiempo y el pico de memoria de Python (tracemalloc) y verifica que ambos
+modos producen el mismo contenido (mismos bytes en NDJSON y CSV, misma tabla en
+Arrow, donde los bytes dependen del corte de los batches).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_export_streaming --valves 2000 --periods 120
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.api.streaming import ARROW_AVAILABLE, stream_frames
+
+
+def build_balances(valves: int, periods: int) -> pd.DataFrame:
+    """Tabla de balances sintética con los tipos del registro de datasets"""
+    rng = np.random.default_rng(42)
+    n = valves * periods
+    entrada = rng.uniform(300, 500, n)
+    salida = entrada - rng.uniform(0, 150, n)
+    periodo = np.tile(202001 + (np.arange(periods) // 12) * 100 + np.arange(periods) % 12, valves)
+    return pd.DataFrame({
+        "PUNTO": pd.Categorical(np.repeat([f"VALVULA_{i + 1}" for i in range(valves)], periods)),
+        "PERIODO": periodo.astype("int32"),
+        "FECHA": pd.to_datetime(periodo.astype(str), format="%Y%m"),
+        "ENTRADA_M3": entrada,
+        "SALIDA_M3": salida,
+        "PERDIDAS_M3": entrada - salida,
+        "INDICE_PERDIDAS_%": (entrada - salida) / entrada * 100,
+        "ES_PRONOSTICO": rng.random(n) < 0.1,
+    })
+
+
+def measure(fn):
+    """(resultado, segundos, pico de memoria en MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--valves", type=int, default=2000, help="Válvulas")
+    parser.add_argument("--periods", type=int, default=120, help="Períodos por válvula")
+    parser.add_argument("--chunk-rows", type=int, default=50_000, help="Máximo de filas por bloque")
+    args = parser.parse_args()
+
+    df = build_balances(args.valves, args.periods)
+    frames = [group for _, group in df.groupby("PUNTO", sort=True, observed=True)]
+    print(f"{len(df):,} filas ({args.valves:,} válvulas x {args.periods} períodos)")
+
+    formats = ["ndjson", "csv"] + (["arrow"] if ARROW_AVAILABLE else [])
+    for formato in formats:
+        def full():
+            return b"".join(stream_frames(frames, formato, df, chunk_rows=len(df)))
+
+        def streaming():
+            # Cada bloque se descarta después de enviarlo (solo se cuentan los bytes)
+            return sum(len(chunk) for chunk in stream_frames(frames, formato, df, chunk_rows=args.chunk_rows))
+
+        payload, full_time, full_peak = measure(full)
+        size, stream_time, stream_peak = measure(streaming)
+
+        streamed = b"".join(stream_frames(frames, formato, df, chunk_rows=args.chunk_rows))
+        if formato == "arrow":
+            import pyarrow as pa
+            same = pa.ipc.open_stream(streamed).read_all().equals(pa.ipc.open_stream(payload).read_all())
+        else:
+            same = streamed == payload
+        assert same, f"{formato}: el stream no coincide con el payload completo"
+        del payload, streamed
+
+        print(f"  {formato:<7} {size / 1e6:>8.1f} MB | completo {full_time:>6.2f} s, pico {full_peak:>8.1f} MB | "
+              f"streaming {stream_time:>6.2f} s, pico {stream_peak:>7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
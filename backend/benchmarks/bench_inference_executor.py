@@ -0,0 +1,113 @@
+"""
+Benchmark: inferencia en el event loop vs en el ejecutor de inferencia
+
+Simula --concurrency clientes que mandan --requests predicciones de una fila
+(con Prophet y los tres modelos de árboles) y mide, para cada modo:
+  - inline: model_registry.predict llamado directo en la corrutina (lo que
+    haría una ruta async sin ejecutor: bloquea el event loop)
+  - workers=N: app.services.inference.InferenceExecutor con N procesos
+    (0 = un hilo del mismo proceso)
+
+Reporta throughput, percentiles de latencia por request, el retraso del event
+loop (cuánto tarda en despertar un asyncio.sleep de 10 ms: lo que esperaría
+cualquier otra ruta del dashboard) y, para el ejecutor, la profundidad máxima
+de la cola y sus percentiles de espera/ejecución. Con --queue-size chico se
+ven los rechazos por backpressure.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_inference_executor --workers 0 1 2 4 --concurrency 16 --requests 400
+"""
+import argparse
+import asyncio
+import time
+import warnings
+
+import numpy as np
+
+from app.services import inference
+from app.services.inference import InferenceExecutor, InferenceQueueFull
+from app.services.model_registry import model_registry
+
+
+PROBE_INTERVAL = 0.01
+
+
+async def probe_loop_lag(lags: list, stop: asyncio.Event):
+    """Retraso del event loop: cuánto más de PROBE_INTERVAL tarda en volver un sleep"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def load(call, requests: int, concurrency: int):
+    """Ejecuta `requests` llamadas con `concurrency` clientes; devuelve (latencias, rechazos, segundos, retrasos del loop)"""
+    latencies, rejected = [], 0
+    queue = iter(range(requests))
+
+    async def client():
+        nonlocal rejected
+        for _ in queue:
+            start = time.perf_counter()
+            try:
+                await call()
+            except InferenceQueueFull:
+                rejected += 1
+                await asyncio.sleep(0.005)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    lags, stop = [], asyncio.Event()
+    prober = asyncio.create_task(probe_loop_lag(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+    return np.array(latencies) * 1000, rejected, elapsed, np.array(lags or [0.0]) * 1000
+
+
+def report(name: str, latencies, rejected: int, elapsed: float, lags):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"  {name:<10} {len(latencies) / elapsed:>7.1f} req/s | latencia p50 {p50:>7.1f} ms p99 {p99:>7.1f} ms | "
+          f"retraso del loop p99 {np.percentile(lags, 99):>7.1f} ms máx {lags.max():>7.1f} ms | rechazos {rejected}")
+
+
+async def run(args, row):
+    async def inline():
+        model_registry.predict(row["valvula"], row["features"], row["fecha"])
+
+    model_registry.warm_up()
+    report("inline", *await load(inline, args.requests, args.concurrency))
+
+    for workers in args.workers:
+        executor = InferenceExecutor(workers=workers, queue_size=args.queue_size, timeout=60)
+        executor.start()
+        call = lambda: executor.run(inference.predict, row["valvula"], row["features"], row["fecha"])
+        report(f"workers={workers}", *await load(call, args.requests, args.concurrency))
+        info = executor.get_info()
+        latencias = info["latencias_ms"]
+        print(f"  {'':<10} cola máx {max(info['max_pendientes'] - executor.slots, 0):>3} "
+              f"(capacidad {info['capacidad']}) | espera p50 {latencias['espera']['p50']:>7.1f} ms "
+              f"p99 {latencias['espera']['p99']:>7.1f} ms | ejecución p50 {latencias['ejecucion']['p50']:>7.1f} ms")
+        executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4], help="Procesos del pool (0 = hilo)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument("--requests", type=int, default=400, help="Predicciones por modo")
+    parser.add_argument("--queue-size", type=int, default=32, help="Tareas en espera antes de rechazar")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    valvula = model_registry.get_valvulas()[0]
+    features = {name: 10.0 for name in model_registry.get(valvula, "randomforest").features}
+    row = {"valvula": valvula, "features": features, "fecha": "2025-08-01"}
+    print(f"{valvula}: {args.requests} predicciones, {args.concurrency} clientes")
+    asyncio.run(run(args, row))
+
+
+if __name__ == "__main__":
+    main()
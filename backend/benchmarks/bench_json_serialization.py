@@ -0,0 +1,156 @@
+"""
+Benchmark: un objeto Pydantic por fila vs serialización directa desde columnas
+
+Genera balances y puntos de scatter sintéticos de N filas y compara:
+  - pydantic: BalanceData / CorrelationScatterPoint por fila + serialización de FastAPI
+  - columnas: filas armadas desde las columnas NumPy (app.api.fastjson) + orjson
+
+Verifica que ambos modos producen el mismo JSON antes de medir.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_json_serialization --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.fastjson import ORJSON_AVAILABLE, FastJSONResponse, records, float_column, str_column
+from app.api.routes.balances import balance_records
+from app.schemas.responses import (
+    BalanceData,
+    BalanceKPIs,
+    BalanceResponse,
+    CorrelationScatterPoint,
+    CorrelationScatterResponse,
+)
+
+
+KPIS = BalanceKPIs(indice_promedio=12.5, total_perdidas=1000.0, meses_analizados=0)
+
+
+def build_balances(n: int) -> pd.DataFrame:
+    """Balances sintéticos con los tipos del registro de datasets (~5% de faltantes)"""
+    rng = np.random.default_rng(42)
+    entrada = rng.uniform(300, 500, n)
+    salida = entrada - rng.uniform(0, 150, n)
+    entrada[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        "PERIODO": (202001 + np.arange(n) % 12).astype("int32"),
+        "FECHA": pd.Timestamp("2020-01-01") + pd.to_timedelta(np.arange(n) % 3650, unit="D"),
+        "ENTRADA_M3": entrada,
+        "SALIDA_M3": salida,
+        "PERDIDAS_M3": entrada - salida,
+        "INDICE_PERDIDAS_%": (entrada - salida) / entrada * 100,
+        "ES_PRONOSTICO": rng.random(n) < 0.1,
+    })
+
+
+def build_scatter(n: int) -> pd.DataFrame:
+    """Puntos de scatter sintéticos (dos variables, válvula categórica, período)"""
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "VALVULA": pd.Categorical([f"VALVULA_{i % 20 + 1}" for i in range(n)]),
+        "PERIODO": (202001 + np.arange(n) % 12).astype("int32"),
+        "X": rng.normal(400, 50, n),
+        "var_y_temp": rng.normal(0.1, 0.05, n),
+    })
+
+
+def balances_pydantic(df: pd.DataFrame) -> bytes:
+    """Camino previo de /api/balances/{valvula_id}"""
+    balances = []
+    for _, row in df.iterrows():
+        balances.append(BalanceData(
+            periodo=str(row['PERIODO']),
+            fecha=pd.to_datetime(row['FECHA']) if pd.notna(row['FECHA']) else None,
+            entrada=float(row['ENTRADA_M3']) if pd.notna(row['ENTRADA_M3']) else None,
+            salida=float(row['SALIDA_M3']) if pd.notna(row['SALIDA_M3']) else None,
+            perdidas=float(row['PERDIDAS_M3']) if pd.notna(row['PERDIDAS_M3']) else None,
+            indice=float(row['INDICE_PERDIDAS_%']) if pd.notna(row['INDICE_PERDIDAS_%']) else None,
+            es_pronostico=bool(row.get('ES_PRONOSTICO', False))
+        ))
+    response = BalanceResponse(valvula_id="VALVULA_X", kpis=KPIS, balances=balances)
+    return JSONResponse(content=jsonable_encoder(response)).body
+
+
+def balances_columns(df: pd.DataFrame) -> bytes:
+    """Camino actual de /api/balances/{valvula_id}"""
+    return FastJSONResponse({
+        "valvula_id": "VALVULA_X",
+        "kpis": KPIS.model_dump(),
+        "balances": balance_records(df),
+    }).body
+
+
+def scatter_pydantic(df: pd.DataFrame) -> bytes:
+    """Camino previo de /api/correlations/scatter"""
+    points = []
+    for idx in range(len(df)):
+        row = df.iloc[idx]
+        points.append(CorrelationScatterPoint(
+            x=float(row['X']), y=float(row['var_y_temp']),
+            valvula=str(row['VALVULA']), periodo=str(row['PERIODO'])
+        ))
+    response = CorrelationScatterResponse(
+        var_x="X", var_y="Y", data=points, correlation=0.5, total_puntos=len(points)
+    )
+    return JSONResponse(content=jsonable_encoder(response)).body
+
+
+def scatter_columns(df: pd.DataFrame) -> bytes:
+    """Camino actual de /api/correlations/scatter"""
+    points = records({
+        "x": float_column(df['X']),
+        "y": float_column(df['var_y_temp']),
+        "valvula": str_column(df['VALVULA']),
+        "periodo": str_column(df['PERIODO']),
+    })
+    return FastJSONResponse({
+        "var_x": "X", "var_y": "Y", "data": points, "correlation": 0.5, "total_puntos": len(points)
+    }).body
+
+
+def timeit(func, repeat: int) -> float:
+    """Mediana de `repeat` ejecuciones en segundos"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Filas por respuesta")
+    parser.add_argument("--repeat", type=int, default=1, help="Ejecuciones por modo")
+    args = parser.parse_args()
+
+    cases = (
+        ("balances", build_balances, balances_pydantic, balances_columns),
+        ("scatter", build_scatter, scatter_pydantic, scatter_columns),
+    )
+
+    # Mismo JSON en ambos modos (sobre una muestra chica)
+    for name, build, legacy, fast in cases:
+        sample = build(2_000)
+        assert json.loads(legacy(sample)) == json.loads(fast(sample)), f"{name}: el JSON difiere"
+
+    print(f"orjson: {'sí' if ORJSON_AVAILABLE else 'no (json estándar)'}")
+    print(f"{'respuesta':<10}{'filas':>11}{'pydantic (s)':>15}{'columnas (s)':>15}{'aceleración':>13}")
+    for name, build, legacy, fast in cases:
+        for size in args.sizes:
+            df = build(size)
+            legacy_time = timeit(lambda: legacy(df), args.repeat)
+            fast_time = timeit(lambda: fast(df), args.repeat)
+            print(f"{name:<10}{size:>11,}{legacy_time:>15.3f}{fast_time:>15.3f}{legacy_time / fast_time:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
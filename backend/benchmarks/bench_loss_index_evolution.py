@@ -0,0 +1,89 @@
+"""
+Benchmark: evolución del índice de pérdidas, bucle por período vs agregación agrupada
+
+Genera balances sintéticos (válvulas x períodos mensuales, ~20% pronosticados)
+y compara:
+  - loop: filtrado del frame completo por período y separación real/predicho
+  - grouped: un groupby por [PERIODO, ES_PRONOSTICO] pivoteado (dashboard._evolution_frame)
+  - breakdown: total + por válvula + media móvil de 12 períodos
+
+Uso (desde backend/):
+    python -m benchmarks.bench_loss_index_evolution --valves 100 1000 5000 --years 10
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.api.routes.dashboard import _evolution_frame
+
+
+def build_balances(valves: int, periods: int) -> pd.DataFrame:
+    """Balances sintéticos con los tipos del registro de datasets"""
+    rng = np.random.default_rng(42)
+    periodos = pd.period_range("2015-01", periods=periods, freq="M").strftime("%Y%m").astype("int32")
+    n = valves * periods
+    return pd.DataFrame({
+        "PUNTO": pd.Categorical(np.repeat([f"VALVULA_{i + 1}" for i in range(valves)], periods)),
+        "PERIODO": np.tile(periodos, valves),
+        "INDICE_PERDIDAS_%": rng.normal(0.05, 0.1, n),
+        "ES_PRONOSTICO": np.tile(np.arange(periods) >= periods * 0.8, valves),
+    })
+
+
+def evolution_loop(df: pd.DataFrame) -> list:
+    """Implementación previa: un filtrado completo por período"""
+    evolution = []
+    for periodo in sorted(df['PERIODO'].unique()):
+        periodo_data = df[df['PERIODO'] == periodo]
+        real_data = periodo_data[~periodo_data['ES_PRONOSTICO']]
+        pred_data = periodo_data[periodo_data['ES_PRONOSTICO']]
+        indice_real = real_data['INDICE_PERDIDAS_%'].mean() if not real_data.empty else None
+        indice_predicho = pred_data['INDICE_PERDIDAS_%'].mean() if not pred_data.empty else None
+        evolution.append((str(periodo), indice_real, indice_predicho))
+    return evolution
+
+
+def evolution_breakdown(df: pd.DataFrame) -> tuple:
+    """Total y por válvula, con media móvil de 12 períodos"""
+    return _evolution_frame(df, ventana=12), _evolution_frame(df, by='PUNTO', ventana=12)
+
+
+def timeit(func, repeat: int) -> float:
+    """Mediana de `repeat` ejecuciones en segundos"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--valves", type=int, nargs="+", default=[100, 1000, 5000], help="Cantidad de válvulas")
+    parser.add_argument("--years", type=int, default=10, help="Años de historia mensual")
+    parser.add_argument("--repeat", type=int, default=3, help="Ejecuciones por modo")
+    args = parser.parse_args()
+
+    periods = args.years * 12
+    print(f"{periods} períodos mensuales, {args.repeat} ejecuciones por modo")
+    print(f"{'válvulas':>9}{'filas':>12}{'loop (s)':>11}{'grouped (s)':>13}{'breakdown (s)':>15}")
+    for valves in args.valves:
+        df = build_balances(valves, periods)
+
+        # Mismo resultado que el bucle (a nivel de redondeo de la suma)
+        grouped = _evolution_frame(df)
+        expected = np.array([point[1] for point in evolution_loop(df)], dtype=float)
+        assert np.allclose(grouped['indice_real'].to_numpy(), expected, equal_nan=True)
+
+        loop_time = timeit(lambda: evolution_loop(df), args.repeat)
+        grouped_time = timeit(lambda: _evolution_frame(df), args.repeat)
+        breakdown_time = timeit(lambda: evolution_breakdown(df), args.repeat)
+        print(f"{valves:>9,}{len(df):>12,}{loop_time:>11.4f}{grouped_time:>13.4f}{breakdown_time:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
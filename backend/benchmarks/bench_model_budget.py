@@ -0,0 +1,127 @@
+"""
+Benchmark: carga perezosa de modelos con presupuesto de memoria (LRU)
+
+Arma una carpeta de modelos sintética con --valves válvulas (enlaces a los
+artefactos reales de BALANC-IA/modelos, cuatro modelos por válvula) y la
+recorre con pedidos de popularidad Zipf (pocas válvulas concentran la mayoría
+de los pedidos). Para cada presupuesto MODELS_MAX_MB informa:
+  - tasa de aciertos, desalojos y memoria residente
+  - latencia p50/p99 de obtener los modelos de una válvula (un fallo paga la
+    deserialización)
+
+Después compara el arranque en frío de un proceso nuevo: precarga según las
+estadísticas de acceso de la corrida anterior vs sin historial (en orden de
+válvula), midiendo la tasa de aciertos de los primeros --cold-requests pedidos
+nuevos (misma popularidad, otros sorteos).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_model_budget --valves 400 --budgets 2 8 32 0
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from app.config import settings
+from app.services.model_registry import ModelRegistry
+
+
+MODELS = ("prophet", "lightgbm", "randomforest", "catboost")
+
+
+def build_models_dir(target: Path, valves: int) -> list:
+    """Carpeta de modelos con `valves` válvulas que enlazan a los artefactos reales"""
+    source = settings.MODELS_PATH
+    originals = sorted({p.name.split("_")[1] for p in source.glob("VALVULA_*_*.*")})
+    metadata = {}
+    for i in range(valves):
+        valvula = f"VALVULA_{i + 1}"
+        original = originals[i % len(originals)]
+        for path in source.glob(f"VALVULA_{original}_*.*"):
+            os.symlink(path, target / path.name.replace(f"VALVULA_{original}_", f"{valvula}_"))
+        metadata[valvula] = {"valvula": valvula, "modelos_disponibles": list(MODELS), "features_por_modelo": {}}
+    with open(target / "metadata_modelos.json", "w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+    return list(metadata)
+
+
+def zipf_requests(valvulas: list, n: int, a: float, seed: int) -> list:
+    """Pedidos con popularidad Zipf (el ranking de válvulas es fijo; `seed` cambia los sorteos)"""
+    ranking = np.random.default_rng(0).permutation(len(valvulas))
+    ranks = np.minimum(np.random.default_rng(seed).zipf(a, size=n), len(valvulas)) - 1
+    return [valvulas[ranking[r]] for r in ranks]
+
+
+def serve(registry: ModelRegistry, requests: list) -> np.ndarray:
+    """Latencia (ms) de obtener los modelos de cada válvula pedida"""
+    latencies = []
+    for valvula in requests:
+        start = time.perf_counter()
+        registry.models_for(valvula)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def new_registry(models_dir: Path, budget_mb: float, stats_path: Path) -> ModelRegistry:
+    settings.MODELS_MAX_MB = budget_mb
+    settings.MODELS_ACCESS_STATS = stats_path
+    return ModelRegistry(models_path=models_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--valves", type=int, default=400, help="Válvulas sintéticas")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[2, 8, 32, 0], help="MODELS_MAX_MB (0 = sin límite)")
+    parser.add_argument("--requests", type=int, default=3000, help="Pedidos por corrida")
+    parser.add_argument("--cold-requests", type=int, default=100, help="Pedidos medidos tras el arranque en frío")
+    parser.add_argument("--zipf", type=float, default=1.3, help="Parámetro de la distribución Zipf")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models_dir = Path(tmp) / "modelos"
+        models_dir.mkdir()
+        valvulas = build_models_dir(models_dir, args.valves)
+        requests = zipf_requests(valvulas, args.requests, args.zipf, seed=1)
+        print(f"{args.valves} válvulas x {len(MODELS)} modelos, {args.requests} pedidos (Zipf {args.zipf})")
+
+        # Las librerías se importan antes de medir
+        new_registry(models_dir, 0, Path(tmp) / "none.json").models_for(valvulas[0])
+
+        for budget in args.budgets:
+            registry = new_registry(models_dir, budget, Path(tmp) / f"stats_{budget}.json")
+            latencies = serve(registry, requests)
+            info = registry.get_info()
+            p50, p99 = np.percentile(latencies, [50, 99])
+            label = f"{budget:g} MB" if budget else "sin límite"
+            print(f"  {label:<11} aciertos {info['hit_ratio']:>6.1%} | desalojos {info['desalojos']:>6} | "
+                  f"residentes {info['residentes']:>5} ({info['used_bytes'] / 1e6:>6.1f} MB) | "
+                  f"p50 {p50:>6.2f} ms p99 {p99:>7.2f} ms")
+
+        # Arranque en frío: precarga por frecuencia (estadísticas de la corrida anterior) vs sin historial
+        budget = args.budgets[0] or 8
+        history = Path(tmp) / "history.json"
+        trained = new_registry(models_dir, budget, history)
+        serve(trained, requests)
+        trained.save_access_stats()
+
+        next_requests = zipf_requests(valvulas, args.cold_requests, args.zipf, seed=2)
+        for label, stats_path in (("por frecuencia", history), ("sin historial", Path(tmp) / "empty.json")):
+            registry = new_registry(models_dir, budget, stats_path)
+            start = time.perf_counter()
+            registry.warm_up()
+            warm_seconds = time.perf_counter() - start
+            hits_before, misses_before = registry._hits, registry._misses
+            serve(registry, next_requests)
+            hits, misses = registry._hits - hits_before, registry._misses - misses_before
+            print(f"  precarga {label:<15} ({budget:g} MB, {warm_seconds:>5.2f} s): "
+                  f"aciertos en los primeros {len(next_requests)} pedidos {hits / (hits + misses):>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: predicción con modelos residentes vs cargarlos en cada llamada
+
+Compara, para una válvula de BALANC-IA/modelos:
+  - por llamada: lo que hace predecir_entrada (cargar_modelos deserializa la
+    metadata y todos los artefactos en cada predicción); se simula con un
+    registro nuevo por llamada
+  - residente: app.services.model_registry, que carga cada artefacto una vez
+
+Las librerías de ML se importan antes de medir, así que la diferencia es solo
+la deserialización de los artefactos. También informa cuánto tardó la primera
+carga de cada artefacto (incluye importar su librería: el costo de un proceso
+nuevo).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_model_registry --valvula VALVULA_1 --repeat 20
+"""
+import argparse
+import statistics
+import time
+import warnings
+
+from app.services.model_registry import FEATURE_MODELS, ModelRegistry
+
+
+FEATURES = {
+    "PRESION_FINAL": 10.5, "TEMPERATURA_FINAL": 25.0, "KPT_FINAL": 1.0, "NUM_USUARIOS": 120,
+    "NUM_REGISTROS": 30, "VOLUMEN_SALIDA_FINAL": 310.0, "MES": 8, "AÑO": 2025, "DIA_AÑO": 213,
+    "PRESION_TEMP": 262.5, "CONSUMO_POR_USUARIO": 2.6,
+}
+
+
+def timed(fn, repeat: int) -> float:
+    """Mediana en milisegundos de `repeat` ejecuciones"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--valvula", default="VALVULA_1", help="Válvula a predecir")
+    parser.add_argument("--fecha", default="2025-08-01", help="Fecha para Prophet")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones por medición")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    resident = ModelRegistry()
+    loaded = resident.models_for(args.valvula)  # importa las librerías y deja los modelos en memoria
+    print(f"{args.valvula}: {', '.join(sorted(loaded))}")
+
+    per_call = timed(lambda: ModelRegistry().predict(args.valvula, FEATURES, args.fecha), max(args.repeat // 4, 3))
+    warm = timed(lambda: resident.predict(args.valvula, FEATURES, args.fecha), args.repeat)
+    print(f"  cargando en cada llamada {per_call:>9.1f} ms")
+    print(f"  modelos residentes       {warm:>9.1f} ms  ({per_call / warm:.0f}x)")
+
+    no_prophet = timed(lambda: resident.predict(args.valvula, FEATURES), args.repeat)
+    print(f"  residentes sin Prophet   {no_prophet:>9.1f} ms")
+    for modelo, artifact in sorted(loaded.items()):
+        kind = "features" if modelo in FEATURE_MODELS else "fecha"
+        print(f"    {modelo:<14} primera carga {artifact.load_seconds * 1000:>8.1f} ms  ({kind}, {artifact.state.size / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: respuesta completa vs una página por cursor (keyset) en un scatter grande
+
+Genera N puntos de scatter sintéticos y compara el costo de armar y serializar:
+  - completo: todas las filas (comportamiento sin limit/cursor)
+  - página: la primera página y una página profunda (cursor cerca del final),
+    ordenando por una columna con app.api.pagination.keyset_page
+
+Verifica que recorrer todas las páginas devuelve exactamente los mismos puntos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_pagination --sizes 100000 1000000 --page-size 500
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.api.fastjson import dumps, records, float_column, str_column
+from app.api.pagination import keyset_page
+
+
+def build_scatter(n: int) -> pd.DataFrame:
+    """Puntos de scatter sintéticos (dos variables, válvula categórica, período)"""
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "VALVULA": pd.Categorical([f"VALVULA_{i % 2000 + 1}" for i in range(n)]),
+        "PERIODO": (202001 + np.arange(n) % 12).astype("int32"),
+        "X": rng.normal(400, 50, n).round(1),
+        "Y": rng.normal(12, 4, n),
+    })
+
+
+def serialize(df: pd.DataFrame, positions: np.ndarray) -> bytes:
+    """Filas de las posiciones indicadas, como en /api/correlations/scatter"""
+    return dumps({"data": records({
+        "x": float_column(df["X"].iloc[positions]),
+        "y": float_column(df["Y"].iloc[positions]),
+        "valvula": str_column(df["VALVULA"].iloc[positions]),
+        "periodo": str_column(df["PERIODO"].iloc[positions]),
+    })})
+
+
+def timed(fn, repeat: int) -> float:
+    """Mediana en segundos de `repeat` ejecuciones"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000], help="Puntos del scatter")
+    parser.add_argument("--page-size", type=int, default=500, help="Puntos por página")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medición")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        df = build_scatter(n)
+        labels = df.index.to_numpy()
+        keys = df["X"].to_numpy()
+
+        # Todas las páginas juntas son exactamente todos los puntos, sin repetidos
+        seen, after = [], None
+        while True:
+            page, after = keyset_page(labels, after, max(n // 10, 1), keys=keys)
+            seen.append(page)
+            if after is None:
+                break
+        assert np.array_equal(np.sort(np.concatenate(seen)), labels), "las páginas no cubren todos los puntos"
+
+        # Cursor de una página cerca del final del orden
+        order = np.lexsort((labels, keys))
+        deep = [keys[order[-args.page_size - 1]].item(), labels[order[-args.page_size - 1]].item()]
+
+        full = timed(lambda: serialize(df, np.arange(n)), args.repeat)
+        first = timed(lambda: serialize(df, keyset_page(labels, None, args.page_size, keys=keys)[0]), args.repeat)
+        last = timed(lambda: serialize(df, keyset_page(labels, deep, args.page_size, keys=keys)[0]), args.repeat)
+
+        print(f"{n:>10,} puntos: completo {full * 1000:>9.1f} ms | "
+              f"primera página {first * 1000:>7.1f} ms | página profunda {last * 1000:>7.1f} ms "
+              f"({args.page_size} puntos por página)")
+
+
+if __name__ == "__main__":
+    main()
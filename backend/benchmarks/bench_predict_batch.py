@@ -0,0 +1,94 @@
+"""
+Benchmark: throughput de predicción fila por fila vs por lotes
+
+Genera N filas (features aleatorias y fechas mensuales) repartidas entre las
+válvulas con modelos y mide filas por segundo de:
+  - fila por fila: model_registry.predict en cada fila (predecir_entrada con
+    los modelos ya residentes); con más de --loop-max filas se mide sobre
+    --loop-max y se extrapola
+  - batch: model_registry.predict_many una vez por válvula (lo que hace
+    POST /api/predict/batch, sin HTTP)
+  - batch HTTP: POST /api/predict/batch completo (validación del body y JSON)
+
+Uso (desde backend/):
+    python -m benchmarks.bench_predict_batch --sizes 1 100 10000
+"""
+import argparse
+import time
+import warnings
+from collections import defaultdict
+
+import numpy as np
+
+from app.services.model_registry import model_registry
+
+
+def build_rows(n: int, valvulas, features):
+    """Filas del request: válvula, fecha mensual y features aleatorias"""
+    rng = np.random.default_rng(42)
+    values = rng.uniform(0, 500, size=(n, len(features)))
+    return [
+        {
+            "valvula_id": valvulas[i % len(valvulas)],
+            "fecha": f"{2024 + (i // 12) % 3}-{i % 12 + 1:02d}-01",
+            "features": dict(zip(features, values[i].tolist())),
+        }
+        for i in range(n)
+    ]
+
+
+def predict_rows(rows):
+    """Fila por fila con los modelos residentes"""
+    return [model_registry.predict(row["valvula_id"], row["features"], row["fecha"]) for row in rows]
+
+
+def predict_batch(rows):
+    """Agrupado por válvula, una llamada a predict_many por grupo"""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row["valvula_id"]].append(row)
+    return [
+        model_registry.predict_many(valvula, [r["features"] for r in group], [r["fecha"] for r in group])
+        for valvula, group in groups.items()
+    ]
+
+
+def rate(fn, rows, repeat: int) -> float:
+    """Filas por segundo (mejor de `repeat` ejecuciones)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return len(rows) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000], help="Filas por request")
+    parser.add_argument("--loop-max", type=int, default=200, help="Máximo de filas medidas fila por fila")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medición")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    valvulas = model_registry.get_valvulas()
+    model_registry.warm_up()
+    features = model_registry.get(valvulas[0], "randomforest").features
+    print(f"{len(valvulas)} válvulas con modelos: {', '.join(valvulas)}")
+
+    for n in args.sizes:
+        rows = build_rows(n, valvulas, features)
+        loop = rate(predict_rows, rows[:args.loop_max], args.repeat)
+        batch = rate(predict_batch, rows, args.repeat)
+        http = rate(lambda r: client.post("/api/predict/batch", json={"filas": r}).raise_for_status(), rows, args.repeat)
+        note = " (extrapolado)" if n > args.loop_max else ""
+        print(f"{n:>8,} filas | fila por fila {loop:>9,.0f} filas/s{note} | batch {batch:>10,.0f} filas/s "
+              f"({batch / loop:>6.1f}x) | batch HTTP {http:>10,.0f} filas/s")
+
+
+if __name__ == "__main__":
+    main()
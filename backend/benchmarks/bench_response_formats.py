@@ -0,0 +1,60 @@
+"""
+Benchmark: formatos de respuesta de las rutas de gráficos (negociados con Accept)
+
+Genera la serie de balances de una válvula con N períodos y compara tiempo de
+serialización y tamaño del payload (sin comprimir y con gzip) de:
+  - json: filas (lo que responde /api/balances/{id} por defecto)
+  - columns+json, msgpack, arrow: por columnas (app.api.negotiation)
+
+Uso (desde backend/):
+    python -m benchmarks.bench_response_formats --sizes 1000 100000 1000000
+"""
+import argparse
+import gzip
+import statistics
+import time
+
+from app.api.fastjson import dumps
+from app.api.negotiation import COLUMNS_JSON, OFFERED, encode_columns
+from app.api.routes.balances import balance_columns, balance_records
+from benchmarks.bench_json_serialization import build_balances
+
+
+KPIS = {"indice_promedio": 12.5, "total_perdidas": 1000.0, "meses_analizados": 0}
+
+
+def timed(fn, repeat: int):
+    """(resultado, mediana en segundos de `repeat` ejecuciones)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000], help="Filas de la serie")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medición")
+    args = parser.parse_args()
+
+    formats = {"json": None, **{media_type.split("/")[1]: media_type for media_type in OFFERED[1:]}}
+    for n in args.sizes:
+        df = build_balances(n)
+        print(f"{n:>10,} filas")
+        for name, media_type in formats.items():
+            if media_type is None:
+                fn = lambda: dumps({"valvula_id": "VALVULA_1", "kpis": KPIS, "balances": balance_records(df)})
+            else:
+                fn = lambda: encode_columns(
+                    media_type, balance_columns(df), meta={"valvula_id": "VALVULA_1", "kpis": KPIS}, table="balances"
+                )
+            payload, elapsed = timed(fn, args.repeat)
+            compressed = len(gzip.compress(payload, compresslevel=6))
+            print(f"  {name:<28} {elapsed * 1000:>9.1f} ms  {len(payload) / 1e6:>8.2f} MB  "
+                  f"(gzip {compressed / 1e6:>7.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: parseo columna por columna vs parseo con esquema (una sola pasada)
+
+Replica Variables_Usuarios.csv `scale` veces y compara:
+  - legacy: pd.read_csv sin tipos + conversión por columna con
+    astype(str).str.replace(',', '.').astype(float)
+  - schema: pd.read_csv con dtype/usecols/decimal del registro de datasets
+
+Uso (desde backend/):
+    python -m benchmarks.bench_schema_parsing --scale 100 --repeat 5
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from app.config import settings
+from app.services.data_loader import DataLoader
+from app.services.datasets import get_schema
+
+
+SCHEMA = get_schema("variables_usuarios")
+NUMERIC_COLS = SCHEMA.numeric_columns
+
+
+def build_file(target: Path, scale: int) -> Path:
+    """Copia Variables_Usuarios.csv replicando las filas `scale` veces"""
+    raw = (settings.DATA_PATH / SCHEMA.path).read_bytes().splitlines(keepends=True)
+    header, body = raw[:1], raw[1:]
+    destination = target / SCHEMA.path
+    with open(destination, "wb") as f:
+        f.writelines(header)
+        for _ in range(scale):
+            f.writelines(body)
+    return destination
+
+
+def parse_legacy(file_path: Path) -> pd.DataFrame:
+    """Parseo previo al registro: todo sin tipos y conversión posterior por columna"""
+    df = pd.read_csv(file_path, sep=";", encoding="utf-8", on_bad_lines="skip")
+    df.columns = df.columns.str.strip().str.upper()
+    for col in NUMERIC_COLS:
+        df[col] = df[col].astype(str).str.replace(",", ".").astype(float)
+    return df
+
+
+def parse_schema(loader: DataLoader, file_path: Path) -> pd.DataFrame:
+    """Parseo con el esquema registrado"""
+    return loader._finalize(SCHEMA, loader._parse_dataset(SCHEMA, file_path))
+
+
+def timeit(func, repeat: int) -> float:
+    """Mediana de `repeat` ejecuciones en segundos"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=100, help="Factor de replicación de filas")
+    parser.add_argument("--repeat", type=int, default=5, help="Ejecuciones por modo")
+    args = parser.parse_args()
+
+    loader = DataLoader()
+
+    with tempfile.TemporaryDirectory(prefix="balancia_bench_") as tmp:
+        file_path = build_file(Path(tmp), args.scale)
+
+        legacy = parse_legacy(file_path)
+        schema = parse_schema(loader, file_path)
+        pd.testing.assert_frame_equal(
+            legacy[NUMERIC_COLS], schema[NUMERIC_COLS], check_dtype=False
+        )
+
+        print(f"{SCHEMA.path} x{args.scale}: {len(schema):,} filas, {args.repeat} ejecuciones por modo")
+        print(f"{'modo':<10}{'tiempo (s)':>14}")
+        for mode, func in (
+            ("legacy", lambda: parse_legacy(file_path)),
+            ("schema", lambda: parse_schema(loader, file_path)),
+        ):
+            print(f"{mode:<10}{timeit(func, args.repeat):>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: carga en frío desde CSV vs snapshot Parquet
+
+Cada modo se ejecuta en un proceso nuevo (caché vacío) y reporta el tiempo
+total de carga de los datasets del DataLoader y el pico de memoria (RSS).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_snapshots --scale 50 --repeat 3
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from app.config import settings
+
+
+LOADERS = [
+    "load_balances_virtuales",
+    "load_pronosticos",
+    "load_metrics",
+    "load_resumen_valvulas",
+    "load_alertas",
+    "load_top_desbalances",
+    "load_correlations",
+    "load_analisis_confiabilidad",
+    "load_benchmark_historico",
+    "load_resumen_pronostico_valvulas",
+    "load_reporte_metricas_performance",
+    "load_predicciones_con_balance",
+    "load_dataset_maestro",
+    "load_dataset_train",
+]
+
+# Código ejecutado en el proceso hijo
+CHILD_SCRIPT = """
+import json, resource, sys, time
+from pathlib import Path
+from app.services.data_loader import DataLoader
+
+loader = DataLoader()
+loader.data_path = Path(sys.argv[1])
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+for name in sys.argv[2:]:
+    getattr(loader, name)()
+elapsed = time.perf_counter() - start
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "peak_rss_kb": rss_after, "load_rss_kb": rss_after - rss_before}))
+"""
+
+COMPILE_SCRIPT = """
+import sys
+from app.services.snapshots import compile_snapshots
+compile_snapshots(sys.argv[1], force=True)
+"""
+
+
+def build_dataset(target: Path, scale: int) -> None:
+    """Copia los CSVs de BALANC-IA replicando las filas `scale` veces"""
+    for csv_path in settings.DATA_PATH.rglob("*.csv"):
+        relative_path = csv_path.relative_to(settings.DATA_PATH)
+        destination = target / relative_path
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+        # Matrices con índice (eda/) no se replican: son NxN por definición
+        if scale == 1 or relative_path.parts[0] == "eda":
+            shutil.copy2(csv_path, destination)
+            continue
+
+        raw = csv_path.read_bytes().splitlines(keepends=True)
+        header, body = raw[:1], raw[1:]
+        with open(destination, "wb") as f:
+            f.writelines(header)
+            for _ in range(scale):
+                f.writelines(body)
+
+
+def compile_in_child(data_path: Path) -> None:
+    """Compila los snapshots en otro proceso para no inflar el RSS heredado por los hijos"""
+    subprocess.check_call(
+        [sys.executable, "-c", COMPILE_SCRIPT, str(data_path)],
+        cwd=settings.BASE_DIR,
+    )
+
+
+def run_child(data_path: Path, use_snapshots: bool) -> dict:
+    """Ejecuta una carga en frío en un proceso nuevo"""
+    env = dict(os.environ, USE_SNAPSHOTS="true" if use_snapshots else "false")
+    output = subprocess.check_output(
+        [sys.executable, "-c", CHILD_SCRIPT, str(data_path), *LOADERS],
+        env=env,
+        cwd=settings.BASE_DIR,
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="Factor de replicación de filas")
+    parser.add_argument("--repeat", type=int, default=3, help="Ejecuciones por modo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="balancia_bench_") as tmp:
+        data_path = Path(tmp)
+        build_dataset(data_path, args.scale)
+        compile_in_child(data_path)
+
+        print(f"Escala x{args.scale}, {args.repeat} ejecuciones por modo")
+        print(f"{'modo':<10}{'tiempo (s)':>14}{'RSS pico (MB)':>16}{'RSS carga (MB)':>16}")
+
+        for mode, use_snapshots in (("csv", False), ("parquet", True)):
+            runs = [run_child(data_path, use_snapshots) for _ in range(args.repeat)]
+            seconds = statistics.median(r["seconds"] for r in runs)
+            peak = statistics.median(r["peak_rss_kb"] for r in runs) / 1024
+            load = statistics.median(r["load_rss_kb"] for r in runs) / 1024
+            print(f"{mode:<10}{seconds:>14.4f}{peak:>16.1f}{load:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
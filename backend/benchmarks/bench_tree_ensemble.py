@@ -0,0 +1,119 @@
+"""
+Benchmark: evaluador NumPy de árboles (FlatForest) vs predict de scikit-learn / LightGBM
+
+Mide la latencia por llamada de predict y de FlatForest.predict para cada
+tamaño de lote (--batch-sizes) con:
+  - un RandomForest y boosters LightGBM sintéticos (--trees árboles, los tres
+    tratamientos de faltantes de LightGBM), sobre filas con NaN y ceros
+  - los RandomForest y LightGBM reales de BALANC-IA/modelos
+
+La paridad con predict se verifica en tests/test_tree_ensemble.py.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_tree_ensemble --trees 200 --batch-sizes 1 10 100 10000
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from app.services.model_registry import model_registry
+from app.services.tree_ensemble import FlatForest
+
+
+N_FEATURES = 12
+
+
+def synthetic_data(rows: int, seed: int):
+    """Features con NaN y ceros, y un objetivo no lineal"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, N_FEATURES))
+    X[rng.random(X.shape) < 0.05] = 0.0
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) * 10 + X[:, 2] * X[:, 3] + rng.normal(size=rows)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+def synthetic_models(trees: int) -> dict:
+    """RandomForest y LightGBM entrenados sobre datos sintéticos"""
+    from lightgbm import LGBMRegressor
+    from sklearn.ensemble import RandomForestRegressor
+
+    X, y = synthetic_data(5000, seed=0)
+    models = {
+        "randomforest": RandomForestRegressor(n_estimators=trees, max_depth=10, random_state=0).fit(X, y)
+    }
+    for missing in ("nan", "zero", "none"):
+        params = {"use_missing": missing != "none", "zero_as_missing": missing == "zero"}
+        models[f"lightgbm ({missing})"] = LGBMRegressor(
+            n_estimators=trees, num_leaves=31, random_state=0, verbose=-1, **params
+        ).fit(X, y)
+    return models
+
+
+def real_models() -> dict:
+    """Los RandomForest y LightGBM de cada válvula (con sus nombres de features)"""
+    models = {}
+    for valvula in model_registry.get_valvulas():
+        for modelo in ("randomforest", "lightgbm"):
+            artifact = model_registry.get(valvula, modelo)
+            if artifact is not None:
+                models[f"{valvula} {modelo}"] = (artifact.model, artifact.features)
+    return models
+
+
+def model_input(X: np.ndarray, features: list):
+    return pd.DataFrame(X, columns=features) if features else X
+
+
+def timeit(fn, repeat: int) -> float:
+    """Mediana (ms) de `repeat` llamadas"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=200, help="Árboles de los modelos sintéticos")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 10000], help="Filas por llamada")
+    parser.add_argument("--repeat", type=int, default=20, help="Llamadas por medición (se informa la mediana)")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    X_test, _ = synthetic_data(max(args.batch_sizes), seed=1)
+
+    flats = {}
+    for name, model in synthetic_models(args.trees).items():
+        flats[name] = (model, [], FlatForest.from_model(model))
+    for name, (model, features) in real_models().items():
+        flats[name] = (model, features, FlatForest.from_model(model))
+
+    print("Modelos")
+    for name, (_, _, flat) in flats.items():
+        print(f"  {name:<28} {flat.n_trees:>4} árboles, profundidad {flat.depth:>2}")
+
+    print(f"\nLatencia por llamada (mediana de {args.repeat}, ms): predict vs FlatForest")
+    header = " | ".join(f"{n:>6} filas          " for n in args.batch_sizes)
+    print(f"  {'':<28} {header}")
+    for name, (model, features, flat) in flats.items():
+        cells = []
+        for n in args.batch_sizes:
+            if features:
+                X = np.random.default_rng(3).uniform(0, 50, size=(n, len(features)))
+            else:
+                X = X_test[:n]
+            data = model_input(X, features)
+            original = timeit(lambda: model.predict(data), args.repeat)
+            numpy_ = timeit(lambda: flat.predict(X), args.repeat)
+            cells.append(f"{original:>7.2f} {numpy_:>7.2f} x{original / numpy_:>4.1f}")
+        print(f"  {name:<28} " + " | ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
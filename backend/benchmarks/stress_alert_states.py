@@ -0,0 +1,114 @@
+"""
+Prueba de estrés: estados de alertas compartidos entre procesos (SQLite WAL)
+
+Lanza N procesos, como si fueran workers de uvicorn, sobre la misma base de
+estados (un archivo temporal):
+
+  1. Todos arman su almacén de alertas a la vez: deben ver los mismos estados
+     iniciales (gana el primero que los escribe).
+  2. Cada proceso cambia el estado de alertas distintas y, tras una barrera,
+     todos deben ver los cambios de los demás.
+  3. Rendimiento del backend: escrituras en lotes y lecturas con caché.
+
+Termina con código 1 si algún proceso ve estados distintos.
+
+Uso (desde backend/):
+    python -m benchmarks.stress_alert_states --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.alert_states import SQLiteStateBackend
+from app.services.alert_store import ALERT_STATES, AlertStore
+
+
+def worker(rank: int, workers: int, db_path: str, barrier, args, results):
+    """Un proceso: almacén propio sobre la base compartida"""
+    store = AlertStore(states=SQLiteStateBackend(Path(db_path)))
+
+    # 1. Estados iniciales (construcción concurrente del índice)
+    barrier.wait()
+    initial = {alert.id: alert.estado for alert in store.filter()}
+
+    # 2. Cambios de este proceso: alertas con id % workers == rank
+    barrier.wait()
+    mine = {
+        alert_id: ALERT_STATES[(rank + 1) % len(ALERT_STATES)]
+        for alert_id in initial if alert_id % workers == rank
+    }
+    store.update_states(mine)
+    barrier.wait()
+    final = {alert.id: alert.estado for alert in store.filter()}
+
+    # 3. Rendimiento del backend con ids sintéticos (fuera del rango de las alertas reales)
+    backend = store.states
+    base = 1_000_000 * (rank + 1)
+    barrier.wait()
+    start = time.perf_counter()
+    for batch in range(args.batches):
+        backend.set_many({
+            base + batch * args.batch_size + i: ALERT_STATES[i % len(ALERT_STATES)]
+            for i in range(args.batch_size)
+        })
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(args.reads):
+        backend.get(base + i % (args.batches * args.batch_size))
+    read_time = time.perf_counter() - start
+
+    results.put((rank, initial, final, write_time, read_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Procesos concurrentes")
+    parser.add_argument("--batches", type=int, default=200, help="Lotes de escritura por proceso")
+    parser.add_argument("--batch-size", type=int, default=50, help="Estados por lote")
+    parser.add_argument("--reads", type=int, default=20_000, help="Lecturas por proceso")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="balancia_states_") as tmp:
+        db_path = str(Path(tmp) / "alert_states.db")
+        barrier = ctx.Barrier(args.workers)
+        results = ctx.Queue()
+        processes = [
+            ctx.Process(target=worker, args=(rank, args.workers, db_path, barrier, args, results))
+            for rank in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        outputs = sorted(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+
+    initials = {repr(sorted(initial.items())) for _, initial, _, _, _ in outputs}
+    finals = {repr(sorted(final.items())) for _, _, final, _, _ in outputs}
+    expected = {
+        alert_id: ALERT_STATES[(alert_id % args.workers + 1) % len(ALERT_STATES)]
+        for alert_id in outputs[0][1]
+    }
+
+    writes = args.batches * args.batch_size
+    print(f"{args.workers} procesos, {len(outputs[0][1])} alertas")
+    for rank, _, _, write_time, read_time in outputs:
+        print(f"  proceso {rank}: {writes / write_time:>10,.0f} estados escritos/s "
+              f"({args.batches / write_time:,.0f} lotes/s), {args.reads / read_time:>12,.0f} lecturas/s")
+
+    ok = len(initials) == 1 and len(finals) == 1 and outputs[0][2] == expected
+    if not ok:
+        print(f"FALLO: estados iniciales distintos: {len(initials)}, finales distintos: {len(finals)}")
+        for rank, _, final, _, _ in outputs:
+            print(f"  proceso {rank}: {final}")
+        sys.exit(1)
+
+    print("OK: todos los procesos ven los mismos estados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Prueba de estrés: carga single-flight con el caché frío
+
+Lanza N requests concurrentes contra la API (caché vacío, sin precarga) y
+reporta el tiempo total y cuántas veces se leyó cada archivo. La lectura se
+hace artificialmente lenta para garantizar que los requests se solapen.
+La verificación (cada archivo se lee una sola vez) está en
+tests/test_single_flight.py.
+
+Uso (desde backend/):
+    python -m benchmarks.stress_single_flight --requests 64
+"""
+import argparse
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Antes de importar la app: sin precarga al iniciar, para que el caché arranque frío
+os.environ["WARMUP_ON_STARTUP"] = "false"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services.data_loader import DataLoader, data_loader  # noqa: E402
+
+
+PATHS = [
+    "/api/dashboard/kpis",
+    "/api/balances/VALVULA_2",
+    "/api/models/metrics",
+    "/api/alerts/",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64, help="Requests concurrentes")
+    parser.add_argument("--delay", type=float, default=0.2, help="Segundos extra por lectura de archivo")
+    args = parser.parse_args()
+
+    reads = Counter()
+    reads_lock = threading.Lock()
+    original_read_csv = DataLoader._read_csv
+
+    def counting_read_csv(self, relative_path, **kwargs):
+        with reads_lock:
+            reads[relative_path] += 1
+        time.sleep(args.delay)
+        return original_read_csv(self, relative_path, **kwargs)
+
+    DataLoader._read_csv = counting_read_csv
+    data_loader.clear_cache()
+
+    with TestClient(app) as client:
+        paths = [PATHS[i % len(PATHS)] for i in range(args.requests)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.requests) as pool:
+            statuses = list(pool.map(lambda path: client.get(path).status_code, paths))
+        elapsed = time.perf_counter() - start
+
+    DataLoader._read_csv = original_read_csv
+
+    print(f"{args.requests} requests en {elapsed:.2f}s, códigos: {dict(Counter(statuses))}")
+    for relative_path, count in sorted(reads.items()):
+        print(f"{count:>4}  {relative_path}")
+
+
+if __name__ == "__main__":
+    main()
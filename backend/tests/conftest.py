@@ -0,0 +1,10 @@
+"""Configuración común de los tests (desde backend/: python -m pytest)"""
+import os
+import tempfile
+
+# Antes de importar la app: sin precarga al iniciar, inferencia en un hilo y
+# estados de alertas y estadísticas de modelos fuera del árbol del repo
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
+os.environ.setdefault("INFERENCE_WORKERS", "0")
+os.environ.setdefault("ALERT_STATE_BACKEND", "memory")
+os.environ.setdefault("MODELS_ACCESS_STATS", os.path.join(tempfile.gettempdir(), "balancia_test_model_access.json"))
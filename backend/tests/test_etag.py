@@ -0,0 +1,50 @@
+"""ETags: un cambio en el CSV de un dataset desalojado del caché invalida el ETag"""
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.data_loader import data_loader
+
+
+URL = "/api/models/metrics?valvula_id=VALVULA_1"
+
+
+@pytest.fixture
+def data_copy(tmp_path, monkeypatch):
+    """data_loader global leyendo una copia de los datos, verificando los archivos en cada request"""
+    data_path = tmp_path / "data"
+    shutil.copytree(settings.DATA_PATH, data_path)
+    monkeypatch.setattr(settings, "CACHE_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(data_loader, "data_path", data_path)
+    monkeypatch.setattr(data_loader, "_known_sources", {})
+    data_loader.clear_cache()
+    yield data_path
+    data_loader.clear_cache()
+
+
+def drop_first_line(path, prefix):
+    """Quita la primera fila del CSV que empieza con `prefix`"""
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    index = next(i for i, line in enumerate(lines) if line.startswith(prefix))
+    path.write_text("".join(lines[:index] + lines[index + 1:]), encoding="utf-8")
+
+
+def test_evicted_dataset_change_invalidates_etag(data_copy):
+    with TestClient(app) as client:
+        first = client.get(URL)
+        assert first.status_code == 200
+
+        # Desalojado del caché (presupuesto de memoria) y luego modificado en disco
+        data_loader._cache.pop("metrics")
+        drop_first_line(data_copy / "Metrics.csv", "VALVULA_1;")
+
+        second = client.get(URL, headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert second.headers["etag"] != first.headers["etag"]
+        assert len(second.json()["models"]) == len(first.json()["models"]) - 1
+
+        third = client.get(URL, headers={"If-None-Match": second.headers["etag"]})
+        assert third.status_code == 304
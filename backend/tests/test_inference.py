@@ -0,0 +1,67 @@
+"""Ejecutor de inferencia: lugares de las tareas vencidas y precarga de modelos fuera del event loop"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.inference import InferenceExecutor, InferenceQueueFull, InferenceTimeout
+
+
+def test_timed_out_task_keeps_its_slot_until_it_finishes():
+    release = threading.Event()
+
+    async def scenario():
+        executor = InferenceExecutor(workers=0, queue_size=0, timeout=0.05)
+        executor.start()
+        try:
+            with pytest.raises(InferenceTimeout):
+                await executor.run(release.wait)
+
+            # La tarea sigue corriendo: el hilo está ocupado y no hay lugar para otra
+            info = executor.get_info()
+            assert (info["en_ejecucion"], info["en_cola"]) == (1, 0)
+            with pytest.raises(InferenceQueueFull):
+                await executor.run(lambda: None)
+
+            release.set()
+            for _ in range(100):
+                if executor.get_info()["en_ejecucion"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert executor.get_info()["en_ejecucion"] == 0
+            assert await executor.run(lambda: 42) == 42
+        finally:
+            release.set()
+            executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_model_warm_up_does_not_block_event_loop(monkeypatch):
+    from app.services.model_registry import model_registry
+
+    warmed = threading.Event()
+
+    def slow_warm_up():
+        time.sleep(0.5)
+        warmed.set()
+        return {}
+
+    monkeypatch.setattr(model_registry, "warm_up", slow_warm_up)
+
+    async def scenario():
+        executor = InferenceExecutor(workers=0, queue_size=4, timeout=5)
+        try:
+            task = asyncio.create_task(executor.run(lambda: 42))
+            # Mientras el hilo de inferencia precarga, el event loop sigue atendiendo
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            assert time.perf_counter() - start < 0.25
+            assert not warmed.is_set()
+            assert await task == 42
+            assert warmed.is_set()
+        finally:
+            executor.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,86 @@
+"""Predicción con el ensemble: un modelo que falla, o al que le faltan features, no tumba la de los demás"""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.model_registry import model_registry
+
+
+FEATURES = {
+    "PRESION_FINAL": 10.5, "TEMPERATURA_FINAL": 25.0, "KPT_FINAL": 1.2, "NUM_USUARIOS": 120.0,
+    "NUM_REGISTROS": 118.0, "VOLUMEN_SALIDA_FINAL": 1500.0, "MES": 8, "AÑO": 2025, "DIA_AÑO": 213,
+    "PRESION_TEMP": 262.5, "CONSUMO_POR_USUARIO": 12.5,
+}
+
+FILA = {"valvula_id": "VALVULA_1", "fecha": "2025-08-01", "features": FEATURES}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def broken_catboost(monkeypatch):
+    """El CatBoost de VALVULA_1 falla en cada predicción"""
+    artifact = model_registry.get("VALVULA_1", "catboost")
+
+    def fail(X):
+        raise RuntimeError("modelo roto")
+
+    monkeypatch.setattr(artifact, "predict", fail)
+    return artifact
+
+
+def test_failing_model_is_skipped(client, broken_catboost):
+    response = client.post("/api/predict", json=FILA)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["prediccion"] is not None
+    assert "catboost" not in body["predicciones"]
+    assert body["errores"] == {"catboost": "modelo roto"}
+    assert sum(body["pesos"].values()) == pytest.approx(1.0)
+
+
+def test_failing_model_leaves_batch_column_empty(client, broken_catboost):
+    filas = [FILA, {**FILA, "valvula_id": "VALVULA_2"}]
+    response = client.post("/api/predict/batch", json={"filas": filas})
+    assert response.status_code == 200
+    body = response.json()
+    assert all(value is not None for value in body["predicciones"])
+    assert body["predicciones_por_modelo"]["catboost"][0] is None
+    assert body["predicciones_por_modelo"]["catboost"][1] is not None
+    assert body["errores"] == {"VALVULA_1": {"catboost": "modelo roto"}}
+
+
+def test_non_numeric_features_fail_only_feature_models():
+    result = model_registry.predict_many("VALVULA_1", [{**FEATURES, "PRESION_FINAL": "abc"}], ["2025-08-01"])
+    assert list(result["predicciones"]) == ["prophet"]
+    assert set(result["errores"]) == {"lightgbm", "randomforest", "catboost"}
+    assert not np.isnan(result["prediccion"][0])
+
+
+def test_missing_features_skip_tree_models(client):
+    response = client.post("/api/predict", json={**FILA, "features": {"PRESION_FINAL": 10.5}})
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["predicciones"]) == ["prophet"]
+    assert set(body["errores"]) == {"lightgbm", "randomforest", "catboost"}
+    assert "TEMPERATURA_FINAL" in body["errores"]["randomforest"]
+
+
+def test_no_features_and_no_date_is_rejected(client):
+    response = client.post("/api/predict", json={"valvula_id": "VALVULA_1", "features": {}})
+    assert response.status_code == 422
+    assert "Faltan features" in response.json()["detail"]
+
+
+def test_missing_features_only_skip_their_rows():
+    features = [FEATURES, {"PRESION_FINAL": 10.5}, {**FEATURES, "KPT_FINAL": None}]
+    result = model_registry.predict_many("VALVULA_1", features, [None, None, None])
+    values = result["predicciones"]["randomforest"]
+    assert np.isnan(values[1]) and not np.isnan(values[0]) and not np.isnan(values[2])
+    assert np.isnan(result["prediccion"][1])
+    assert "1 de 3" in result["errores"]["randomforest"]
@@ -0,0 +1,87 @@
+"""Modo readonly del caché: vistas sin copia que las rutas no pueden modificar"""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.data_loader import DataLoader, copy_on_write, data_loader
+
+
+# Rutas de lectura que usan los datasets cacheados (incluida get_balance_by_valve, que modifica su frame)
+ROUTES = [
+    "/api/dashboard/kpis",
+    "/api/dashboard/summary",
+    "/api/dashboard/loss-index-evolution",
+    "/api/dashboard/top-valves?limit=3",
+    "/api/dashboard/valves-status",
+    "/api/balances/",
+    "/api/balances/VALVULA_1",
+    "/api/balances/VALVULA_2?periodo_inicio=202501&periodo_fin=202506",
+    "/api/balances/VALVULA_3/periodos",
+    "/api/models/metrics",
+    "/api/models/best-by-valve",
+    "/api/models/predictions-scatter?modelo=LightGBM",
+    "/api/correlations/matrix",
+    "/api/correlations/scatter?var_x=VOLUMEN_ENTRADA_FINAL&var_y=INDICE_PERDIDAS_FINAL",
+    "/api/reliability/",
+    "/api/benchmark/historic-vs-forecast",
+    "/api/forecast/summary",
+    "/api/alerts/",
+]
+
+
+@pytest.fixture(autouse=True)
+def cow():
+    """Copy-on-Write explícito: el modo readonly no depende de lo que hayan activado otros tests"""
+    with copy_on_write():
+        yield
+
+
+@pytest.fixture
+def readonly_loader():
+    """data_loader global en modo readonly, con el caché vacío (se restaura al terminar)"""
+    previous = data_loader.readonly
+    data_loader.readonly = True
+    data_loader.clear_cache()
+    yield data_loader
+    data_loader.readonly = previous
+    data_loader.clear_cache()
+
+
+def test_readonly_view_shares_buffers_and_copies_on_write():
+    loader = DataLoader(readonly=True)
+    cached = loader._entry("balances_virtuales").df
+
+    view = loader.load_balances_virtuales()
+    column = "ENTRADA_M3"
+    assert np.shares_memory(view[column].to_numpy(), cached[column].to_numpy())
+
+    view.loc[view.index[0], column] = -1.0
+    view["NUEVA"] = 1
+    assert cached[column].iloc[0] != -1.0
+    assert "NUEVA" not in cached.columns
+    assert loader.verify_cache_integrity() == []
+
+
+def test_partition_views_do_not_mutate_cache():
+    loader = DataLoader(readonly=True)
+    balances = loader.balances_for("VALVULA_1")
+    balances["PERDIDAS_M3"] = 0.0
+    balances.sort_values("PERIODO", ascending=False, inplace=True)
+    assert loader.verify_cache_integrity() == []
+
+
+def test_routes_do_not_write_to_shared_frames(readonly_loader):
+    with TestClient(app) as client:
+        for path in ROUTES:
+            assert client.get(path).status_code == 200, path
+
+    assert readonly_loader._cache, "las rutas deberían haber cargado datasets"
+    assert readonly_loader.verify_cache_integrity() == []
+
+
+def test_integrity_guard_detects_writes(readonly_loader):
+    df = readonly_loader._entry("metrics").df
+    # Escritura directa sobre el frame compartido (lo que una ruta nunca debe hacer)
+    df.iloc[0, df.columns.get_loc(df.select_dtypes("number").columns[0])] += 1
+    assert readonly_loader.verify_cache_integrity() == ["metrics"]
@@ -0,0 +1,73 @@
+"""Carga single-flight: requests concurrentes con el caché frío leen cada archivo una vez"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.data_loader import DataLoader, data_loader
+
+
+REQUESTS = 64
+
+PATHS = [
+    "/api/dashboard/kpis",
+    "/api/balances/VALVULA_2",
+    "/api/models/metrics",
+    "/api/alerts/",
+]
+
+
+@pytest.fixture
+def counted_reads(monkeypatch):
+    """
+    Cuenta las lecturas de cada archivo por instancia de DataLoader ((loader, archivo) -> lecturas)
+
+    Cada lectura tarda un poco más para que los requests se solapen. Se cuenta por
+    instancia porque el loader global puede seguir recargando en segundo plano
+    (p. ej. el refresco de vistas materializadas de otro test).
+    """
+    reads = Counter()
+    lock = threading.Lock()
+    original_read_csv = DataLoader._read_csv
+
+    def counting_read_csv(self, relative_path, **kwargs):
+        with lock:
+            reads[(self, relative_path)] += 1
+        time.sleep(0.2)
+        return original_read_csv(self, relative_path, **kwargs)
+
+    monkeypatch.setattr(DataLoader, "_read_csv", counting_read_csv)
+    data_loader.clear_cache()
+    yield reads
+    data_loader.clear_cache()
+
+
+def test_concurrent_requests_parse_each_file_once(counted_reads):
+    paths = [PATHS[i % len(PATHS)] for i in range(REQUESTS)]
+    with TestClient(app) as client:
+        with ThreadPoolExecutor(max_workers=REQUESTS) as pool:
+            statuses = list(pool.map(lambda path: client.get(path).status_code, paths))
+
+    assert statuses == [200] * REQUESTS
+    reads = {path: count for (loader, path), count in counted_reads.items() if loader is data_loader}
+    assert reads, "los requests deberían haber leído archivos"
+    assert {path: count for path, count in reads.items() if count != 1} == {}
+
+
+def test_concurrent_loads_share_one_parse(counted_reads):
+    loader = DataLoader()
+    barrier = threading.Barrier(REQUESTS)
+
+    def load(_):
+        barrier.wait()
+        return loader._entry("balances_virtuales")
+
+    with ThreadPoolExecutor(max_workers=REQUESTS) as pool:
+        entries = list(pool.map(load, range(REQUESTS)))
+
+    assert len({id(entry) for entry in entries}) == 1
+    assert counted_reads[(loader, "Tabla_Balances_Virtuales.csv")] == 1
@@ -0,0 +1,57 @@
+"""Snapshots Parquet: frescos solo si se compilaron del contenido actual del CSV"""
+import os
+import shutil
+
+import pytest
+
+from app.config import settings
+from app.services import snapshots
+from app.services.data_loader import DataLoader
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """Metrics.csv copiado a una carpeta propia, con su snapshot compilado"""
+    path = tmp_path / "Metrics.csv"
+    shutil.copy2(settings.DATA_PATH / "Metrics.csv", path)
+    assert snapshots.compile_snapshots(tmp_path, force=True) == {"Metrics.csv": "compilado"}
+    return path
+
+
+def loader_for(csv_path):
+    loader = DataLoader()
+    loader.data_path = csv_path.parent
+    return loader
+
+
+def test_snapshot_load_reuses_stored_hash(csv_path, monkeypatch):
+    stored = snapshots.snapshot_source(csv_path)
+    hashed = []
+    original = snapshots.file_sha256
+    monkeypatch.setattr(snapshots, "file_sha256", lambda path: hashed.append(path) or original(path))
+
+    entry = loader_for(csv_path)._entry("metrics")
+    assert hashed == []
+    assert entry.state.sha256 == stored["sha256"]
+
+
+def test_restored_csv_with_older_mtime_is_not_fresh(csv_path):
+    content = csv_path.read_text(encoding="utf-8")
+    changed = content.replace("VALVULA_1;LightGBM;1", "VALVULA_1;LightGBM;9", 1)
+    assert changed != content and len(changed) == len(content)
+
+    # Mismo tamaño y un mtime anterior al del snapshot (como rsync -a o cp -p)
+    mtime = csv_path.stat().st_mtime - 86400
+    csv_path.write_text(changed, encoding="utf-8")
+    os.utime(csv_path, (mtime, mtime))
+
+    assert not snapshots.is_fresh(csv_path)
+    df = loader_for(csv_path).load_metrics()
+    assert str(df["MAE"].iloc[0]).startswith("9")
+
+
+def test_touched_csv_with_same_content_stays_fresh(csv_path):
+    os.utime(csv_path, None)
+    assert snapshots.is_fresh(csv_path)
@@ -0,0 +1,95 @@
+"""Paridad del evaluador NumPy (FlatForest) con predict de scikit-learn y LightGBM"""
+import numpy as np
+import pytest
+
+from app.services.tree_ensemble import FlatForest, UnsupportedModel
+
+
+N_FEATURES = 8
+TOLERANCE = 1e-9
+
+
+def _data(rows: int, seed: int, missing: bool = True):
+    """Features con ceros exactos y (opcionalmente) NaN, y un objetivo no lineal"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, N_FEATURES))
+    X[rng.random(X.shape) < 0.1] = 0.0
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) * 10 + X[:, 2] * X[:, 3] + rng.normal(size=rows)
+    if missing:
+        X[rng.random(X.shape) < 0.1] = np.nan
+    return X, y
+
+
+def _assert_parity(model, X):
+    flat = FlatForest.from_model(model)
+    expected = np.asarray(model.predict(X), dtype=np.float64)
+    np.testing.assert_allclose(flat.predict(X), expected, rtol=0, atol=TOLERANCE)
+    return flat
+
+
+@pytest.mark.parametrize("missing", [True, False])
+def test_random_forest_parity(missing):
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    X, y = _data(2000, seed=0, missing=missing)
+    model = ensemble.RandomForestRegressor(n_estimators=50, max_depth=8, random_state=0).fit(X, y)
+
+    X_test, _ = _data(500, seed=1, missing=missing)
+    flat = _assert_parity(model, X_test)
+    assert flat.n_trees == 50
+
+
+@pytest.mark.parametrize("batch", [1, 7, 500])
+def test_random_forest_parity_by_batch_size(batch):
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    X, y = _data(1000, seed=0)
+    model = ensemble.RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+
+    X_test, _ = _data(batch, seed=2)
+    _assert_parity(model, X_test)
+
+
+@pytest.mark.parametrize("missing", ["nan", "zero", "none"])
+def test_lightgbm_parity(missing):
+    lightgbm = pytest.importorskip("lightgbm")
+    X, y = _data(2000, seed=0)
+    model = lightgbm.LGBMRegressor(
+        n_estimators=100,
+        random_state=0,
+        verbose=-1,
+        use_missing=missing != "none",
+        zero_as_missing=missing == "zero"
+    ).fit(X, y)
+
+    X_test, _ = _data(500, seed=1)
+    _assert_parity(model, X_test)
+    # El Booster directo se aplana igual que el wrapper de scikit-learn
+    _assert_parity(model.booster_, X_test)
+
+
+def test_lightgbm_best_iteration():
+    lightgbm = pytest.importorskip("lightgbm")
+    X, y = _data(2000, seed=0)
+    X_valid, y_valid = _data(300, seed=3)
+    model = lightgbm.LGBMRegressor(n_estimators=300, learning_rate=0.3, random_state=0, verbose=-1).fit(
+        X, y, eval_set=[(X_valid, y_valid)], callbacks=[lightgbm.early_stopping(5, verbose=False)]
+    )
+    assert 0 < model.best_iteration_ < 300
+
+    flat = _assert_parity(model, _data(500, seed=1)[0])
+    assert flat.n_trees == model.best_iteration_
+
+
+def test_lightgbm_non_identity_objective_is_rejected():
+    lightgbm = pytest.importorskip("lightgbm")
+    X, y = _data(500, seed=0)
+    model = lightgbm.LGBMClassifier(n_estimators=5, verbose=-1).fit(np.nan_to_num(X), y > 0)
+    with pytest.raises(UnsupportedModel):
+        FlatForest.from_model(model)
+
+
+def test_wrong_feature_count_is_rejected():
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    X, y = _data(200, seed=0)
+    model = ensemble.RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y)
+    with pytest.raises(ValueError):
+        FlatForest.from_model(model).predict(X[:, :3])